@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_auditlog_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at', 'status', 'module'], name='audit_logs_created_6be9c2_idx'),
+        ),
+    ]
@@ -66,7 +66,10 @@ class AuditLog(models.Model):
             models.Index(fields=['action']),
             models.Index(fields=['module']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # 时间范围查询和游标分页
+            models.Index(fields=['created_at', 'id']),
+            # 时间范围内按状态、模块汇总（覆盖索引，不回表）
+            models.Index(fields=['created_at', 'status', 'module']),
             models.Index(fields=['object_type', 'object_id']),
         ]
     
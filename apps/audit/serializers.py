@@ -24,6 +24,18 @@ class AuditLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class AuditLogListSerializer(AuditLogSerializer):
+    """审计日志列表序列化器（不含操作人明细和请求/响应内容）"""
+    
+    class Meta(AuditLogSerializer.Meta):
+        fields = [
+            'id', 'operator', 'operator_name', 'operator_username',
+            'action', 'action_display', 'module', 'object_type', 'object_id',
+            'object_name', 'ip_address', 'request_method', 'request_path',
+            'status', 'status_display', 'response_time', 'created_at'
+        ]
+
+
 class AuditLogSummarySerializer(serializers.Serializer):
     """审计日志汇总序列化器"""
     
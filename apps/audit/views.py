@@ -10,11 +10,14 @@ from django.utils import timezone
 from datetime import timedelta
 
 from .models import AuditLog
-from .serializers import AuditLogSerializer, AuditLogSummarySerializer
+from .serializers import AuditLogSerializer, AuditLogListSerializer, AuditLogSummarySerializer
 from apps.users.permissions import IsAdminOrHR
+from apps.users.capabilities import has_capability, CAP_ADMIN_OR_HR
+from apps.common.pagination import CursorOptInPagination
+from apps.common.fieldsets import SparseFieldsetMixin
 
 
-class AuditLogViewSet(ModelViewSet):
+class AuditLogViewSet(SparseFieldsetMixin, ModelViewSet):
     """审计日志视图集"""
     
     queryset = AuditLog.objects.select_related('operator').all()
@@ -28,13 +31,24 @@ class AuditLogViewSet(ModelViewSet):
         'object_name', 'description', 'ip_address'
     ]
     ordering = ['-created_at']
+    # 支持 pagination=cursor 游标分页
+    pagination_class = CursorOptInPagination
+    
+    deferrable_fields = ['description', 'user_agent', 'request_params', 'response_result', 'error_message']
+    field_relations = {'operator_detail': 'operator'}
+    
+    def get_serializer_class(self):
+        """根据操作选择序列化器"""
+        if self.use_list_serializer():
+            return AuditLogListSerializer
+        return self.serializer_class
     
     def get_queryset(self):
         """根据权限过滤查询集"""
         user = self.request.user
         
         # 管理员可以查看所有日志
-        if user.role.code in ['admin', 'hr_manager']:
+        if has_capability(user, CAP_ADMIN_OR_HR):
             return self.queryset
         
         # 部门经理可以查看本部门日志
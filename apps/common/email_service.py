@@ -1,17 +1,21 @@
 """邮件通知服务"""
 from django.conf import settings
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from celery import shared_task
 import logging
 
+from .notifications import (
+    build_email_message, enqueue_email, get_notification_renderer, notification_batch
+)
+
 logger = logging.getLogger(__name__)
 
+SITE_NAME = 'TCMS培训管理系统'
+
 
 @shared_task
 def send_email_async(subject, message, recipient_list, html_message=None):
-    """异步发送邮件"""
+    """异步发送邮件（保留以兼容已入队的任务，新代码使用 enqueue_email）"""
     try:
         send_mail(
             subject=subject,
@@ -30,190 +34,138 @@ def send_email_async(subject, message, recipient_list, html_message=None):
 
 class EmailService:
     """邮件服务类"""
-    
+
+    @staticmethod
+    def send(template_name, subject, recipient, context):
+        """渲染模板并加入发送队列"""
+        if not recipient:
+            return
+
+        plain_message, html_message = get_notification_renderer(template_name).render(
+            dict(context, site_name=SITE_NAME)
+        )
+        enqueue_email(build_email_message(subject, plain_message, [recipient], html_message))
+
+    @staticmethod
+    def send_bulk(template_name, messages, shared_context=None):
+        """
+        批量发送同一模板的通知
+
+        messages 为 (subject, recipient, context) 列表，
+        公共变量放在 shared_context 中只写入一次
+        """
+        messages = [message for message in messages if message[1]]
+        if not messages:
+            return
+
+        rendered = get_notification_renderer(template_name).render_many(
+            [context for _, _, context in messages],
+            dict(shared_context or {}, site_name=SITE_NAME)
+        )
+
+        with notification_batch():
+            for (subject, recipient, _), (plain_message, html_message) in zip(messages, rendered):
+                enqueue_email(build_email_message(subject, plain_message, [recipient], html_message))
+
     @staticmethod
     def send_course_enrollment_notification(user, course):
         """发送课程报名通知"""
-        subject = f'课程报名成功 - {course.title}'
-
-        # HTML模板
-        html_message = render_to_string('course_enrollment.html', {
+        EmailService.send('course_enrollment', f'课程报名成功 - {course.title}', user.email, {
             'user': user,
             'course': course,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        # 纯文本版本
-        plain_message = strip_tags(html_message)
-        
-        # 发送邮件
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
     @staticmethod
     def send_exam_notification(user, exam):
         """发送考试通知"""
-        subject = f'考试通知 - {exam.title}'
-
-        html_message = render_to_string('exam_notification.html', {
+        EmailService.send('exam_notification', f'考试通知 - {exam.title}', user.email, {
             'user': user,
             'exam': exam,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
+
+    @staticmethod
+    def send_exam_notifications(users, exam):
+        """批量发送考试通知"""
+        EmailService.send_bulk(
+            'exam_notification',
+            [(f'考试通知 - {exam.title}', user.email, {'user': user}) for user in users],
+            {'exam': exam}
         )
-    
+
     @staticmethod
     def send_exam_result_notification(user, exam_result):
         """发送考试成绩通知"""
-        subject = f'考试成绩通知 - {exam_result.exam.title}'
-
-        html_message = render_to_string('exam_result.html', {
+        EmailService.send('exam_result', f'考试成绩通知 - {exam_result.exam.title}', user.email, {
             'user': user,
             'exam_result': exam_result,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
     @staticmethod
     def send_certificate_notification(user, certificate):
         """发送证书颁发通知"""
-        subject = f'培训证书颁发 - {certificate.name}'
-
-        html_message = render_to_string('certificate_notification.html', {
+        EmailService.send('certificate_notification', f'培训证书颁发 - {certificate.name}', user.email, {
             'user': user,
             'certificate': certificate,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
+    @staticmethod
+    def send_certificate_notifications(certificates):
+        """批量发送证书颁发通知"""
+        EmailService.send_bulk('certificate_notification', [
+            (f'培训证书颁发 - {certificate.name}', certificate.user.email,
+             {'user': certificate.user, 'certificate': certificate})
+            for certificate in certificates
+        ])
+
     @staticmethod
     def send_training_plan_approval_notification(plan, is_approved, approver, comment=''):
         """发送培训计划审批通知"""
-        subject = f'培训计划审批结果 - {plan.title}'
-        
         # 通知创建者
-        if plan.created_by and plan.created_by.email:
-            html_message = render_to_string('training_plan_approval.html', {
+        if plan.created_by:
+            EmailService.send('training_plan_approval', f'培训计划审批结果 - {plan.title}', plan.created_by.email, {
                 'plan': plan,
                 'is_approved': is_approved,
                 'approver': approver,
                 'comment': comment,
-                'site_name': 'TCMS培训管理系统'
             })
-            
-            plain_message = strip_tags(html_message)
-            
-            send_email_async.delay(
-                subject=subject,
-                message=plain_message,
-                recipient_list=[plan.created_by.email],
-                html_message=html_message
-            )
-    
+
     @staticmethod
     def send_password_reset_email(user, reset_token):
         """发送密码重置邮件"""
-        subject = '密码重置请求'
-
-        html_message = render_to_string('password_reset.html', {
+        EmailService.send('password_reset', '密码重置请求', user.email, {
             'user': user,
             'reset_token': reset_token,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
     @staticmethod
     def send_user_created_notification(user, temp_password):
         """发送用户创建通知"""
-        subject = '账户创建通知'
-
-        html_message = render_to_string('user_created.html', {
+        EmailService.send('user_created', '账户创建通知', user.email, {
             'user': user,
             'temp_password': temp_password,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
     @staticmethod
     def send_certificate_expiry_warning(user, certificate):
         """发送证书即将到期提醒"""
-        subject = f'证书即将到期提醒 - {certificate.name}'
-
-        html_message = render_to_string('certificate_expiry_warning.html', {
+        EmailService.send('certificate_expiry_warning', f'证书即将到期提醒 - {certificate.name}', user.email, {
             'user': user,
             'certificate': certificate,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
-    
+
+    @staticmethod
+    def send_certificate_expiry_warnings(certificates):
+        """批量发送证书即将到期提醒"""
+        EmailService.send_bulk('certificate_expiry_warning', [
+            (f'证书即将到期提醒 - {certificate.name}', certificate.user.email,
+             {'user': certificate.user, 'certificate': certificate})
+            for certificate in certificates
+        ])
+
     @staticmethod
     def send_training_reminder(user, course):
         """发送培训提醒"""
-        subject = f'培训提醒 - {course.title}'
-
-        html_message = render_to_string('training_reminder.html', {
+        EmailService.send('training_reminder', f'培训提醒 - {course.title}', user.email, {
             'user': user,
             'course': course,
-            'site_name': 'TCMS培训管理系统'
         })
-        
-        plain_message = strip_tags(html_message)
-        
-        send_email_async.delay(
-            subject=subject,
-            message=plain_message,
-            recipient_list=[user.email],
-            html_message=html_message
-        )
\ No newline at end of file
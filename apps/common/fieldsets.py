@@ -0,0 +1,139 @@
+"""稀疏字段集（?fields= / ?exclude=）"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import ListSerializer
+
+FIELDS_QUERY_PARAM = 'fields'
+EXCLUDE_QUERY_PARAM = 'exclude'
+
+# 按返回字段调整查询的操作
+OPTIMIZED_ACTIONS = ['list', 'retrieve']
+
+
+def parse_field_list(value):
+    """逗号分隔的字段列表"""
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def flatten_select_related(select_related, prefix=''):
+    """select_related 字典展开为查询路径"""
+    lookups = []
+    for name, children in select_related.items():
+        lookups.append(f'{prefix}{name}')
+        lookups.extend(flatten_select_related(children, f'{prefix}{name}__'))
+    return lookups
+
+
+def is_select_lookup(model, lookup):
+    """查询路径是否全部为外键/一对一（可以 select_related）"""
+    for name in lookup.split('__'):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not field.concrete or not (field.many_to_one or field.one_to_one):
+            return False
+        model = field.related_model
+    return True
+
+
+class SparseFieldsetMixin:
+    """
+    视图集稀疏字段集
+
+    GET 请求支持 ?fields=a,b 只返回指定字段、?exclude=a,b 排除字段；
+    列表和详情查询按实际返回的字段调整：
+    - deferrable_fields：未返回时 defer 的大字段
+    - field_relations：字段 -> 关联查询路径，字段都未返回时不再 select/prefetch 该关联
+    - field_annotations：字段 -> 查询集方法名，字段返回时调用该方法标注（如计数）
+    """
+
+    deferrable_fields = []
+    field_relations = {}
+    field_annotations = {}
+
+    def get_sparse_fields(self):
+        """请求的 (fields, exclude)"""
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return set(), set()
+        params = request.query_params
+        return parse_field_list(params.get(FIELDS_QUERY_PARAM)), parse_field_list(params.get(EXCLUDE_QUERY_PARAM))
+
+    def use_list_serializer(self):
+        """列表默认使用精简序列化器；指定 ?fields= 时从完整序列化器中选择字段"""
+        return self.action == 'list' and not self.get_sparse_fields()[0]
+
+    def prune_fields(self, serializer):
+        """按请求移除序列化器字段"""
+        fields, exclude = self.get_sparse_fields()
+        if not fields and not exclude:
+            return serializer
+        target = serializer.child if isinstance(serializer, ListSerializer) else serializer
+        for name in list(target.fields):
+            if (fields and name not in fields) or name in exclude:
+                del target.fields[name]
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.prune_fields(super().get_serializer(*args, **kwargs))
+
+    def get_returned_fields(self):
+        """实际返回的字段 -> 数据来源（属性路径的第一段）"""
+        serializer = self.get_serializer()
+        return {
+            name: field.source.split('.')[0]
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        }
+
+    def optimize_queryset(self, queryset):
+        """按返回的字段 defer 大字段，去掉不需要的关联查询"""
+        returned = self.get_returned_fields()
+        sources = set(returned.values())
+
+        deferred = [name for name in self.deferrable_fields if name not in sources]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        for name, method in self.field_annotations.items():
+            if name in returned:
+                queryset = getattr(queryset, method)()
+
+        if self.field_relations:
+            needed = {self.field_relations[name] for name in returned if name in self.field_relations}
+            unused = set(self.field_relations.values()) - needed
+            # 需要的关联路径的上级也需要
+            needed_prefixes = {
+                '__'.join(lookup.split('__')[:depth])
+                for lookup in needed for depth in range(1, lookup.count('__') + 2)
+            }
+            unused -= needed_prefixes
+
+            # select_related() 无参数（全部外键）时保持不变
+            if queryset.query.select_related is not True:
+                current = queryset.query.select_related or {}
+                select = [lookup for lookup in flatten_select_related(current) if lookup not in unused]
+                select += [
+                    lookup for lookup in needed
+                    if lookup not in select and is_select_lookup(queryset.model, lookup)
+                ]
+                queryset = queryset.select_related(None)
+                if select:
+                    queryset = queryset.select_related(*select)
+
+            prefetch = [
+                lookup for lookup in queryset._prefetch_related_lookups
+                if getattr(lookup, 'prefetch_to', lookup) not in unused
+            ]
+            prefetch += [
+                lookup for lookup in needed
+                if lookup not in prefetch and not is_select_lookup(queryset.model, lookup)
+            ]
+            queryset = queryset.prefetch_related(None).prefetch_related(*prefetch)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in OPTIMIZED_ACTIONS:
+            queryset = self.optimize_queryset(queryset)
+        return queryset
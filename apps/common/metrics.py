@@ -0,0 +1,243 @@
+"""请求指标：查询数、数据库耗时、序列化耗时（按视图聚合，Prometheus 文本格式输出）"""
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import BasePermission
+from rest_framework.settings import api_settings
+
+from apps.users.capabilities import has_capability, CAP_ADMIN
+
+logger = logging.getLogger(__name__)
+
+# 直方图分桶
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# 指标名称 -> (说明, 分桶)
+HISTOGRAMS = {
+    'tcms_request_duration_ms': ('请求总耗时（毫秒）', DURATION_BUCKETS_MS),
+    'tcms_request_db_ms': ('请求内数据库耗时（毫秒）', DURATION_BUCKETS_MS),
+    'tcms_request_queries': ('请求内 SQL 查询数', QUERY_COUNT_BUCKETS),
+    'tcms_request_serialize_ms': ('响应序列化（渲染）耗时（毫秒）', DURATION_BUCKETS_MS),
+}
+SLOWEST_QUERY_METRIC = 'tcms_request_slowest_query_ms'
+
+UNRESOLVED_VIEW = 'unresolved'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class QueryRecorder:
+    """execute_wrapper 回调：统计查询数、总耗时和最慢的 SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.duration_ms += elapsed
+            if elapsed > self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql
+
+
+class MetricsRegistry:
+    """进程内指标（每个工作进程各自聚合）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.slowest = {}
+
+    def observe(self, view, method, duration_ms, recorder, serialize_ms):
+        """记录一次请求"""
+        labels = (view, method)
+        values = {
+            'tcms_request_duration_ms': duration_ms,
+            'tcms_request_db_ms': recorder.duration_ms,
+            'tcms_request_queries': recorder.count,
+            'tcms_request_serialize_ms': serialize_ms,
+        }
+        with self._lock:
+            for name, value in values.items():
+                key = (name, labels)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+                self.histograms[key].observe(value)
+            slowest = recorder.slowest_ms > self.slowest.get(labels, 0.0)
+            if slowest:
+                self.slowest[labels] = recorder.slowest_ms
+        if slowest:
+            # SQL 文本只写日志（按指纹检索），不作为指标标签，避免标签基数无限增长
+            sql = truncate_sql(recorder.slowest_sql)
+            logger.info(
+                f"最慢 SQL: view={view} method={method} {recorder.slowest_ms:.1f}ms "
+                f"fingerprint={sql_fingerprint(sql)} sql={sql}"
+            )
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, (description, _) in HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, (view, method)), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'view="{escape_label(view)}",method="{method}"'
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.3f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.total}')
+
+            lines.append(f'# HELP {SLOWEST_QUERY_METRIC} 最慢的单条 SQL 耗时（毫秒，SQL 文本见日志）')
+            lines.append(f'# TYPE {SLOWEST_QUERY_METRIC} gauge')
+            for (view, method), duration in sorted(self.slowest.items()):
+                lines.append(
+                    f'{SLOWEST_QUERY_METRIC}{{view="{escape_label(view)}",method="{method}"}} {duration:.3f}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def escape_label(value):
+    """Prometheus 标签值转义"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def truncate_sql(sql):
+    """SQL 压缩空白并截断"""
+    sql = ' '.join(sql.split())
+    limit = settings.REQUEST_METRICS_SQL_MAX_LENGTH
+    return sql if len(sql) <= limit else sql[:limit] + '...'
+
+
+def sql_fingerprint(sql):
+    """SQL 指纹（短哈希，用于在日志中检索）"""
+    return hashlib.sha1(sql.encode()).hexdigest()[:12]
+
+
+def get_view_name(request):
+    """解析后的视图名称（如 training:course-list），未匹配路由时为 unresolved"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.view_name or match._func_path
+
+
+class RequestMetricsMiddleware:
+    """
+    请求指标中间件
+
+    通过 connection.execute_wrapper 统计每个请求的查询数、数据库耗时和最慢的 SQL；
+    DRF 响应的渲染耗时记为序列化耗时（不含内层中间件的处理）；按视图名称聚合到进程内直方图。
+    REQUEST_METRICS_SERVER_TIMING 开启时添加 Server-Timing 响应头
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        duration_ms = (finished - started) * 1000
+        serialize_ms = getattr(request, '_metrics_render_ms', 0.0)
+        registry.observe(get_view_name(request), request.method, duration_ms, recorder, serialize_ms)
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={recorder.duration_ms:.1f};desc="{recorder.count} queries"',
+                f'serialize;dur={serialize_ms:.1f}',
+                f'total;dur={duration_ms:.1f}',
+            ])
+        return response
+
+    def process_template_response(self, request, response):
+        """视图已返回、响应尚未渲染（DRF Response）：记录渲染开始，渲染完成后回调计时"""
+        render_started = time.perf_counter()
+
+        def render_finished(rendered):
+            request._metrics_render_ms = (time.perf_counter() - render_started) * 1000
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+
+METRICS_TOKEN_AUTH = 'metrics_token'
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """采集端令牌认证：Authorization: Bearer <METRICS_AUTH_TOKEN>，不匹配时交给其他认证方式"""
+
+    def authenticate(self, request):
+        token = settings.METRICS_AUTH_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+            return AnonymousUser(), METRICS_TOKEN_AUTH
+        return None
+
+
+class HasMetricsAccess(BasePermission):
+    """指标接口：采集端令牌或系统管理员"""
+
+    def has_permission(self, request, view):
+        return request.auth == METRICS_TOKEN_AUTH or has_capability(request.user, CAP_ADMIN)
+
+
+@api_view(['GET'])
+@authentication_classes([MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+@permission_classes([HasMetricsAccess])
+def metrics(request):
+    """Prometheus 指标"""
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
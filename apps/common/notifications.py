@@ -0,0 +1,284 @@
+"""批量通知发送"""
+import copy
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template import Context, engines
+from django.template.base import TextNode, VariableNode
+from django.template.defaulttags import IfNode
+from django.template.loader_tags import BlockNode, ExtendsNode
+
+logger = logging.getLogger(__name__)
+
+# 每个批量任务最多携带的邮件数
+EMAIL_BATCH_SIZE = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+
+# 单封邮件最多重试次数及重试间隔（秒）
+EMAIL_MAX_RETRIES = getattr(settings, 'EMAIL_MAX_RETRIES', 3)
+EMAIL_RETRY_DELAY = getattr(settings, 'EMAIL_RETRY_DELAY', 60)
+
+# 各邮件后端每秒最多发送的邮件数（未配置的后端不限速）
+EMAIL_RATE_LIMITS = getattr(settings, 'EMAIL_RATE_LIMITS', {})
+EMAIL_RATE_CACHE_KEY = 'notifications:email_rate:{backend}:{window}'
+
+_local = threading.local()
+
+# 已编译的通知模板（模板名 -> 渲染器）
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+class NotificationRenderer:
+    """
+    通知邮件渲染器
+
+    HTML 和纯文本部分分别使用 email/<name>.html 和 email/<name>.txt 模板，
+    模板只编译一次并常驻内存
+    """
+
+    def __init__(self, name):
+        engine = engines['django']
+        self.name = name
+        self.html_template = engine.get_template(f'email/{name}.html').template
+        self.text_template = engine.get_template(f'email/{name}.txt').template
+
+    def render(self, context):
+        """渲染单封邮件，返回 (纯文本, HTML)"""
+        return self.render_many([context])[0]
+
+    def render_many(self, contexts, shared_context=None):
+        """
+        批量渲染
+
+        所有收件人共用同一个上下文对象，公共变量只写入一次，
+        每个收件人的变量压栈渲染后弹出
+        """
+        contexts = list(contexts)
+        shared_context = shared_context or {}
+        html_context = Context(shared_context, autoescape=True)
+        text_context = Context(shared_context, autoescape=False)
+
+        text_template, html_template = self.text_template, self.html_template
+        if shared_context and len(contexts) > 1:
+            # 与收件人无关的变量只渲染一次
+            names = set(shared_context) - {key for context in contexts for key in context}
+            text_template = specialize_template(text_template, text_context, names)
+            html_template = specialize_template(html_template, html_context, names)
+
+        results = []
+        for context in contexts:
+            with text_context.push(context):
+                text = text_template.render(text_context)
+            with html_context.push(context):
+                html = html_template.render(html_context)
+            results.append((text, html))
+        return results
+
+
+def _uses_only(filter_expression, names):
+    """判断变量表达式（含过滤器参数）是否只引用指定变量"""
+    variables = [filter_expression.var] + [
+        arg for _, args in filter_expression.filters for lookup, arg in args if lookup
+    ]
+    for var in variables:
+        lookups = getattr(var, 'lookups', None)
+        if lookups is not None and lookups[0] not in names:
+            return False
+    return True
+
+
+def _freeze_nodes(nodelist, context, names):
+    """将只依赖公共变量的变量节点替换为渲染后的文本节点"""
+    for index, node in enumerate(nodelist):
+        if isinstance(node, VariableNode):
+            if _uses_only(node.filter_expression, names):
+                nodelist[index] = TextNode(node.render_annotated(context))
+        elif isinstance(node, IfNode):
+            for _, child in node.conditions_nodelists:
+                _freeze_nodes(child, context, names)
+        elif isinstance(node, (BlockNode, ExtendsNode)):
+            # 循环等会引入新变量的标签不做处理
+            _freeze_nodes(node.nodelist, context, names)
+
+
+def specialize_template(template, context, names):
+    """
+    复制已编译模板，并预先渲染只依赖公共变量的部分
+
+    父模板在渲染时仍按原样加载
+    """
+    if not names:
+        return template
+    template = copy.deepcopy(template, {id(template.engine): template.engine})
+    _freeze_nodes(template.nodelist, context, names)
+    return template
+
+
+def get_notification_renderer(name):
+    """获取通知渲染器（调试模式下每次重新加载模板）"""
+    if settings.DEBUG:
+        return NotificationRenderer(name)
+
+    renderer = _renderers.get(name)
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get(name)
+            if renderer is None:
+                renderer = _renderers[name] = NotificationRenderer(name)
+    return renderer
+
+
+def build_email_message(subject, body, recipient_list, html_message=None):
+    """构建可序列化的邮件数据（用于传递给Celery任务）"""
+    return {
+        'subject': subject,
+        'body': body,
+        'to': [r for r in recipient_list if r],
+        'html': html_message,
+        'attempts': 0,
+    }
+
+
+def enqueue_email(message):
+    """
+    加入发送队列
+
+    在 notification_batch() 内调用时暂存，批次结束后统一分批发送；
+    否则在当前事务提交后立即发送
+    """
+    if not message['to']:
+        return
+
+    queue = getattr(_local, 'queue', None)
+    if queue is not None:
+        queue.append(message)
+    else:
+        dispatch_emails([message])
+
+
+@contextmanager
+def notification_batch():
+    """
+    合并批次内的所有通知
+
+    用法：
+        with notification_batch():
+            for user in users:
+                EmailService.send_exam_notification(user, exam)
+    """
+    # 嵌套使用时并入外层批次
+    if getattr(_local, 'queue', None) is not None:
+        yield
+        return
+
+    _local.queue = []
+    try:
+        yield
+        queue = _local.queue
+    finally:
+        _local.queue = None
+
+    dispatch_emails(queue)
+
+
+def dispatch_emails(messages, countdown=None):
+    """按批次大小拆分并在事务提交后提交异步任务"""
+    messages = list(messages)
+    if not messages:
+        return
+
+    def submit():
+        for start in range(0, len(messages), EMAIL_BATCH_SIZE):
+            batch = messages[start:start + EMAIL_BATCH_SIZE]
+            if countdown:
+                send_email_batch.apply_async(args=[batch], countdown=countdown)
+            else:
+                send_email_batch.delay(batch)
+
+    transaction.on_commit(submit)
+
+
+def wait_for_send_slot(backend):
+    """
+    按后端限速
+
+    以秒为窗口在缓存中计数，多个 worker 共享同一限额
+    """
+    rate = EMAIL_RATE_LIMITS.get(backend)
+    if not rate:
+        return
+
+    while True:
+        window = int(time.time())
+        key = EMAIL_RATE_CACHE_KEY.format(backend=backend, window=window)
+        cache.add(key, 0, 2)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # 计数键恰好过期，重新进入下一轮
+            continue
+        if count <= rate:
+            return
+        time.sleep(max(window + 1 - time.time(), 0))
+
+
+@shared_task
+def send_email_batch(messages):
+    """
+    批量发送邮件
+
+    所有邮件共用一个连接；失败的邮件单独重新入队，不影响同批其他邮件
+    """
+    backend = settings.EMAIL_BACKEND
+    connection = get_connection(fail_silently=False)
+    failed = []
+    sent = 0
+
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"邮件服务器连接失败: {str(e)}")
+        messages, failed = [], list(messages)
+
+    try:
+        for message in messages:
+            email = EmailMultiAlternatives(
+                subject=message['subject'],
+                body=message['body'],
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=message['to'],
+                connection=connection
+            )
+            if message.get('html'):
+                email.attach_alternative(message['html'], 'text/html')
+
+            wait_for_send_slot(backend)
+            try:
+                sent += connection.send_messages([email])
+            except Exception as e:
+                logger.error(f"邮件发送失败: {message['subject']} -> {message['to']}, 错误: {str(e)}")
+                failed.append(message)
+    finally:
+        connection.close()
+
+    # 按已重试次数分组，逐次延长重试间隔
+    retry = {}
+    for message in failed:
+        attempts = message.get('attempts', 0) + 1
+        if attempts > EMAIL_MAX_RETRIES:
+            logger.error(f"邮件重试次数已用尽: {message['subject']} -> {message['to']}")
+            continue
+        retry.setdefault(attempts, []).append(dict(message, attempts=attempts))
+
+    for attempts, batch in retry.items():
+        dispatch_emails(batch, countdown=EMAIL_RETRY_DELAY * attempts)
+
+    logger.info(f"批量邮件发送完成: 成功 {sent} 封, 失败 {len(failed)} 封")
+    return sent
@@ -0,0 +1,241 @@
+"""分页（页码分页 + 可选的游标分页）"""
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    游标分页：按 (created_at, id) 倒序的键集分页
+
+    游标记录上一页边界行的 (created_at, id)，翻页时用
+    created_at < c OR (created_at = c AND id < i) 定位，不使用 OFFSET 和 COUNT，
+    任意深度的页与第一页开销相同（需要 (created_at, id) 联合索引）
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = '无效的游标'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+
+    def get_page_size(self, request):
+        """页大小（支持 page_size 参数）"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, item, reverse):
+        """边界行 -> 游标字符串"""
+        payload = json.dumps({'c': item.created_at.isoformat(), 'i': item.pk, 'r': int(reverse)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """游标字符串 -> (created_at, id, reverse)，没有游标时返回 None"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            created_at = parse_datetime(payload['c'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, reverse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        # 固定按 (created_at, id) 倒序，忽略 ordering 参数
+        queryset = queryset.order_by()
+        reverse = False
+        if cursor is None:
+            queryset = queryset.order_by('-created_at', '-pk')
+        else:
+            created_at, pk, reverse = cursor
+            if reverse:
+                # 上一页：取边界之后（更新）的行，正序读取后再反转
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+                ).order_by('created_at', 'pk')
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                ).order_by('-created_at', '-pk')
+
+        # 多取一行判断是否还有数据
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': OrderedDict([
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ])
+        })
+
+
+COUNT_CACHE_KEY = 'pagination:count:{view}:{query}'
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    根据数据库表统计信息估算行数（MySQL / PostgreSQL），不支持时返回 None
+
+    统计信息由数据库定期更新，与实际行数可能有偏差
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class CountedPaginator(DjangoPaginator):
+    """使用预先得到的总数，不再执行 COUNT"""
+
+    def __init__(self, object_list, per_page, total=0, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    页码分页，总数按 (视图, 过滤条件) 缓存一段时间
+
+    请求参数 count=estimated 且未过滤时，使用数据库表统计信息估算总数；
+    响应中的 count_exact 表示总数是否精确
+    """
+
+    count_mode_query_param = 'count'
+
+    def get_count_cache_key(self, queryset, view):
+        """缓存键：视图 + 去掉排序和返回列后的 SQL 摘要（包含过滤和权限条件）"""
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+        return COUNT_CACHE_KEY.format(view=type(view).__name__ if view else '', query=digest)
+
+    def get_count(self, queryset, request, view):
+        """获取总数，设置 count_exact"""
+        self.count_exact = True
+        if request.query_params.get(self.count_mode_query_param) == 'estimated' and not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None:
+                self.count_exact = False
+                return estimate
+
+        try:
+            key = self.get_count_cache_key(queryset, view)
+        except EmptyResultSet:
+            return 0
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_page_size(request):
+            self.django_paginator_class = partial(
+                CountedPaginator, total=self.get_count(queryset, request, view)
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.count_exact
+        return response
+
+
+class CursorOptInPagination(CachedCountPagination):
+    """
+    默认页码分页（总数缓存），请求参数 pagination=cursor（或携带 cursor）时改用游标分页
+
+    游标分页不统计总数，深分页不再随 OFFSET 线性变慢
+    """
+
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetCursorPagination
+
+    def use_cursor(self, request):
+        """是否使用游标分页"""
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
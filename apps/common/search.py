@@ -0,0 +1,210 @@
+"""全文检索（可替换的检索后端）"""
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, Count, FloatField, Max, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+# 相关度标注字段
+RELEVANCE_FIELD = 'search_relevance'
+
+# 数据库类型 -> 默认检索后端
+DEFAULT_BACKENDS = {
+    'mysql': 'apps.common.search.MySQLFulltextBackend',
+}
+FALLBACK_BACKEND = 'apps.common.search.InvertedIndexBackend'
+
+WORD_RE = re.compile(r'\w+')
+
+# 倒排索引命中过多时回退到 LIKE（常见词 LIKE 很快就能找满一页，且避免过长的 IN 列表）
+MAX_INDEX_MATCHES = 1000
+
+
+def ngrams(text):
+    """文本 -> 单字和二元组（与 MySQL ngram 解析器 ngram_token_size=2 一致，中文无需分词）"""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        grams.update(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+class SearchBackend:
+    """检索后端：返回过滤并标注相关度的查询集，不支持时返回 None（回退到 LIKE）"""
+
+    def search(self, queryset, fields, terms):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """始终使用 LIKE 检索"""
+
+    def search(self, queryset, fields, terms):
+        return None
+
+
+class MySQLFulltextBackend(SearchBackend):
+    """
+    MySQL FULLTEXT 检索（BOOLEAN MODE）
+
+    fields 必须与表上 ngram 全文索引的列完全一致；
+    每个检索词作为短语匹配，所有检索词都需命中。
+    命中不保证与 LIKE 完全一致：短语按 ngram 词元匹配，受排序规则（大小写、全半角）
+    和 ngram_token_size 等服务器配置影响
+    """
+
+    def search(self, queryset, fields, terms):
+        # 短于 ngram 长度的词无法使用全文索引
+        if any(len(term) < settings.SEARCH_NGRAM_SIZE for term in terms):
+            return None
+
+        connection = connections[queryset.db]
+        quote = connection.ops.quote_name
+        opts = queryset.model._meta
+        columns = ', '.join(
+            f'{quote(opts.db_table)}.{quote(opts.get_field(name).column)}' for name in fields
+        )
+        against = ' '.join('+"{}"'.format(term.replace('"', ' ')) for term in terms)
+        relevance = RawSQL(
+            f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)', [against], output_field=FloatField()
+        )
+        return queryset.annotate(**{RELEVANCE_FIELD: relevance}).filter(**{f'{RELEVANCE_FIELD}__gt': 0})
+
+
+class InvertedIndex:
+    """进程内倒排索引：n-gram -> 主键集合，保存小写文本用于确认子串和计算相关度"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.documents = {}
+        self.postings = defaultdict(set)
+        for pk, *values in rows:
+            texts = [str(value).lower() if value is not None else '' for value in values]
+            self.documents[pk] = texts
+            for text in texts:
+                for gram in ngrams(text):
+                    self.postings[gram].add(pk)
+
+    def candidates(self, term):
+        """包含检索词所有 n-gram 的主键"""
+        grams = ngrams(term)
+        if not grams:
+            return set()
+        sets = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        return set.intersection(*sets)
+
+    def search(self, terms, limit=None):
+        """
+        返回 {主键: 相关度}，候选超过 limit 时返回 None
+
+        与 LIKE 语义一致：每个检索词都需作为子串出现在某个字段中；
+        相关度为各词在各字段出现次数之和，靠前的字段权重更高
+        """
+        terms = [term.lower() for term in terms]
+        matched = None
+        for term in terms:
+            found = self.candidates(term)
+            matched = found if matched is None else matched & found
+            if not matched:
+                return {}
+        if limit is not None and len(matched) > limit:
+            return None
+
+        scores = {}
+        for pk in matched:
+            texts = self.documents[pk]
+            weights = range(len(texts), 0, -1)
+            score = 0
+            for term in terms:
+                hits = sum(text.count(term) * weight for text, weight in zip(texts, weights))
+                if not hits:
+                    break
+                score += hits
+            else:
+                scores[pk] = float(score)
+        return scores
+
+
+class InvertedIndexBackend(SearchBackend):
+    """
+    进程内倒排索引检索（SQLite 开发/测试环境）
+
+    按 (模型, 字段) 全表建立索引，记录数或最近更新时间变化时重建
+    """
+
+    _indexes = {}
+    _lock = threading.Lock()
+
+    def get_version(self, model, using):
+        """数据版本：记录数 + 最近更新时间"""
+        manager = model._default_manager.using(using)
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            version = manager.aggregate(total=Count('pk'), latest=Max('updated_at'))
+            return version['total'], version['latest']
+        return manager.count(), None
+
+    def get_index(self, model, fields, using):
+        """获取（必要时重建）索引"""
+        key = (model._meta.label, tuple(fields), using)
+        version = self.get_version(model, using)
+        index = self._indexes.get(key)
+        if index is None or index.version != version:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None or index.version != version:
+                    rows = model._default_manager.using(using).values_list('pk', *fields).iterator()
+                    index = self._indexes[key] = InvertedIndex(version, rows)
+        return index
+
+    def search(self, queryset, fields, terms):
+        scores = self.get_index(queryset.model, fields, queryset.db).search(terms, MAX_INDEX_MATCHES)
+        if scores is None:
+            return None
+        if not scores:
+            return queryset.none()
+        relevance = Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            default=Value(0.0), output_field=FloatField()
+        )
+        return queryset.filter(pk__in=list(scores)).annotate(**{RELEVANCE_FIELD: relevance})
+
+
+_backends = {}
+
+
+def get_search_backend(using='default'):
+    """按配置（SEARCH_BACKEND）或数据库类型选择检索后端"""
+    path = settings.SEARCH_BACKEND or DEFAULT_BACKENDS.get(connections[using].vendor, FALLBACK_BACKEND)
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    全文检索过滤
+
+    视图的 fulltext_fields（与数据库全文索引的列一致）交给检索后端，
+    未指定 ordering 时按相关度排序；未配置或后端不支持时回退到 search_fields 的 LIKE 检索。
+    需放在 OrderingFilter 之后，以便在默认排序前加上相关度
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'fulltext_fields', None)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return super().filter_queryset(request, queryset, view)
+
+        result = get_search_backend(queryset.db).search(queryset, fields, terms)
+        if result is None:
+            return super().filter_queryset(request, queryset, view)
+
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            result = result.order_by(f'-{RELEVANCE_FIELD}', *result.query.order_by)
+        return result
@@ -5,4 +5,7 @@ class CompetencyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.competency'
     label = 'competency'
-    verbose_name = '能力管理'
\ No newline at end of file
+    verbose_name = '能力管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
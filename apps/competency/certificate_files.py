@@ -0,0 +1,138 @@
+"""Certificate PDF files"""
+import hashlib
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Certificate
+from .pdf import render_certificate_pdf
+
+CERTIFICATE_ZIP_DIR = 'certificates/exports'
+
+
+def certificate_pdf_name(certificate):
+    """证书PDF存储路径（按证书ID + 更新时间区分版本）"""
+    version = certificate.updated_at.strftime('%Y%m%d%H%M%S%f')
+    return f"certificates/{certificate.issue_date:%Y/%m}/{certificate.id}_{version}.pdf"
+
+
+def build_pdf_payload(certificate):
+    """提取渲染所需字段"""
+    from apps.common.email_service import SITE_NAME
+
+    return {
+        'site_name': SITE_NAME,
+        'name': certificate.name,
+        'holder': certificate.user.real_name,
+        'certificate_no': certificate.certificate_no,
+        'competency': certificate.competency.name if certificate.competency else '',
+        'issue_date': certificate.issue_date.strftime('%Y年%m月%d日'),
+        'expiry_date': certificate.expiry_date.strftime('%Y年%m月%d日') if certificate.expiry_date else '',
+        'issued_by': certificate.issued_by.real_name if certificate.issued_by else '',
+        'verification_code': certificate.verification_code,
+    }
+
+
+def render_certificate_pdfs(certificates):
+    """
+    确保证书PDF已生成，返回 {证书ID: 存储路径}
+
+    已存在的版本直接复用；缺失的在当前进程内逐个渲染（在 Celery 任务中调用，
+    大批量由任务拆分为子任务并行）
+    """
+    certificates = list(certificates)
+    names = {certificate.id: certificate_pdf_name(certificate) for certificate in certificates}
+    pending = [c for c in certificates if not default_storage.exists(names[c.id])]
+    if not pending:
+        return names
+
+    for certificate in pending:
+        name = names[certificate.id]
+        content = render_certificate_pdf(build_pdf_payload(certificate))
+        # 清理旧版本
+        old_name = certificate.certificate_file.name
+        if old_name and old_name != name and default_storage.exists(old_name):
+            default_storage.delete(old_name)
+        # 并发渲染同一版本时只保留先写入的文件；存储改名时记录实际路径
+        if not default_storage.exists(name):
+            names[certificate.id] = default_storage.save(name, ContentFile(content))
+        certificate.certificate_file.name = names[certificate.id]
+
+    # 只更新文件字段，不改变更新时间（更新时间是文件版本号）
+    Certificate.objects.bulk_update(pending, ['certificate_file'], batch_size=500)
+    return names
+
+
+def exam_certificates(exam_id):
+    """考试的全部证书"""
+    return list(
+        Certificate.objects.filter(exam_result__exam_id=exam_id)
+        .select_related('user', 'competency', 'issued_by')
+        .order_by('id')
+    )
+
+
+def exam_certificates_zip_name(exam_id, certificates):
+    """ZIP 存储路径：按包含的证书及其版本命名，证书未变化时直接复用"""
+    digest = hashlib.sha1(
+        '|'.join(certificate_pdf_name(c) for c in certificates).encode()
+    ).hexdigest()[:16]
+    return f'{CERTIFICATE_ZIP_DIR}/exam_{exam_id}_{digest}.zip'
+
+
+def build_exam_certificates_zip(exam_id):
+    """
+    打包考试的全部证书PDF，返回ZIP存储路径（无证书时返回 None）
+
+    生成新版本后删除该考试的旧版本ZIP
+    """
+    certificates = exam_certificates(exam_id)
+    if not certificates:
+        return None
+
+    zip_name = exam_certificates_zip_name(exam_id, certificates)
+    if default_storage.exists(zip_name):
+        return zip_name
+
+    names = render_certificate_pdfs(certificates)
+    with tempfile.TemporaryFile() as archive:
+        # PDF 本身已压缩，直接存储
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zf:
+            for certificate in certificates:
+                with default_storage.open(names[certificate.id], 'rb') as pdf:
+                    zf.writestr(f'{certificate.certificate_no}_{certificate.user.real_name}.pdf', pdf.read())
+        archive.seek(0)
+        default_storage.save(zip_name, File(archive))
+
+    prefix = f'exam_{exam_id}_'
+    for name in _export_files():
+        if name.startswith(prefix) and f'{CERTIFICATE_ZIP_DIR}/{name}' != zip_name:
+            default_storage.delete(f'{CERTIFICATE_ZIP_DIR}/{name}')
+    return zip_name
+
+
+def _export_files():
+    """导出目录下的文件名"""
+    try:
+        return default_storage.listdir(CERTIFICATE_ZIP_DIR)[1]
+    except FileNotFoundError:
+        return []
+
+
+def cleanup_certificate_exports(max_age=None):
+    """删除超过保留时间的证书ZIP，返回删除数量"""
+    max_age = max_age or timedelta(hours=settings.CERTIFICATE_EXPORT_RETENTION_HOURS)
+    cutoff = timezone.now() - max_age
+    deleted = 0
+    for name in _export_files():
+        path = f'{CERTIFICATE_ZIP_DIR}/{name}'
+        if default_storage.get_modified_time(path) < cutoff:
+            default_storage.delete(path)
+            deleted += 1
+    return deleted
@@ -0,0 +1,125 @@
+"""Batch certificate issuance"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Certificate, CompetencyAssessment
+from .numbering import allocate_certificate_numbers, allocate_verification_codes
+from .signals import certificates_changed
+from .utils import invalidate_certificate_verification
+
+# 单次批量颁发的评估数量上限
+CERTIFICATE_BULK_ISSUE_LIMIT = 5000
+
+# 默认有效期（天）
+CERTIFICATE_VALID_DAYS = 365
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def _issue(pending, issued_by, expiry_date=None):
+    """
+    批量写入证书并发送颁发通知
+
+    pending 为未保存的证书列表；编号和验证码整批分配，
+    通知在事务提交后合并为一批发送
+    """
+    if not pending:
+        return []
+
+    from apps.common.email_service import EmailService
+
+    issue_date = timezone.now().date()
+    expiry_date = expiry_date or issue_date + timedelta(days=CERTIFICATE_VALID_DAYS)
+
+    with transaction.atomic():
+        numbers = allocate_certificate_numbers(len(pending))
+        codes = allocate_verification_codes(len(pending))
+        for certificate, number, code in zip(pending, numbers, codes):
+            certificate.certificate_no = number
+            certificate.verification_code = code
+            certificate.issue_date = issue_date
+            certificate.expiry_date = expiry_date
+            certificate.issued_by = issued_by
+
+        certificates = Certificate.objects.bulk_create(pending, batch_size=BULK_CREATE_BATCH_SIZE)
+        # 部分数据库（如 MySQL）bulk_create 不返回主键，按证书编号查回
+        ids = dict(Certificate.objects.filter(certificate_no__in=numbers).values_list('certificate_no', 'id'))
+        for certificate in certificates:
+            certificate.id = ids[certificate.certificate_no]
+        EmailService.send_certificate_notifications(certificates)
+
+        if settings.CERTIFICATE_PDF_PREWARM:
+            from .tasks import render_certificate_pdfs
+            ids = [certificate.id for certificate in certificates]
+            transaction.on_commit(lambda: render_certificate_pdfs.delay(ids))
+
+    # bulk_create 不触发信号，手动清除可能存在的验证缓存并通知证书变更
+    invalidate_certificate_verification(codes)
+    certificates_changed.send(sender=Certificate, user_ids=[certificate.user_id for certificate in certificates])
+    return certificates
+
+
+def issue_assessment_certificates(assessment_ids, issued_by, expiry_date=None):
+    """
+    为已审批且尚未颁发证书的能力评估批量颁发证书
+
+    返回新颁发的证书列表；评估行加锁后再判断是否已颁发，并发颁发不会重复
+    """
+    with transaction.atomic():
+        locked_ids = list(CompetencyAssessment.objects.select_for_update().filter(
+            id__in=assessment_ids,
+            status=CompetencyAssessment.Status.APPROVED
+        ).values_list('id', flat=True))
+        assessments = CompetencyAssessment.objects.filter(
+            id__in=locked_ids,
+            certificate__isnull=True
+        ).select_related('user', 'competency')
+
+        return _issue([
+            Certificate(
+                name=f"{assessment.competency.name}证书",
+                user=assessment.user,
+                competency=assessment.competency,
+                assessment=assessment,
+            )
+            for assessment in assessments
+        ], issued_by, expiry_date)
+
+
+def issue_exam_certificates(exam, issued_by, competency=None, expiry_date=None):
+    """
+    为考试通过且尚未颁发证书的成绩批量颁发证书
+
+    返回新颁发的证书列表；成绩行加锁后再判断是否已颁发，并发颁发不会重复
+    """
+    from apps.examination.models import ExamResult
+
+    with transaction.atomic():
+        locked_ids = list(ExamResult.objects.select_for_update().filter(
+            exam=exam,
+            is_passed=True
+        ).values_list('id', flat=True))
+        results = list(ExamResult.objects.filter(
+            id__in=locked_ids,
+            certificate__isnull=True
+        ).select_related('user'))
+
+        certificates = _issue([
+            Certificate(
+                name=f"{exam.title}证书",
+                user=result.user,
+                competency=competency,
+                exam_result=result,
+            )
+            for result in results
+        ], issued_by, expiry_date)
+
+        # 考试成绩上的证书编号与证书保持一致
+        for result, certificate in zip(results, certificates):
+            result.certificate_no = certificate.certificate_no
+        ExamResult.objects.bulk_update(results, ['certificate_no'], batch_size=BULK_CREATE_BATCH_SIZE)
+
+    return certificates
@@ -0,0 +1,35 @@
+"""Expire certificates and send expiry warnings"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.competency.tasks import expire_certificates, send_certificate_expiry_warnings
+
+
+class Command(BaseCommand):
+    help = 'Mark expired certificates and send expiry warnings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='提前提醒天数')
+        parser.add_argument('--chunk-size', type=int, default=None, help='每批处理数量')
+        parser.add_argument('--date', default=None, help='按指定日期执行（YYYY-MM-DD）')
+        parser.add_argument('--skip-warnings', action='store_true', help='只更新过期状态')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"日期格式错误: {options['date']}")
+
+        expired = expire_certificates(today=today)
+        self.stdout.write(f'已过期证书: {expired}')
+
+        if not options['skip_warnings']:
+            warned = send_certificate_expiry_warnings(
+                days=options['days'], today=today, chunk_size=options['chunk_size']
+            )
+            self.stdout.write(f'已发送到期提醒: {warned}')
+
+        self.stdout.write(self.style.SUCCESS('证书到期检查完成'))
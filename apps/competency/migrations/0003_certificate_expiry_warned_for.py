@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competency', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='expiry_warned_for',
+            field=models.DateField(blank=True, help_text='已发送到期提醒时对应的到期日期，到期日期变更后会重新提醒', null=True, verbose_name='已提醒的到期日期'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+def create_sequences(apps, schema_editor):
+    """预先创建证书编号和验证码序列"""
+    NumberSequence = apps.get_model('competency', 'NumberSequence')
+    for name in ['certificate_no', 'verification_code']:
+        NumberSequence.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competency', '0003_certificate_expiry_warned_for'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='序列名称')),
+                ('next_value', models.BigIntegerField(default=1, verbose_name='下一个值')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '编号序列',
+                'verbose_name_plural': '编号序列',
+                'db_table': 'number_sequences',
+            },
+        ),
+        migrations.RunPython(create_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competency', '0004_numbersequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='competency',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to='competency.competency', verbose_name='关联能力'),
+        ),
+    ]
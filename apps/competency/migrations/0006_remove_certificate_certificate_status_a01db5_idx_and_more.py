@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competency', '0005_certificate_competency_optional'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['status', 'expiry_date'], name='certificate_status_e72ebd_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='certificate',
+            name='certificate_status_a01db5_idx',
+        ),
+    ]
@@ -2,8 +2,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-import random
-import string
 
 
 class Competency(models.Model):
@@ -200,6 +198,8 @@ class Certificate(models.Model):
     competency = models.ForeignKey(
         Competency,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         verbose_name=_('关联能力'),
         related_name='certificates'
     )
@@ -242,6 +242,12 @@ class Certificate(models.Model):
         blank=True,
         null=True
     )
+    expiry_warned_for = models.DateField(
+        _('已提醒的到期日期'),
+        null=True,
+        blank=True,
+        help_text=_('已发送到期提醒时对应的到期日期，到期日期变更后会重新提醒')
+    )
     created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
     updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
     
@@ -252,7 +258,8 @@ class Certificate(models.Model):
         indexes = [
             models.Index(fields=['user']),
             models.Index(fields=['competency']),
-            models.Index(fields=['status']),
+            # 到期检查：有效且到期日期在范围内（同时覆盖按状态的查询）
+            models.Index(fields=['status', 'expiry_date']),
             models.Index(fields=['certificate_no']),
             models.Index(fields=['verification_code']),
         ]
@@ -269,15 +276,13 @@ class Certificate(models.Model):
     
     def generate_verification_code(self):
         """生成验证码"""
-        timestamp = timezone.now().strftime('%Y%m%d')
-        random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        return f"VC{timestamp}{random_str}"
+        from .numbering import allocate_verification_codes
+        return allocate_verification_codes()[0]
     
     def generate_certificate_no(self):
         """生成证书编号"""
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        random_str = ''.join(random.choices(string.digits, k=6))
-        return f"CERT{timestamp}{random_str}"
+        from .numbering import allocate_certificate_numbers
+        return allocate_certificate_numbers()[0]
     
     @property
     def is_expired(self):
@@ -297,4 +302,20 @@ class Certificate(models.Model):
             return False, _('证书已被吊销')
         if self.is_expired:
             return False, _('证书已过期')
-        return True, _('证书有效')
\ No newline at end of file
+        return True, _('证书有效')
+
+
+class NumberSequence(models.Model):
+    """编号序列表（证书编号、验证码等按名称分配递增序号）"""
+    
+    name = models.CharField(_('序列名称'), max_length=50, unique=True)
+    next_value = models.BigIntegerField(_('下一个值'), default=1)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('编号序列')
+        verbose_name_plural = _('编号序列')
+        db_table = 'number_sequences'
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
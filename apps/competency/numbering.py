@@ -0,0 +1,129 @@
+"""Certificate numbering"""
+import hashlib
+import hmac
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+# 序列名称
+CERTIFICATE_NO_SEQUENCE = 'certificate_no'
+VERIFICATION_CODE_SEQUENCE = 'verification_code'
+
+# 每次向数据库预留的序号数量
+SEQUENCE_BLOCK_SIZE = getattr(settings, 'CERTIFICATE_SEQUENCE_BLOCK_SIZE', 100)
+
+# 验证码序号部分：8位大写字母和数字
+CODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+CODE_LENGTH = 8
+CODE_HALF_SPACE = len(CODE_ALPHABET) ** (CODE_LENGTH // 2)
+CODE_FEISTEL_ROUNDS = 4
+
+
+def reserve_sequence(name, count):
+    """在数据库中预留 count 个连续序号，返回起始值"""
+    from .models import NumberSequence
+
+    with transaction.atomic():
+        sequence, _ = NumberSequence.objects.select_for_update().get_or_create(name=name)
+        start = sequence.next_value
+        sequence.next_value = start + count
+        sequence.save(update_fields=['next_value', 'updated_at'])
+    return start
+
+
+class SequenceAllocator:
+    """
+    进程内按块分配序号
+
+    在自动提交模式下一次预留一整块，后续分配不访问数据库；
+    处于事务中时只预留所需数量，避免事务回滚后本进程缓存的序号被其他进程重复分配
+    """
+
+    def __init__(self, name, block_size=SEQUENCE_BLOCK_SIZE):
+        self.name = name
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.pid = None
+        self.next = self.end = 0
+
+    def allocate(self, count=1):
+        """分配 count 个序号（同一进程内单调递增）"""
+        with self.lock:
+            # fork 出的子进程不能沿用父进程的序号块
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.next = self.end = 0
+
+            values = []
+            while len(values) < count:
+                if self.next >= self.end:
+                    need = count - len(values)
+                    size = need if connection.in_atomic_block else max(need, self.block_size)
+                    self.next = reserve_sequence(self.name, size)
+                    self.end = self.next + size
+
+                take = min(self.end - self.next, count - len(values))
+                values.extend(range(self.next, self.next + take))
+                self.next += take
+            return values
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def allocate_sequence(name, count=1):
+    """从指定序列分配序号"""
+    allocator = _allocators.get(name)
+    if allocator is None:
+        with _allocators_lock:
+            allocator = _allocators.setdefault(name, SequenceAllocator(name))
+    return allocator.allocate(count)
+
+
+def _feistel_round(value, round_no):
+    """Feistel 轮函数（以 SECRET_KEY 为密钥）"""
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), f'{round_no}:{value}'.encode(), hashlib.sha256
+    ).digest()
+    return int.from_bytes(digest[:8], 'big') % CODE_HALF_SPACE
+
+
+def scramble_sequence(value):
+    """
+    将序号一一映射到验证码空间
+
+    平衡 Feistel 网络在 36^8 空间内是置换：不同序号得到不同验证码，
+    且不知道密钥时无法由验证码推算相邻证书
+    """
+    left, right = divmod(value % (CODE_HALF_SPACE * CODE_HALF_SPACE), CODE_HALF_SPACE)
+    for round_no in range(CODE_FEISTEL_ROUNDS):
+        left, right = right, (left + _feistel_round(right, round_no)) % CODE_HALF_SPACE
+    return left * CODE_HALF_SPACE + right
+
+
+def encode_code(value):
+    """编码为定长大写字母数字串"""
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, index = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def allocate_certificate_numbers(count=1):
+    """分配证书编号：CERT + 时间戳 + 序号（至少6位）"""
+    timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return [f"CERT{timestamp}{value:06d}" for value in allocate_sequence(CERTIFICATE_NO_SEQUENCE, count)]
+
+
+def allocate_verification_codes(count=1):
+    """分配验证码：VC + 日期 + 8位字母数字"""
+    date = timezone.now().strftime('%Y%m%d')
+    return [
+        f"VC{date}{encode_code(scramble_sequence(value))}"
+        for value in allocate_sequence(VERIFICATION_CODE_SEQUENCE, count)
+    ]
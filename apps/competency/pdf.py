@@ -0,0 +1,84 @@
+"""
+Certificate PDF rendering
+
+只依赖 reportlab，不导入 Django，渲染进程池中的子进程可以直接加载本模块
+"""
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+
+# 中文字体（reportlab 内置 CID 字体，无需字体文件）
+FONT_NAME = 'STSong-Light'
+pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+
+PAGE_SIZE = landscape(A4)
+PRIMARY_COLOR = colors.HexColor('#4472C4')
+
+# 证书模板：正文各行的 (标签, 字段)
+CERTIFICATE_FIELDS = [
+    ('证书编号', 'certificate_no'),
+    ('相关能力', 'competency'),
+    ('颁发日期', 'issue_date'),
+    ('有效期至', 'expiry_date'),
+    ('颁发人', 'issued_by'),
+    ('验证码', 'verification_code'),
+]
+
+
+def render_certificate_pdf(payload):
+    """
+    渲染证书PDF，返回文件内容
+
+    payload 为只包含字符串的字典（见 certificate_files.build_pdf_payload），
+    可以直接传给子进程
+    """
+    buffer = io.BytesIO()
+    width, height = PAGE_SIZE
+    pdf = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    pdf.setTitle(payload['name'])
+
+    # 边框
+    pdf.setStrokeColor(PRIMARY_COLOR)
+    pdf.setLineWidth(3)
+    pdf.rect(12 * mm, 12 * mm, width - 24 * mm, height - 24 * mm)
+    pdf.setLineWidth(1)
+    pdf.rect(16 * mm, 16 * mm, width - 32 * mm, height - 32 * mm)
+
+    # 标题
+    pdf.setFillColor(PRIMARY_COLOR)
+    pdf.setFont(FONT_NAME, 34)
+    pdf.drawCentredString(width / 2, height - 50 * mm, '培 训 证 书')
+    pdf.setFont(FONT_NAME, 14)
+    pdf.drawCentredString(width / 2, height - 60 * mm, payload['site_name'])
+
+    # 正文
+    pdf.setFillColor(colors.black)
+    pdf.setFont(FONT_NAME, 18)
+    pdf.drawCentredString(
+        width / 2, height - 82 * mm,
+        f"兹证明 {payload['holder']} 已获得「{payload['name']}」"
+    )
+
+    pdf.setFont(FONT_NAME, 12)
+    y = height - 102 * mm
+    for label, field in CERTIFICATE_FIELDS:
+        value = payload.get(field)
+        if not value:
+            continue
+        pdf.drawString(width / 2 - 60 * mm, y, f'{label}：')
+        pdf.drawString(width / 2 - 25 * mm, y, value)
+        y -= 9 * mm
+
+    # 页脚
+    pdf.setFillColor(colors.grey)
+    pdf.setFont(FONT_NAME, 9)
+    pdf.drawCentredString(width / 2, 22 * mm, '可通过证书验证码在线验证证书真伪')
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
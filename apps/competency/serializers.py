@@ -1,6 +1,8 @@
 """Competency serializers"""
 from rest_framework import serializers
 from .models import Competency, CompetencyAssessment, Certificate
+from .issuance import CERTIFICATE_BULK_ISSUE_LIMIT
+from .utils import CERTIFICATE_BULK_VERIFY_LIMIT
 from apps.users.serializers import UserSerializer
 from apps.organization.serializers import PositionSerializer
 
@@ -88,6 +90,16 @@ class CertificateVerifySerializer(serializers.Serializer):
     verification_code = serializers.CharField(required=True)
 
 
+class CertificateBulkVerifySerializer(serializers.Serializer):
+    """证书批量验证序列化器"""
+    
+    verification_codes = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        allow_empty=False,
+        max_length=CERTIFICATE_BULK_VERIFY_LIMIT
+    )
+
+
 class CertificateGenerateSerializer(serializers.Serializer):
     """证书生成序列化器"""
     
@@ -103,4 +115,27 @@ class CertificateGenerateSerializer(serializers.Serializer):
         if not exam_result_id and not assessment_id:
             raise serializers.ValidationError('必须提供考试成绩ID或评估ID')
         
-        return attrs
\ No newline at end of file
+        return attrs
+
+class CertificateBulkIssueSerializer(serializers.Serializer):
+    """证书批量颁发序列化器"""
+    
+    exam_id = serializers.IntegerField(required=False)
+    assessment_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=CERTIFICATE_BULK_ISSUE_LIMIT
+    )
+    competency_id = serializers.IntegerField(required=False)
+    expiry_date = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        """验证数据"""
+        exam_id = attrs.get('exam_id')
+        assessment_ids = attrs.get('assessment_ids')
+        
+        if bool(exam_id) == bool(assessment_ids):
+            raise serializers.ValidationError('必须且只能提供考试ID或评估ID列表之一')
+        
+        return attrs
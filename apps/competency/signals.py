@@ -0,0 +1,16 @@
+"""Competency signals"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Certificate
+from .utils import invalidate_certificate_verification
+
+# 证书变更（含批量写入/更新，不触发模型信号），参数 user_ids 为受影响的用户
+certificates_changed = Signal()
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def certificate_changed(sender, instance, **kwargs):
+    """证书变更时清除验证缓存"""
+    invalidate_certificate_verification([instance.verification_code])
+    certificates_changed.send(sender=Certificate, user_ids=[instance.user_id])
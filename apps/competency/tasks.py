@@ -0,0 +1,136 @@
+"""Competency tasks"""
+from datetime import timedelta
+import logging
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Certificate
+from .signals import certificates_changed
+
+logger = logging.getLogger(__name__)
+
+
+def expire_certificates(today=None):
+    """将已过到期日期的有效证书批量标记为已过期，返回更新数量"""
+    today = today or timezone.now().date()
+    queryset = Certificate.objects.filter(
+        status=Certificate.Status.VALID,
+        expiry_date__lt=today
+    )
+    user_ids = set(queryset.values_list('user_id', flat=True))
+    expired = queryset.update(status=Certificate.Status.EXPIRED, updated_at=timezone.now())
+    if expired:
+        certificates_changed.send(sender=Certificate, user_ids=user_ids)
+    return expired
+
+
+def send_certificate_expiry_warnings(days=None, today=None, chunk_size=None):
+    """
+    发送证书即将到期提醒，返回发送数量
+
+    按ID分块读取 days 天内到期的有效证书，每块合并为一批邮件发送，
+    并记录已提醒的到期日期，重复执行不会重复提醒
+    """
+    today = today or timezone.now().date()
+    days = settings.CERTIFICATE_EXPIRY_WARNING_DAYS if days is None else days
+    chunk_size = chunk_size or settings.CERTIFICATE_EXPIRY_CHUNK_SIZE
+
+    from apps.common.email_service import EmailService
+
+    queryset = Certificate.objects.filter(
+        status=Certificate.Status.VALID,
+        expiry_date__range=(today, today + timedelta(days=days))
+    ).filter(
+        Q(expiry_warned_for__isnull=True) | ~Q(expiry_warned_for=F('expiry_date'))
+    ).select_related('user', 'competency').order_by('id')
+
+    sent = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        # 提醒标记与邮件同一事务提交，事务回滚时邮件也不会发出
+        with transaction.atomic():
+            EmailService.send_certificate_expiry_warnings(chunk)
+            Certificate.objects.filter(
+                id__in=[certificate.id for certificate in chunk]
+            ).update(expiry_warned_for=F('expiry_date'))
+        sent += len(chunk)
+
+    return sent
+
+
+@shared_task
+def certificate_expiry_sweep(days=None):
+    """证书到期定时任务：更新过期状态并发送到期提醒"""
+    expired = expire_certificates()
+    warned = send_certificate_expiry_warnings(days=days)
+    logger.info(f"证书到期检查完成: 过期 {expired} 张, 提醒 {warned} 张")
+    return {'expired': expired, 'warned': warned}
+
+
+def render_subtasks(certificate_ids):
+    """按 CERTIFICATE_PDF_TASK_CHUNK_SIZE 拆分的渲染子任务"""
+    chunk_size = settings.CERTIFICATE_PDF_TASK_CHUNK_SIZE
+    return group(
+        render_certificate_pdfs.si(certificate_ids[i:i + chunk_size])
+        for i in range(0, len(certificate_ids), chunk_size)
+    )
+
+
+@shared_task
+def render_certificate_pdfs(certificate_ids):
+    """
+    生成证书PDF（批量颁发后预先生成，或下载接口排队调用）
+
+    超过 CERTIFICATE_PDF_TASK_CHUNK_SIZE 时拆分为子任务并行，不在 worker 内再启动进程池
+    """
+    from .certificate_files import render_certificate_pdfs as render
+
+    certificate_ids = list(certificate_ids)
+    if len(certificate_ids) > settings.CERTIFICATE_PDF_TASK_CHUNK_SIZE:
+        render_subtasks(certificate_ids).apply_async()
+        return 0
+
+    certificates = Certificate.objects.filter(
+        id__in=certificate_ids
+    ).select_related('user', 'competency', 'issued_by')
+    return len(render(certificates))
+
+
+@shared_task
+def build_certificate_export(exam_id):
+    """
+    打包考试的全部证书PDF（下载接口排队调用）
+
+    待渲染的证书较多时先并行渲染（chord），全部完成后再次执行打包
+    """
+    from .certificate_files import build_exam_certificates_zip, certificate_pdf_name, exam_certificates
+
+    pending = [
+        certificate.id for certificate in exam_certificates(exam_id)
+        if not default_storage.exists(certificate_pdf_name(certificate))
+    ]
+    if len(pending) > settings.CERTIFICATE_PDF_TASK_CHUNK_SIZE:
+        chord(render_subtasks(pending))(build_certificate_export.si(exam_id))
+        return None
+
+    return build_exam_certificates_zip(exam_id)
+
+
+@shared_task
+def cleanup_certificate_exports():
+    """定期清理过期的证书ZIP"""
+    from .certificate_files import cleanup_certificate_exports as cleanup
+
+    deleted = cleanup()
+    logger.info(f"证书导出清理完成: 删除 {deleted} 个文件")
+    return deleted
@@ -0,0 +1,97 @@
+"""Competency utilities"""
+from django.core.cache import cache
+
+from .models import Certificate
+
+# 证书验证结果缓存（证书变更时清除）；不存在的验证码缓存较短时间
+CERTIFICATE_VERIFY_CACHE_KEY = 'competency:certificate_verify:{code}'
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = 60 * 60
+CERTIFICATE_VERIFY_MISS_TIMEOUT = 60 * 5
+
+# 批量验证单次最多验证码数量
+CERTIFICATE_BULK_VERIFY_LIMIT = 1000
+
+VERIFY_FIELDS = [
+    'verification_code', 'certificate_no', 'name', 'status',
+    'issue_date', 'expiry_date', 'user__real_name', 'competency__name',
+]
+
+# 不存在的验证码的缓存占位值
+NOT_FOUND = {'found': False}
+
+
+def _to_cache_entry(row):
+    """证书查询结果转为缓存内容"""
+    return {
+        'found': True,
+        'verification_code': row['verification_code'],
+        'certificate_no': row['certificate_no'],
+        'name': row['name'],
+        'holder': row['user__real_name'],
+        'competency': row['competency__name'],
+        'status': row['status'],
+        'issue_date': row['issue_date'],
+        'expiry_date': row['expiry_date'],
+    }
+
+
+def _to_payload(code, entry):
+    """
+    缓存内容转为验证结果
+
+    有效性在读取时按当天日期计算，缓存跨天也不会过时
+    """
+    if not entry['found']:
+        return {'verification_code': code, 'found': False, 'valid': False, 'message': '证书不存在或无效'}
+
+    certificate = Certificate(status=entry['status'], expiry_date=entry['expiry_date'])
+    valid, message = certificate.verify()
+    status = certificate.status
+    if status == Certificate.Status.VALID and certificate.is_expired:
+        status = Certificate.Status.EXPIRED
+
+    return dict(
+        entry,
+        status=status,
+        status_display=str(Certificate.Status(status).label),
+        issue_date=entry['issue_date'].isoformat(),
+        expiry_date=entry['expiry_date'].isoformat() if entry['expiry_date'] else None,
+        valid=valid,
+        message=str(message),
+    )
+
+
+def verify_certificates(codes):
+    """
+    批量验证证书
+
+    先批量读取缓存，未命中的验证码一次查询，结果（包括不存在的验证码）写回缓存；
+    返回与 codes 顺序一致的验证结果列表
+    """
+    codes = list(dict.fromkeys(codes))
+    keys = {code: CERTIFICATE_VERIFY_CACHE_KEY.format(code=code) for code in codes}
+    cached = cache.get_many(keys.values())
+    entries = {code: cached[key] for code, key in keys.items() if key in cached}
+
+    missing = [code for code in codes if code not in entries]
+    if missing:
+        rows = Certificate.objects.filter(verification_code__in=missing).values(*VERIFY_FIELDS)
+        found = {row['verification_code']: _to_cache_entry(row) for row in rows}
+        misses = {code: NOT_FOUND for code in missing if code not in found}
+
+        cache.set_many({keys[code]: entry for code, entry in found.items()}, CERTIFICATE_VERIFY_CACHE_TIMEOUT)
+        cache.set_many({keys[code]: entry for code, entry in misses.items()}, CERTIFICATE_VERIFY_MISS_TIMEOUT)
+        entries.update(found)
+        entries.update(misses)
+
+    return [_to_payload(code, entries[code]) for code in codes]
+
+
+def verify_certificate(code):
+    """验证单个证书"""
+    return verify_certificates([code])[0]
+
+
+def invalidate_certificate_verification(codes):
+    """清除证书验证缓存"""
+    cache.delete_many([CERTIFICATE_VERIFY_CACHE_KEY.format(code=code) for code in codes])
@@ -1,19 +1,41 @@
 """Competency views"""
 from rest_framework import status, filters
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, BasePermission
+from rest_framework.permissions import IsAuthenticated, AllowAny, SAFE_METHODS, BasePermission
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Q
+from django.core.files.storage import default_storage
+from django.http import FileResponse
 
 from .models import Competency, CompetencyAssessment, Certificate
 from .serializers import (
     CompetencySerializer, CompetencyAssessmentSerializer, CertificateSerializer,
-    CertificateVerifySerializer, CertificateGenerateSerializer
+    CertificateVerifySerializer, CertificateBulkVerifySerializer, CertificateGenerateSerializer,
+    CertificateBulkIssueSerializer
 )
+from .issuance import issue_assessment_certificates, issue_exam_certificates
+from .utils import verify_certificate, verify_certificates
+from .certificate_files import certificate_pdf_name, exam_certificates, exam_certificates_zip_name
+from .tasks import build_certificate_export, render_certificate_pdfs
 from apps.users.permissions import IsManager, IsManagerOrReadOnly
+from apps.users.capabilities import has_capability, CAP_STAFF
+from apps.common.fieldsets import SparseFieldsetMixin
+
+
+def queue_certificate_file(name, task, *args):
+    """排队生成证书文件（同一文件在去重时间内只排队一次），返回 202 响应"""
+    if cache.add(f'competency:file_queued:{name}', True, settings.CERTIFICATE_FILE_QUEUE_TIMEOUT):
+        task.delay(*args)
+    return Response({
+        'code': 202,
+        'message': '文件正在生成，请稍后重试'
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 class IsCompetencyManager(BasePermission):
@@ -21,20 +43,10 @@ class IsCompetencyManager(BasePermission):
     能力管理权限（所有经理和工程师）
     """
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager',
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'
-                ])
+        return has_capability(request.user, CAP_STAFF)
 
 
-class CompetencyViewSet(ModelViewSet):
+class CompetencyViewSet(SparseFieldsetMixin, ModelViewSet):
     """能力管理视图集"""
     
     queryset = Competency.objects.select_related('created_by').prefetch_related(
@@ -53,7 +65,7 @@ class CompetencyViewSet(ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class CompetencyAssessmentViewSet(ModelViewSet):
+class CompetencyAssessmentViewSet(SparseFieldsetMixin, ModelViewSet):
     """能力评估管理视图集"""
     
     queryset = CompetencyAssessment.objects.select_related(
@@ -84,13 +96,7 @@ class CompetencyAssessmentViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有评估
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         return self.queryset.filter(user=user)
@@ -143,7 +149,7 @@ class CompetencyAssessmentViewSet(ModelViewSet):
         })
 
 
-class CertificateViewSet(ModelViewSet):
+class CertificateViewSet(SparseFieldsetMixin, ModelViewSet):
     """证书管理视图集"""
     
     queryset = Certificate.objects.select_related(
@@ -156,14 +162,19 @@ class CertificateViewSet(ModelViewSet):
     filterset_fields = ['user', 'competency', 'status']
     search_fields = ['user__real_name', 'certificate_no', 'competency__name']
     ordering = ['-issue_date']
+    # 仅公开验证接口启用限流
+    throttle_scope = 'certificate_verify'
     
     def get_permissions(self):
         """
         自定义权限：
-        - list/retrieve/verify: 所有认证用户
-        - create/update/destroy/generate/revoke: 需要经理或工程师权限
+        - public_verify/bulk_verify: 公开（外部审核方验证）
+        - list/retrieve/verify/download: 所有认证用户
+        - create/update/destroy/generate/bulk_issue/exam_download/revoke: 需要经理或工程师权限
         """
-        if self.action in ['list', 'retrieve', 'verify']:
+        if self.action in ['public_verify', 'bulk_verify']:
+            permission_classes = [AllowAny]
+        elif self.action in ['list', 'retrieve', 'verify', 'download']:
             permission_classes = [IsAuthenticated]
         else:
             permission_classes = [IsAuthenticated, IsCompetencyManager]
@@ -174,13 +185,7 @@ class CertificateViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有证书
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         return self.queryset.filter(user=user)
@@ -194,7 +199,7 @@ class CertificateViewSet(ModelViewSet):
             verification_code = serializer.validated_data['verification_code']
             
             try:
-                certificate = Certificate.objects.get(verification_code=verification_code)
+                certificate = self.queryset.get(verification_code=verification_code)
                 return Response({
                     'code': 200,
                     'message': '证书验证成功',
@@ -212,6 +217,54 @@ class CertificateViewSet(ModelViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(
+        detail=False, methods=['get'], url_path=r'public-verify/(?P<code>[A-Za-z0-9]+)',
+        authentication_classes=[], throttle_classes=[ScopedRateThrottle]
+    )
+    def public_verify(self, request, code=None):
+        """公开验证证书（无需登录，结果缓存）"""
+        result = verify_certificate(code)
+        if not result['found']:
+            return Response({
+                'code': 404,
+                'message': result['message'],
+                'data': result
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'code': 200,
+            'message': result['message'],
+            'data': result
+        })
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk-verify',
+        authentication_classes=[], throttle_classes=[ScopedRateThrottle]
+    )
+    def bulk_verify(self, request):
+        """批量公开验证证书"""
+        serializer = CertificateBulkVerifySerializer(data=request.data)
+
+        if serializer.is_valid():
+            results = verify_certificates(serializer.validated_data['verification_codes'])
+            valid_count = sum(1 for result in results if result['valid'])
+            return Response({
+                'code': 200,
+                'message': 'Success',
+                'data': {
+                    'total': len(results),
+                    'valid_count': valid_count,
+                    'invalid_count': len(results) - valid_count,
+                    'results': results
+                }
+            })
+
+        return Response({
+            'code': 400,
+            'message': '验证失败',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """生成证书"""
@@ -284,6 +337,102 @@ class CertificateViewSet(ModelViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-issue')
+    def bulk_issue(self, request):
+        """批量颁发证书（按考试或能力评估）"""
+        serializer = CertificateBulkIssueSerializer(data=request.data)
+
+        if serializer.is_valid():
+            data = serializer.validated_data
+            expiry_date = data.get('expiry_date')
+
+            if data.get('exam_id'):
+                from apps.examination.models import Exam
+
+                try:
+                    exam = Exam.objects.get(id=data['exam_id'])
+                except Exam.DoesNotExist:
+                    return Response({
+                        'code': 404,
+                        'message': '考试不存在'
+                    }, status=status.HTTP_404_NOT_FOUND)
+
+                competency = None
+                if data.get('competency_id'):
+                    try:
+                        competency = Competency.objects.get(id=data['competency_id'])
+                    except Competency.DoesNotExist:
+                        return Response({
+                            'code': 404,
+                            'message': '能力不存在'
+                        }, status=status.HTTP_404_NOT_FOUND)
+
+                certificates = issue_exam_certificates(exam, request.user, competency, expiry_date)
+                skipped = None
+            else:
+                assessment_ids = set(data['assessment_ids'])
+                certificates = issue_assessment_certificates(assessment_ids, request.user, expiry_date)
+                skipped = len(assessment_ids) - len(certificates)
+
+            return Response({
+                'code': 201,
+                'message': f'成功颁发 {len(certificates)} 张证书',
+                'data': {
+                    'issued': len(certificates),
+                    'skipped': skipped,
+                    'certificate_nos': [certificate.certificate_no for certificate in certificates]
+                }
+            }, status=status.HTTP_201_CREATED)
+
+        return Response({
+            'code': 400,
+            'message': '颁发失败',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """下载证书PDF（已生成的版本直接从磁盘读取，未生成时排队渲染并返回 202）"""
+        certificate = self.get_object()
+        name = certificate_pdf_name(certificate)
+        if not default_storage.exists(name):
+            return queue_certificate_file(name, render_certificate_pdfs, [certificate.id])
+
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=f'{certificate.certificate_no}.pdf',
+            content_type='application/pdf'
+        )
+
+    @action(detail=False, methods=['get'], url_path='exam-download')
+    def exam_download(self, request):
+        """打包下载考试的全部证书（ZIP 未生成时排队打包并返回 202）"""
+        exam_id = request.query_params.get('exam_id')
+        if not exam_id or not exam_id.isdigit():
+            return Response({
+                'code': 400,
+                'message': '请提供考试ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        certificates = exam_certificates(int(exam_id))
+        if not certificates:
+            return Response({
+                'code': 404,
+                'message': '该考试暂无证书'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        name = exam_certificates_zip_name(int(exam_id), certificates)
+        if not default_storage.exists(name):
+            return queue_certificate_file(name, build_certificate_export, int(exam_id))
+
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=f'exam_{exam_id}_certificates.zip',
+            content_type='application/zip'
+        )
+
     @action(detail=True, methods=['post'])
     def revoke(self, request, pk=None):
         """吊销证书"""
@@ -0,0 +1,186 @@
+"""Item analysis"""
+from collections import Counter
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Exam, ExamResult, Question, QuestionAnalysis
+
+ANALYSIS_CHUNK_SIZE = 500
+
+# 统计选项分布的题型
+CHOICE_TYPES = [
+    Question.QuestionType.SINGLE_CHOICE,
+    Question.QuestionType.MULTIPLE_CHOICE,
+    Question.QuestionType.TRUE_FALSE,
+]
+
+# 问题题目判定阈值
+TOO_HARD_RATE = 0.2
+TOO_EASY_RATE = 0.95
+LOW_DISCRIMINATION = 0.2
+
+
+def _chunks(iterable, size):
+    """按块切分迭代器"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_chunk(questions, chunk):
+    """
+    将一块结果转换为数组
+
+    返回 (ids, scores[n], answered[n, q], correct[n, q], 每题选项计数)
+    """
+    columns = {str(question.id): index for index, question in enumerate(questions)}
+    ids = np.empty(len(chunk), dtype=np.int64)
+    scores = np.empty(len(chunk), dtype=np.float64)
+    answered = np.zeros((len(chunk), len(questions)), dtype=bool)
+    correct = np.zeros((len(chunk), len(questions)), dtype=bool)
+    options = [Counter() for _ in questions]
+
+    for row, (result_id, score, answers) in enumerate(chunk):
+        ids[row] = result_id
+        scores[row] = float(score or 0)
+        for question_id, answer in (answers or {}).items():
+            column = columns.get(question_id)
+            if column is None or answer in (None, '', []):
+                continue
+            question = questions[column]
+            answered[row, column] = True
+            correct[row, column] = question.check_answer(answer)
+            if question.question_type in CHOICE_TYPES:
+                options[column].update(set(question.normalize_answer(answer)))
+
+    return ids, scores, answered, correct, options
+
+
+def compute_item_statistics(response_count, correct_count, score_sum, score_square_sum, correct_score_sum):
+    """
+    由累计统计量计算正确率和点二列相关区分度（按作答者计算）
+
+    r_pb = (M1 - M0) / s * sqrt(p * q)，M1/M0 为答对/答错者平均总分，
+    s 为作答者总分的总体标准差；无法计算时为 NaN
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = response_count.astype(np.float64)
+        p = correct_count / n
+        wrong_count = n - correct_count
+        mean_correct = correct_score_sum / correct_count
+        mean_wrong = (score_sum - correct_score_sum) / wrong_count
+        variance = score_square_sum / n - (score_sum / n) ** 2
+        std = np.sqrt(np.clip(variance, 0, None))
+        discrimination = (mean_correct - mean_wrong) / std * np.sqrt(p * (1 - p))
+
+    discrimination[(correct_count == 0) | (wrong_count == 0) | ~(std > 1e-9)] = np.nan
+    return p, discrimination
+
+
+def refresh_item_analysis(exam):
+    """
+    增量更新考试的题目分析，返回新计入的结果数量
+
+    只流式读取尚未计入的已评分结果，累加到各题的统计量后重新计算指标
+    """
+    pending = ExamResult.objects.filter(
+        exam_id=exam.id, status=ExamResult.Status.GRADED, analyzed=False
+    )
+    if not pending.exists():
+        return 0
+
+    questions = list(Question.objects.filter(question_bank_id=exam.question_bank_id).order_by('sort_order', 'id'))
+    if not questions:
+        return 0
+
+    with transaction.atomic():
+        # 锁定考试，同一考试的分析串行更新，避免重复计入
+        Exam.objects.select_for_update().filter(id=exam.id).first()
+
+        analyses = {
+            analysis.question_id: analysis
+            for analysis in QuestionAnalysis.objects.filter(exam_id=exam.id)
+        }
+        new_analyses = [
+            QuestionAnalysis(exam_id=exam.id, question=question)
+            for question in questions if question.id not in analyses
+        ]
+        for analysis in QuestionAnalysis.objects.bulk_create(new_analyses):
+            analyses[analysis.question_id] = analysis
+        rows = [analyses[question.id] for question in questions]
+
+        response_count = np.array([row.response_count for row in rows], dtype=np.int64)
+        correct_count = np.array([row.correct_count for row in rows], dtype=np.int64)
+        score_sum = np.array([row.score_sum for row in rows], dtype=np.float64)
+        score_square_sum = np.array([row.score_square_sum for row in rows], dtype=np.float64)
+        correct_score_sum = np.array([row.correct_score_sum for row in rows], dtype=np.float64)
+        options = [Counter(row.option_counts) for row in rows]
+
+        analyzed_ids = []
+        records = pending.values_list('id', 'score', 'answers').iterator(chunk_size=ANALYSIS_CHUNK_SIZE)
+        for chunk in _chunks(records, ANALYSIS_CHUNK_SIZE):
+            ids, scores, answered, correct, chunk_options = score_chunk(questions, chunk)
+            response_count += answered.sum(axis=0)
+            correct_count += correct.sum(axis=0)
+            score_sum += scores @ answered
+            score_square_sum += (scores ** 2) @ answered
+            correct_score_sum += scores @ correct
+            for counter, chunk_counter in zip(options, chunk_options):
+                counter.update(chunk_counter)
+            analyzed_ids.extend(ids.tolist())
+
+        # 读取完毕后再标记，避免在游标打开期间修改被读取的行
+        for chunk in _chunks(analyzed_ids, ANALYSIS_CHUNK_SIZE):
+            ExamResult.objects.filter(id__in=chunk).update(analyzed=True)
+
+        correct_rate, discrimination = compute_item_statistics(
+            response_count, correct_count, score_sum, score_square_sum, correct_score_sum
+        )
+        now = timezone.now()
+        for index, row in enumerate(rows):
+            row.updated_at = now
+            row.response_count = int(response_count[index])
+            row.correct_count = int(correct_count[index])
+            row.score_sum = float(score_sum[index])
+            row.score_square_sum = float(score_square_sum[index])
+            row.correct_score_sum = float(correct_score_sum[index])
+            row.option_counts = dict(sorted(options[index].items()))
+            row.correct_rate = None if np.isnan(correct_rate[index]) else round(float(correct_rate[index]), 4)
+            row.discrimination = None if np.isnan(discrimination[index]) else round(float(discrimination[index]), 4)
+
+        QuestionAnalysis.objects.bulk_update(rows, [
+            'response_count', 'correct_count', 'score_sum', 'score_square_sum',
+            'correct_score_sum', 'option_counts', 'correct_rate', 'discrimination', 'updated_at'
+        ])
+
+    return len(analyzed_ids)
+
+
+def question_flags(analysis):
+    """标记可能有问题的题目"""
+    flags = []
+    if analysis.correct_rate is not None:
+        if analysis.correct_rate < TOO_HARD_RATE:
+            flags.append('too_hard')
+        elif analysis.correct_rate > TOO_EASY_RATE:
+            flags.append('too_easy')
+    if analysis.discrimination is not None:
+        if analysis.discrimination < 0:
+            flags.append('negative_discrimination')
+        elif analysis.discrimination < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+    return flags
+
+
+def schedule_item_analysis(exam):
+    """事务提交后由 Celery 增量更新题目分析（不在提交请求内持有考试行锁）"""
+    from .tasks import refresh_exam_item_analysis
+
+    exam_id = exam.id
+    transaction.on_commit(lambda: refresh_exam_item_analysis.delay(exam_id))
@@ -0,0 +1,67 @@
+"""Benchmark exam notification rendering: render_to_string vs NotificationRenderer"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.common.email_service import SITE_NAME
+from apps.common.notifications import NotificationRenderer
+from apps.examination.models import Exam
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark exam notification email rendering (nothing is written to the database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='渲染的邮件数量')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        # 关闭调试模式，与生产环境的模板加载方式保持一致
+        settings.DEBUG = False
+        exam, users = self.build_fixtures(count)
+        self.stdout.write(f'通知邮件渲染性能测试（{count} 封）')
+
+        results = []
+        for name, func in [('render_to_string + strip_tags', self.render_legacy),
+                           ('NotificationRenderer.render_many', self.render_batch)]:
+            started = time.perf_counter()
+            func(exam, users)
+            elapsed = time.perf_counter() - started
+            results.append(elapsed)
+            self.stdout.write(f'{name:<36}{elapsed:>8.2f}s{count / elapsed:>10.0f} 封/秒')
+
+        legacy, batch = results
+        self.stdout.write(self.style.SUCCESS(f'提速: {legacy / batch:.1f}x'))
+
+    def build_fixtures(self, count):
+        """构建测试数据（不写入数据库）"""
+        now = timezone.now()
+        exam = Exam(
+            title='SMT贴片工艺考试', code='EXAM-SMT-001',
+            start_time=now, end_time=now + timedelta(hours=2),
+            time_limit=60, total_score=100, passing_score=60, total_questions=50
+        )
+        users = [
+            User(username=f'user{i}', real_name=f'员工{i}', email=f'user{i}@example.com')
+            for i in range(count)
+        ]
+        return exam, users
+
+    def render_legacy(self, exam, users):
+        """逐个 render_to_string + strip_tags"""
+        for user in users:
+            html = render_to_string('email/exam_notification.html', {
+                'user': user, 'exam': exam, 'site_name': SITE_NAME
+            })
+            strip_tags(html)
+
+    def render_batch(self, exam, users):
+        """编译后模板 + 纯文本模板批量渲染"""
+        renderer = NotificationRenderer('exam_notification')
+        renderer.render_many([{'user': user} for user in users], {'exam': exam, 'site_name': SITE_NAME})
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examination', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examresult',
+            name='analyzed',
+            field=models.BooleanField(default=False, verbose_name='已计入题目分析'),
+        ),
+        migrations.CreateModel(
+            name='QuestionAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('response_count', models.IntegerField(default=0, verbose_name='作答人数')),
+                ('correct_count', models.IntegerField(default=0, verbose_name='答对人数')),
+                ('score_sum', models.FloatField(default=0, verbose_name='作答者总分之和')),
+                ('score_square_sum', models.FloatField(default=0, verbose_name='作答者总分平方和')),
+                ('correct_score_sum', models.FloatField(default=0, verbose_name='答对者总分之和')),
+                ('option_counts', models.JSONField(blank=True, default=dict, verbose_name='选项分布')),
+                ('correct_rate', models.FloatField(blank=True, null=True, verbose_name='正确率')),
+                ('discrimination', models.FloatField(blank=True, null=True, verbose_name='区分度')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_analyses', to='examination.exam', verbose_name='考试')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='examination.question', verbose_name='题目')),
+            ],
+            options={
+                'verbose_name': '题目分析',
+                'verbose_name_plural': '题目分析',
+                'db_table': 'question_analyses',
+                'unique_together': {('exam', 'question')},
+            },
+        ),
+    ]
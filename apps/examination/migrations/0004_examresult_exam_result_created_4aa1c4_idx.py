@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examination', '0003_item_analysis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['created_at', 'id'], name='exam_result_created_4aa1c4_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examination', '0005_question_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['exam', 'status'], name='exam_result_exam_id_3b2f25_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['exam', 'submitted_at'], name='exam_result_exam_id_9f771f_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='examresult',
+            name='exam_result_exam_id_14ebd6_idx',
+        ),
+    ]
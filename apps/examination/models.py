@@ -1,9 +1,13 @@
 """Examination models"""
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-import random
-import string
+from django.utils.functional import cached_property
+
+# 判断题视为"正确"的答案写法
+TRUE_VALUES = ['TRUE', '1', 'YES', '是']
 
 
 class QuestionBank(models.Model):
@@ -110,6 +114,64 @@ class Question(models.Model):
     def correct_answer_list(self):
         """获取正确答案列表"""
         return self.correct_answer.get('answer', [])
+    
+    def normalize_answer(self, answer):
+        """
+        标准化答案为大写字符串列表（处理多种格式）
+        
+        判断题统一为 TRUE/FALSE
+        """
+        if isinstance(answer, list):
+            values = [str(a).strip().upper() for a in answer if a is not None]
+        elif isinstance(answer, str):
+            values = [answer.strip().upper()]
+        elif isinstance(answer, bool):
+            values = ['TRUE' if answer else 'FALSE']
+        else:
+            values = [str(answer).strip().upper()]
+        
+        if self.question_type == self.QuestionType.TRUE_FALSE:
+            values = ['TRUE' if a in TRUE_VALUES else 'FALSE' for a in values]
+        return values
+    
+    @cached_property
+    def normalized_correct_answer(self):
+        """标准化的正确答案集合"""
+        correct_answer = self.correct_answer
+        if isinstance(correct_answer, dict):
+            correct_answer = correct_answer.get('answer', [])
+        elif not isinstance(correct_answer, list):
+            correct_answer = [correct_answer]
+        return set(self.normalize_answer(correct_answer))
+    
+    def check_answer(self, answer):
+        """判断答案是否正确（多选题按集合比较）"""
+        values = set(self.normalize_answer(answer))
+        return len(values) > 0 and values == self.normalized_correct_answer
+
+
+def count_subquery(queryset, field):
+    """按外键分组计数的子查询（没有记录时为 0）"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        total=Count('*')
+    ).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class ExamQuerySet(models.QuerySet):
+    """考试查询集"""
+    
+    def with_participant_count(self):
+        """标注参与人数（子查询，不与其他关联的连接相乘）"""
+        return self.annotate(participant_total=count_subquery(
+            Exam.participants.through.objects.all(), 'exam_id'
+        ))
+    
+    def with_result_count(self):
+        """标注已考试人数"""
+        return self.annotate(result_total=count_subquery(
+            ExamResult.objects.filter(submitted_at__isnull=False), 'exam_id'
+        ))
 
 
 class Exam(models.Model):
@@ -183,6 +245,8 @@ class Exam(models.Model):
     updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
     published_at = models.DateTimeField(_('发布时间'), null=True, blank=True)
     
+    objects = ExamQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('考试')
         verbose_name_plural = _('考试')
@@ -200,12 +264,16 @@ class Exam(models.Model):
     
     @property
     def participant_count(self):
-        """参与人数"""
+        """参与人数（优先使用查询集标注）"""
+        if hasattr(self, 'participant_total'):
+            return self.participant_total
         return self.participants.count()
     
     @property
     def result_count(self):
-        """已考试人数"""
+        """已考试人数（优先使用查询集标注）"""
+        if hasattr(self, 'result_total'):
+            return self.result_total
         return self.exam_results.filter(submitted_at__isnull=False).count()
     
     def publish(self):
@@ -257,6 +325,7 @@ class ExamResult(models.Model):
     answers = models.JSONField(_('答案数据'), default=dict, blank=True)
     review_comment = models.TextField(_('评语'), blank=True)
     certificate_no = models.CharField(_('证书编号'), max_length=100, blank=True)
+    analyzed = models.BooleanField(_('已计入题目分析'), default=False)
     created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
     updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
     
@@ -266,11 +335,15 @@ class ExamResult(models.Model):
         db_table = 'exam_results'
         unique_together = ['exam', 'user']
         indexes = [
-            models.Index(fields=['exam']),
             models.Index(fields=['user']),
             models.Index(fields=['status']),
             models.Index(fields=['is_passed']),
             models.Index(fields=['submitted_at']),
+            # 按考试统计：待分析结果、已考试人数（同时覆盖按考试的查询）
+            models.Index(fields=['exam', 'status']),
+            models.Index(fields=['exam', 'submitted_at']),
+            # 游标分页
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -279,10 +352,9 @@ class ExamResult(models.Model):
     def generate_certificate_no(self):
         """生成证书编号"""
         if not self.certificate_no and self.is_passed:
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            self.certificate_no = f"CERT{timestamp}{random_str}"
-            self.save()
+            from apps.competency.numbering import allocate_certificate_numbers
+            self.certificate_no = allocate_certificate_numbers()[0]
+            self.save(update_fields=['certificate_no', 'updated_at'])
         return self.certificate_no
     
     def grade(self):
@@ -304,45 +376,8 @@ class ExamResult(models.Model):
             
             question = exam_questions[question_id]
             
-            # 提取用户答案（处理多种格式）
-            if isinstance(user_answer, list):
-                user_answer_list = [str(a).strip().upper() for a in user_answer if a is not None]
-            elif isinstance(user_answer, str):
-                user_answer_list = [user_answer.strip().upper()]
-            elif isinstance(user_answer, bool):
-                # 处理判断题
-                user_answer_list = ['TRUE' if user_answer else 'FALSE']
-            else:
-                user_answer_list = [str(user_answer).strip().upper()]
-            
-            # 提取正确答案（从字典中提取）
-            correct_answer_raw = question.correct_answer
-            
-            if isinstance(correct_answer_raw, dict):
-                correct_answer_list = correct_answer_raw.get('answer', [])
-            elif isinstance(correct_answer_raw, list):
-                correct_answer_list = correct_answer_raw
-            elif isinstance(correct_answer_raw, str):
-                correct_answer_list = [correct_answer_raw]
-            else:
-                correct_answer_list = [str(correct_answer_raw)]
-            
-            # 标准化正确答案
-            correct_answer_list = [str(a).strip().upper() for a in correct_answer_list if a is not None]
-            
-            # 处理判断题的特殊情况（true/false -> TRUE/FALSE）
-            if question.question_type == 'true_false':
-                user_answer_list = ['TRUE' if a in ['TRUE', '1', 'YES', '是'] else 'FALSE' for a in user_answer_list]
-                correct_answer_list = ['TRUE' if a in ['TRUE', '1', 'YES', '是'] else 'FALSE' for a in correct_answer_list]
-            
-            # 比较答案（排序后比较，适用于多选题）
-            user_answer_set = set(user_answer_list)
-            correct_answer_set = set(correct_answer_list)
-            
-            # 判断是否正确
-            is_correct = user_answer_set == correct_answer_set and len(user_answer_set) > 0
-            
-            if is_correct:
+            # 判断是否正确（多选题按集合比较）
+            if question.check_answer(user_answer):
                 total_score += float(question.score)
                 correct_count += 1
             else:
@@ -372,4 +407,47 @@ class ExamResult(models.Model):
         if self.is_passed:
             self.generate_certificate_no()
         
-        return self.score
\ No newline at end of file
+        # 成绩和证书编号保存后再安排题目分析，避免之后的保存覆盖 analyzed 标记
+        from .analysis import schedule_item_analysis
+        schedule_item_analysis(self.exam)
+        
+        return self.score
+
+
+class QuestionAnalysis(models.Model):
+    """
+    题目分析表（每场考试每道题一行）
+    
+    保存作答者总分的累计统计量，新结果评分后增量累加，无需重新扫描
+    """
+    
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        verbose_name=_('考试'),
+        related_name='question_analyses'
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        verbose_name=_('题目'),
+        related_name='analyses'
+    )
+    response_count = models.IntegerField(_('作答人数'), default=0)
+    correct_count = models.IntegerField(_('答对人数'), default=0)
+    score_sum = models.FloatField(_('作答者总分之和'), default=0)
+    score_square_sum = models.FloatField(_('作答者总分平方和'), default=0)
+    correct_score_sum = models.FloatField(_('答对者总分之和'), default=0)
+    option_counts = models.JSONField(_('选项分布'), default=dict, blank=True)
+    correct_rate = models.FloatField(_('正确率'), null=True, blank=True)
+    discrimination = models.FloatField(_('区分度'), null=True, blank=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('题目分析')
+        verbose_name_plural = _('题目分析')
+        db_table = 'question_analyses'
+        unique_together = ['exam', 'question']
+    
+    def __str__(self):
+        return f"{self.exam.title} - {self.question_id}"
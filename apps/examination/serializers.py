@@ -1,6 +1,7 @@
 """Examination serializers"""
+from django.conf import settings
 from rest_framework import serializers
-from .models import QuestionBank, Question, Exam, ExamResult
+from .models import QuestionBank, Question, Exam, ExamResult, QuestionAnalysis
 from apps.training.serializers import CourseSerializer
 from apps.users.serializers import UserSerializer
 
@@ -77,6 +78,19 @@ class ExamSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ExamListSerializer(ExamSerializer):
+    """考试列表序列化器（不含参与者列表和说明文字）"""
+    
+    class Meta(ExamSerializer.Meta):
+        fields = [
+            'id', 'code', 'title', 'exam_type', 'course', 'course_title',
+            'question_bank', 'question_bank_name', 'total_questions',
+            'total_score', 'passing_score', 'time_limit', 'start_time',
+            'end_time', 'max_attempts', 'status', 'participant_count', 'result_count',
+            'created_by', 'created_by_name', 'created_at', 'published_at'
+        ]
+
+
 class ExamDetailSerializer(ExamSerializer):
     """考试详情序列化器"""
     
@@ -88,6 +102,13 @@ class ExamDetailSerializer(ExamSerializer):
         fields = ExamSerializer.Meta.fields + [
             'course_detail', 'question_bank_detail', 'participants_detail'
         ]
+    
+    def get_fields(self):
+        """参与者明细默认不内联，改由 participants 子资源分页获取"""
+        fields = super().get_fields()
+        if not settings.EXAM_DETAIL_INLINE_PARTICIPANTS:
+            fields.pop('participants_detail')
+        return fields
 
 
 class ExamResultSerializer(serializers.ModelSerializer):
@@ -116,8 +137,8 @@ class ExamResultListSerializer(ExamResultSerializer):
     
     class Meta(ExamResultSerializer.Meta):
         fields = [
-            'id', 'exam_title', 'user_name', 'department_name',
-            'score', 'is_passed', 'duration', 'submitted_at'
+            'id', 'exam', 'exam_title', 'user', 'user_name', 'department_name',
+            'status', 'score', 'is_passed', 'duration', 'submitted_at'
         ]
 
 
@@ -134,6 +155,33 @@ class ExamSubmitSerializer(serializers.Serializer):
         return value
 
 
+class ExamParticipantSerializer(serializers.Serializer):
+    """考试参与者序列化器（含考试结果）"""
+    
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    real_name = serializers.CharField()
+    employee_id = serializers.CharField()
+    department_name = serializers.CharField(source='department__name', allow_null=True)
+    position_name = serializers.CharField(source='position__name', allow_null=True)
+    result_status = serializers.CharField(allow_null=True)
+    score = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    is_passed = serializers.BooleanField(allow_null=True)
+    submitted_at = serializers.DateTimeField(allow_null=True)
+
+
+class ParticipantQuerySerializer(serializers.Serializer):
+    """参与者查询参数"""
+    
+    result_status = serializers.ChoiceField(
+        choices=['not_started'] + [value for value, _ in ExamResult.Status.choices],
+        required=False
+    )
+    department = serializers.IntegerField(required=False)
+    # 不使用 search，避免与考试列表的搜索参数冲突
+    keyword = serializers.CharField(required=False)
+
+
 class ParticipantManageSerializer(serializers.Serializer):
     """参与人员管理序列化器"""
     
@@ -144,4 +192,26 @@ class ParticipantManageSerializer(serializers.Serializer):
     action = serializers.ChoiceField(
         choices=['add', 'remove'],
         required=True
-    )
\ No newline at end of file
+    )
+
+
+class QuestionAnalysisSerializer(serializers.ModelSerializer):
+    """题目分析序列化器"""
+    
+    question_title = serializers.CharField(source='question.title', read_only=True)
+    question_type = serializers.CharField(source='question.question_type', read_only=True)
+    difficulty = serializers.CharField(source='question.difficulty', read_only=True)
+    flags = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = QuestionAnalysis
+        fields = [
+            'question', 'question_title', 'question_type', 'difficulty',
+            'response_count', 'correct_count', 'correct_rate', 'discrimination',
+            'option_counts', 'flags', 'updated_at'
+        ]
+    
+    def get_flags(self, obj):
+        """问题标记"""
+        from .analysis import question_flags
+        return question_flags(obj)
@@ -0,0 +1,19 @@
+"""Examination tasks"""
+import logging
+
+from celery import shared_task
+
+from .analysis import refresh_item_analysis
+from .models import Exam
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_exam_item_analysis(exam_id):
+    """异步增量更新考试的题目分析"""
+    exam = Exam.objects.filter(id=exam_id).first()
+    if exam is None:
+        logger.warning(f"考试不存在: {exam_id}")
+        return 0
+    return refresh_item_analysis(exam)
@@ -1,25 +1,41 @@
 """Examination views"""
 from rest_framework import status, filters
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import F, FilteredRelation, Q
 import random
 
 from .models import QuestionBank, Question, Exam, ExamResult
+from .tasks import refresh_exam_item_analysis
 from .serializers import (
     QuestionBankSerializer, QuestionSerializer, QuestionImportSerializer,
     ExamSerializer, ExamDetailSerializer, ExamResultSerializer,
-    ExamSubmitSerializer, ParticipantManageSerializer
+    ExamSubmitSerializer, ParticipantManageSerializer, QuestionAnalysisSerializer,
+    ExamListSerializer, ExamResultListSerializer, ExamParticipantSerializer,
+    ParticipantQuerySerializer
 )
 from apps.users.permissions import IsExamManager, IsManager, IsManagerOrReadOnly
+from apps.users.capabilities import has_capability, CAP_STAFF
+from apps.common.pagination import CursorOptInPagination
+from apps.common.fieldsets import SparseFieldsetMixin
+from apps.common.search import FullTextSearchFilter
 from apps.users.models import User
 
 
-class QuestionBankViewSet(ModelViewSet):
+class ParticipantPagination(PageNumberPagination):
+    """考试参与者分页"""
+    
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class QuestionBankViewSet(SparseFieldsetMixin, ModelViewSet):
     """题库管理视图集"""
     
     queryset = QuestionBank.objects.select_related('created_by').all()
@@ -36,7 +52,7 @@ class QuestionBankViewSet(ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class QuestionViewSet(ModelViewSet):
+class QuestionViewSet(SparseFieldsetMixin, ModelViewSet):
     """题目管理视图集"""
     
     queryset = Question.objects.select_related('question_bank', 'created_by').all()
@@ -44,9 +60,11 @@ class QuestionViewSet(ModelViewSet):
     # 所有经理和工程师都可以创建
     permission_classes = [IsAuthenticated, IsExamManager]
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['question_bank', 'question_type', 'difficulty']
     search_fields = ['title', 'content']
+    # 与 questions 表的全文索引一致
+    fulltext_fields = ['title', 'content']
     ordering = ['sort_order', 'id']
     
     def perform_create(self, serializer):
@@ -73,12 +91,13 @@ class QuestionViewSet(ModelViewSet):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ExamViewSet(ModelViewSet):
+class ExamViewSet(SparseFieldsetMixin, ModelViewSet):
     """考试管理视图集"""
     
+    # 参与者只在返回 participants 字段时预取（见 field_relations）
     queryset = Exam.objects.select_related(
         'course', 'question_bank', 'created_by'
-    ).prefetch_related('participants')
+    )
     serializer_class = ExamSerializer
     permission_classes = [IsAuthenticated]
     
@@ -87,15 +106,29 @@ class ExamViewSet(ModelViewSet):
     search_fields = ['title', 'code', 'description']
     ordering = ['-created_at']
     
+    deferrable_fields = ['description', 'instructions']
+    field_relations = {
+        'course_title': 'course', 'course_detail': 'course',
+        'question_bank_name': 'question_bank', 'question_bank_detail': 'question_bank',
+        'created_by_name': 'created_by',
+        'participants': 'participants', 'participants_detail': 'participants',
+    }
+    field_annotations = {
+        'participant_count': 'with_participant_count',
+        'result_count': 'with_result_count',
+    }
+    
     def get_permissions(self):
         """动态权限配置"""
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'publish', 'participants']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'publish', 'participants', 'item_analysis']:
             # 所有经理和工程师都可以创建
             return [IsAuthenticated(), IsExamManager()]
         return [IsAuthenticated()]
     
     def get_serializer_class(self):
         """根据操作选择序列化器"""
+        if self.use_list_serializer():
+            return ExamListSerializer
         if self.action == 'retrieve':
             return ExamDetailSerializer
         return self.serializer_class
@@ -105,13 +138,7 @@ class ExamViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有考试
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         # 讲师可以查看自己创建的和相关的考试
@@ -148,10 +175,13 @@ class ExamViewSet(ModelViewSet):
             'data': ExamSerializer(exam).data
         })
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['get', 'post'])
     def participants(self, request, pk=None):
-        """管理参与人员"""
+        """参与人员：GET 分页查看（含考试结果），POST 添加/移除"""
         exam = self.get_object()
+        if request.method == 'GET':
+            return self._list_participants(request, exam)
+        
         serializer = ParticipantManageSerializer(data=request.data)
         
         if serializer.is_valid():
@@ -180,6 +210,83 @@ class ExamViewSet(ModelViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    def _list_participants(self, request, exam):
+        """
+        分页列出参与人员
+        
+        考试结果（每人一条）以 LEFT JOIN 连接，每页一次查询
+        """
+        serializer = ParticipantQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'code': 400,
+                'message': '参数错误',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+        
+        queryset = exam.participants.annotate(
+            exam_result=FilteredRelation('exam_results', condition=Q(exam_results__exam_id=exam.id)),
+        ).annotate(
+            result_status=F('exam_result__status'),
+            score=F('exam_result__score'),
+            is_passed=F('exam_result__is_passed'),
+            submitted_at=F('exam_result__submitted_at'),
+        )
+        
+        if params.get('result_status') == 'not_started':
+            queryset = queryset.filter(result_status__isnull=True)
+        elif params.get('result_status'):
+            queryset = queryset.filter(result_status=params['result_status'])
+        if params.get('department'):
+            queryset = queryset.filter(department_id=params['department'])
+        if params.get('keyword'):
+            queryset = queryset.filter(
+                Q(real_name__icontains=params['keyword']) | Q(employee_id__icontains=params['keyword'])
+            )
+        
+        queryset = queryset.order_by('employee_id', 'id').values(
+            'id', 'username', 'real_name', 'employee_id', 'department__name', 'position__name',
+            'result_status', 'score', 'is_passed', 'submitted_at'
+        )
+        paginator = ParticipantPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': {
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': ExamParticipantSerializer(page, many=True).data
+            }
+        })
+    
+    @action(detail=True, methods=['get'])
+    def item_analysis(self, request, pk=None):
+        """题目分析（正确率、区分度、选项分布），按区分度从低到高排列"""
+        exam = self.get_object()
+        # 只读取已存储的分析结果，未计入的成绩交给异步任务增量更新
+        pending = exam.exam_results.filter(
+            status=ExamResult.Status.GRADED, analyzed=False
+        ).count()
+        if pending:
+            refresh_exam_item_analysis.delay(exam.id)
+        
+        analyses = exam.question_analyses.select_related('question').order_by(
+            F('discrimination').asc(nulls_last=True), 'question_id'
+        )
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': {
+                'result_count': exam.exam_results.filter(analyzed=True).count(),
+                'pending': pending,
+                'questions': QuestionAnalysisSerializer(analyses, many=True).data
+            }
+        })
+    
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def submit(self, request, pk=None):
         """提交考试"""
@@ -320,7 +427,7 @@ class ExamViewSet(ModelViewSet):
         })
 
 
-class ExamResultViewSet(ModelViewSet):
+class ExamResultViewSet(SparseFieldsetMixin, ModelViewSet):
     """考试成绩管理视图集"""
     
     queryset = ExamResult.objects.select_related(
@@ -333,19 +440,28 @@ class ExamResultViewSet(ModelViewSet):
     filterset_fields = ['exam', 'user', 'status', 'is_passed']
     search_fields = ['user__real_name', 'user__employee_id', 'exam__title']
     ordering = ['-created_at']
+    # 支持 pagination=cursor 游标分页
+    pagination_class = CursorOptInPagination
+    
+    deferrable_fields = ['answers', 'review_comment']
+    field_relations = {
+        'exam_title': 'exam', 'exam_code': 'exam',
+        'user_name': 'user', 'user_username': 'user',
+        'department_name': 'user__department',
+    }
+    
+    def get_serializer_class(self):
+        """根据操作选择序列化器"""
+        if self.use_list_serializer():
+            return ExamResultListSerializer
+        return self.serializer_class
     
     def get_queryset(self):
         """根据权限过滤查询集"""
         user = self.request.user
         
         # 所有经理和工程师可以查看所有成绩
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         # 讲师可以查看相关考试成绩
@@ -12,9 +12,10 @@ from .serializers import (
     PositionSerializer, PositionDetailSerializer
 )
 from apps.users.permissions import IsAdminOrHR
+from apps.common.fieldsets import SparseFieldsetMixin
 
 
-class DepartmentViewSet(ModelViewSet):
+class DepartmentViewSet(SparseFieldsetMixin, ModelViewSet):
     """部门管理视图集"""
     
     queryset = Department.objects.select_related('manager').all()
@@ -43,7 +44,7 @@ class DepartmentViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -105,7 +106,7 @@ class DepartmentViewSet(ModelViewSet):
         })
 
 
-class PositionViewSet(ModelViewSet):
+class PositionViewSet(SparseFieldsetMixin, ModelViewSet):
     """岗位管理视图集"""
     
     queryset = Position.objects.select_related('department').all()
@@ -137,7 +138,7 @@ class PositionViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -5,4 +5,7 @@ class ReportingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reporting'
     label = 'reporting'
-    verbose_name = '报表管理'
\ No newline at end of file
+    verbose_name = '报表管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
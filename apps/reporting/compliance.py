@@ -0,0 +1,133 @@
+"""Compliance gap engine"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.competency.models import Certificate, Competency
+from apps.users.models import User
+
+from .models import ComplianceStatus
+
+COMPLIANCE_BATCH_SIZE = 1000
+
+
+def load_requirements(position_ids=None):
+    """岗位 -> 要求的必需能力集合（一次查询）"""
+    queryset = Competency.related_positions.through.objects.filter(competency__required=True)
+    if position_ids is not None:
+        queryset = queryset.filter(position_id__in=position_ids)
+
+    requirements = defaultdict(set)
+    for position_id, competency_id in queryset.values_list('position_id', 'competency_id').iterator():
+        requirements[position_id].add(competency_id)
+    return requirements
+
+
+def load_holdings(user_ids=None, today=None):
+    """用户 -> 持有有效证书的能力集合（一次查询）"""
+    today = today or timezone.now().date()
+    queryset = Certificate.objects.filter(
+        status=Certificate.Status.VALID,
+        competency__isnull=False
+    ).filter(Q(expiry_date__isnull=True) | Q(expiry_date__gte=today))
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+
+    holdings = defaultdict(set)
+    for user_id, competency_id in queryset.values_list('user_id', 'competency_id').iterator():
+        holdings[user_id].add(competency_id)
+    return holdings
+
+
+def compute_compliance(users, requirements, holdings):
+    """
+    计算合规状态（纯内存集合运算）
+
+    users 为 (user_id, position_id) 序列，返回未保存的 ComplianceStatus 列表
+    """
+    statuses = []
+    empty = frozenset()
+    for user_id, position_id in users:
+        required = requirements.get(position_id, empty)
+        missing = required - holdings.get(user_id, empty)
+        statuses.append(ComplianceStatus(
+            user_id=user_id,
+            position_id=position_id,
+            required_count=len(required),
+            held_count=len(required) - len(missing),
+            missing_competencies=sorted(missing),
+            is_compliant=not missing
+        ))
+    return statuses
+
+
+def rebuild_compliance():
+    """全量重算所有在职人员的合规状态，返回人数"""
+    users = list(User.objects.filter(status='active').values_list('id', 'position_id'))
+    statuses = compute_compliance(users, load_requirements(), load_holdings())
+
+    with transaction.atomic():
+        ComplianceStatus.objects.all().delete()
+        ComplianceStatus.objects.bulk_create(statuses, batch_size=COMPLIANCE_BATCH_SIZE)
+    return len(statuses)
+
+
+def update_user_compliance(user_ids):
+    """增量重算指定人员的合规状态（离职人员删除记录）"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+
+    users = list(User.objects.filter(id__in=user_ids, status='active').values_list('id', 'position_id'))
+    position_ids = {position_id for _, position_id in users if position_id}
+    statuses = compute_compliance(
+        users,
+        load_requirements(position_ids),
+        load_holdings([user_id for user_id, _ in users])
+    )
+
+    with transaction.atomic():
+        ComplianceStatus.objects.filter(user_id__in=user_ids).delete()
+        ComplianceStatus.objects.bulk_create(statuses, batch_size=COMPLIANCE_BATCH_SIZE)
+    return len(statuses)
+
+
+def schedule_compliance_update(user_ids):
+    """事务提交后由 Celery 增量重算（不在保存请求内计算）"""
+    from .tasks import update_compliance_statuses
+
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        transaction.on_commit(lambda: update_compliance_statuses.delay(user_ids))
+
+
+def position_user_ids(position_ids):
+    """岗位下的人员ID"""
+    return set(User.objects.filter(position_id__in=position_ids).values_list('id', flat=True))
+
+
+def compliance_queryset(filters):
+    """
+    按部门/岗位/用户过滤的合规状态
+
+    只读取已有记录：由信号增量更新、定时任务全量重算（首次部署执行 rebuild_compliance 命令）
+    """
+    queryset = ComplianceStatus.objects.all()
+    if filters.get('department_id'):
+        queryset = queryset.filter(user__department_id=filters['department_id'])
+    if filters.get('position_id'):
+        queryset = queryset.filter(position_id=filters['position_id'])
+    if filters.get('user_id'):
+        queryset = queryset.filter(user_id=filters['user_id'])
+    return queryset
+
+
+def competency_names(statuses):
+    """缺失能力ID -> 能力信息"""
+    ids = {competency_id for status in statuses for competency_id in status['missing_competencies']}
+    return {
+        competency['id']: competency
+        for competency in Competency.objects.filter(id__in=ids).values('id', 'code', 'name')
+    }
@@ -0,0 +1,59 @@
+"""Report generation engine"""
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .generators import get_report_generator
+from .models import GeneratedReport
+from .writers import get_report_writer
+
+
+def report_file_name(report):
+    """报表文件存储路径"""
+    _, extension, _ = get_report_writer(report.file_format)
+    return f'reports/{report.generated_at:%Y/%m}/{report.id}.{extension}'
+
+
+def generate_report_file(report):
+    """
+    生成报表文件并更新报表状态
+
+    数据按块从数据库读取并直接写入临时文件，完成后保存到存储；数据范围按生成人权限限定
+    """
+    generator = get_report_generator(report.template.report_type)
+    writer, _, _ = get_report_writer(report.file_format)
+    data = generator(
+        dict(report.template.config.get('parameters', {}), **report.parameters), report.generated_by
+    )
+
+    with tempfile.TemporaryFile() as output:
+        writer(output, report.title, data.columns, data.rows)
+        file_size = output.tell()
+        output.seek(0)
+
+        name = report_file_name(report)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        name = default_storage.save(name, File(output))
+
+    report.file_path = name
+    report.file_size = file_size
+    report.status = GeneratedReport.Status.COMPLETED
+    report.error_message = ''
+    report.completed_at = timezone.now()
+    report.save(update_fields=['file_path', 'file_size', 'status', 'error_message', 'completed_at'])
+    return report
+
+
+def delete_report_file(report):
+    """删除报表文件"""
+    if report.file_path and default_storage.exists(report.file_path):
+        default_storage.delete(report.file_path)
+
+
+def report_download_info(report):
+    """下载文件名和 Content-Type"""
+    _, extension, content_type = get_report_writer(report.file_format)
+    return f'{report.title}.{extension}', content_type
@@ -0,0 +1,274 @@
+"""Report data generators"""
+from datetime import date
+
+from django.utils import timezone
+
+from apps.users.capabilities import has_capability, CAP_ADMIN_OR_HR, CAP_MANAGER, CAP_STAFF
+
+from .models import ReportTemplate
+
+# 分块读取的行数
+REPORT_CHUNK_SIZE = 2000
+
+# 报表类型 -> 数据生成函数
+REPORT_GENERATORS = {}
+
+# 报表类型 -> 生成所需能力（未注册的类型生成时失败，默认要求经理和工程师）
+REPORT_CAPABILITIES = {}
+DEFAULT_REPORT_CAPABILITY = CAP_STAFF
+
+# 允许生成全部数据的能力（经理级别），其他人只能生成本部门数据
+FULL_ACCESS_CAPABILITY = CAP_MANAGER
+
+
+class ReportData:
+    """报表数据：表头 + 行迭代器（逐块从数据库读取，不一次性载入内存）"""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+
+def register_generator(report_type, capability=DEFAULT_REPORT_CAPABILITY):
+    """注册报表类型的数据生成函数及生成所需能力"""
+    def decorator(func):
+        REPORT_GENERATORS[report_type] = func
+        REPORT_CAPABILITIES[report_type] = capability
+        return func
+    return decorator
+
+
+def get_report_generator(report_type):
+    """获取报表类型的数据生成函数"""
+    try:
+        return REPORT_GENERATORS[report_type]
+    except KeyError:
+        raise ValueError(f'不支持的报表类型: {report_type}')
+
+
+def get_report_capability(report_type):
+    """生成报表类型所需的能力"""
+    return REPORT_CAPABILITIES.get(report_type, DEFAULT_REPORT_CAPABILITY)
+
+
+def scope_parameters(parameters, requester):
+    """按生成人限定数据范围：非经理级别只能查看本部门数据（未分配部门时只能查看自己）"""
+    parameters = dict(parameters)
+    if not has_capability(requester, FULL_ACCESS_CAPABILITY):
+        if requester.department_id:
+            parameters['department_id'] = requester.department_id
+        else:
+            parameters['user_id'] = requester.id
+    return parameters
+
+
+def format_datetime(value):
+    """日期时间转为本地时间字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, date) and not hasattr(value, 'hour'):
+        return value.strftime('%Y-%m-%d')
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def filter_date_range(queryset, field, parameters):
+    """按报表参数中的 start_date / end_date 过滤"""
+    if parameters.get('start_date'):
+        queryset = queryset.filter(**{f'{field}__date__gte': parameters['start_date']})
+    if parameters.get('end_date'):
+        queryset = queryset.filter(**{f'{field}__date__lte': parameters['end_date']})
+    return queryset
+
+
+def iterate_rows(queryset, fields, convert):
+    """按主键顺序分块读取并转换为行"""
+    for values in queryset.order_by('pk').values_list(*fields).iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield convert(values)
+
+
+@register_generator(ReportTemplate.ReportType.TRAINING_STATISTICS)
+def training_statistics(parameters, requester):
+    """培训统计报表：培训记录明细"""
+    from apps.training.models import TrainingRecord
+
+    parameters = scope_parameters(parameters, requester)
+    queryset = filter_date_range(TrainingRecord.objects.all(), 'created_at', parameters)
+    if parameters.get('department_id'):
+        queryset = queryset.filter(user__department_id=parameters['department_id'])
+    if parameters.get('user_id'):
+        queryset = queryset.filter(user_id=parameters['user_id'])
+    if parameters.get('course_id'):
+        queryset = queryset.filter(course_id=parameters['course_id'])
+
+    status_display = dict(TrainingRecord.Status.choices)
+    fields = [
+        'user__employee_id', 'user__real_name', 'user__department__name',
+        'course__code', 'course__title', 'status', 'progress', 'study_duration',
+        'score', 'created_at', 'complete_date'
+    ]
+
+    def convert(values):
+        (employee_id, real_name, department, course_code, course_title,
+         record_status, progress, study_duration, score, created_at, complete_date) = values
+        return [
+            employee_id, real_name, department or '', course_code, course_title,
+            str(status_display.get(record_status, record_status)), progress, study_duration,
+            score, format_datetime(created_at), format_datetime(complete_date)
+        ]
+
+    return ReportData(
+        ['工号', '姓名', '部门', '课程代码', '课程名称', '状态', '学习进度(%)',
+         '学习时长(分钟)', '成绩', '报名时间', '完成时间'],
+        iterate_rows(queryset, fields, convert)
+    )
+
+
+@register_generator(ReportTemplate.ReportType.EXAM_ANALYSIS)
+def exam_analysis(parameters, requester):
+    """考试分析报表：考试成绩明细，指定 item_analysis 时输出题目分析"""
+    from apps.examination.models import ExamResult
+
+    if parameters.get('item_analysis') and parameters.get('exam_id'):
+        return exam_item_analysis(parameters['exam_id'])
+
+    parameters = scope_parameters(parameters, requester)
+    queryset = filter_date_range(ExamResult.objects.all(), 'submitted_at', parameters)
+    if parameters.get('exam_id'):
+        queryset = queryset.filter(exam_id=parameters['exam_id'])
+    if parameters.get('department_id'):
+        queryset = queryset.filter(user__department_id=parameters['department_id'])
+    if parameters.get('user_id'):
+        queryset = queryset.filter(user_id=parameters['user_id'])
+
+    status_display = dict(ExamResult.Status.choices)
+    fields = [
+        'exam__title', 'user__employee_id', 'user__real_name', 'user__department__name',
+        'status', 'score', 'correct_count', 'wrong_count', 'is_passed', 'duration', 'submitted_at'
+    ]
+
+    def convert(values):
+        (exam_title, employee_id, real_name, department, result_status, score,
+         correct_count, wrong_count, is_passed, duration, submitted_at) = values
+        return [
+            exam_title, employee_id, real_name, department or '',
+            str(status_display.get(result_status, result_status)), score,
+            correct_count, wrong_count, '是' if is_passed else '否', duration,
+            format_datetime(submitted_at)
+        ]
+
+    return ReportData(
+        ['考试', '工号', '姓名', '部门', '状态', '得分', '答对题数', '答错题数',
+         '是否通过', '用时(分钟)', '提交时间'],
+        iterate_rows(queryset, fields, convert)
+    )
+
+
+def exam_item_analysis(exam_id):
+    """考试题目分析明细"""
+    from apps.examination.analysis import question_flags, refresh_item_analysis
+    from apps.examination.models import Exam, Question
+
+    exam = Exam.objects.get(id=exam_id)
+    refresh_item_analysis(exam)
+
+    type_display = dict(Question.QuestionType.choices)
+    flag_display = {
+        'too_hard': '过难', 'too_easy': '过易',
+        'negative_discrimination': '区分度为负', 'low_discrimination': '区分度低',
+    }
+
+    def rows():
+        for analysis in exam.question_analyses.select_related('question').order_by('question__sort_order', 'question_id'):
+            yield [
+                analysis.question_id, analysis.question.title,
+                str(type_display.get(analysis.question.question_type, analysis.question.question_type)),
+                analysis.response_count, analysis.correct_count,
+                analysis.correct_rate, analysis.discrimination,
+                ' '.join(f'{option}:{count}' for option, count in analysis.option_counts.items()),
+                '、'.join(flag_display[flag] for flag in question_flags(analysis))
+            ]
+
+    return ReportData(
+        ['题目ID', '题目', '题型', '作答人数', '答对人数', '正确率', '区分度', '选项分布', '问题标记'],
+        rows()
+    )
+
+
+@register_generator(ReportTemplate.ReportType.USER_ACTIVITY, capability=CAP_ADMIN_OR_HR)
+def user_activity(parameters, requester):
+    """用户活动报表：审计日志明细"""
+    from apps.audit.models import AuditLog
+
+    parameters = scope_parameters(parameters, requester)
+    queryset = filter_date_range(AuditLog.objects.all(), 'created_at', parameters)
+    if parameters.get('department_id'):
+        queryset = queryset.filter(operator__department_id=parameters['department_id'])
+    if parameters.get('user_id'):
+        queryset = queryset.filter(operator_id=parameters['user_id'])
+    if parameters.get('module'):
+        queryset = queryset.filter(module=parameters['module'])
+
+    action_display = dict(AuditLog.ActionType.choices)
+    status_display = dict(AuditLog.Status.choices)
+    fields = [
+        'created_at', 'operator_username', 'operator_name', 'action', 'module',
+        'object_name', 'request_method', 'request_path', 'ip_address', 'status', 'response_time'
+    ]
+
+    def convert(values):
+        (created_at, username, name, log_action, module, object_name,
+         method, path, ip_address, log_status, response_time) = values
+        return [
+            format_datetime(created_at), username, name,
+            str(action_display.get(log_action, log_action)), module, object_name,
+            method, path, ip_address or '', str(status_display.get(log_status, log_status)),
+            response_time
+        ]
+
+    return ReportData(
+        ['时间', '用户名', '姓名', '操作类型', '模块', '对象', '请求方法',
+         '请求路径', 'IP地址', '状态', '响应时间(ms)'],
+        iterate_rows(queryset, fields, convert)
+    )
+
+
+@register_generator(ReportTemplate.ReportType.COMPETENCY_MATRIX)
+def competency_matrix(parameters, requester):
+    """能力矩阵报表：用户 × 能力 等级（或分数）"""
+    from .matrix import get_competency_matrix, matrix_filters
+
+    parameters = scope_parameters(parameters, requester)
+    matrix = get_competency_matrix(matrix_filters(parameters))
+    return ReportData(matrix.columns(), matrix.table_rows(parameters.get('value', 'level')))
+
+
+@register_generator(ReportTemplate.ReportType.COMPLIANCE_REPORT)
+def compliance_report(parameters, requester):
+    """合规性报表：岗位要求能力与持证情况"""
+    from .compliance import compliance_queryset, competency_names
+
+    parameters = scope_parameters(parameters, requester)
+    queryset = compliance_queryset(parameters)
+    if parameters.get('non_compliant_only'):
+        queryset = queryset.filter(is_compliant=False)
+
+    statuses = list(queryset.order_by('user__employee_id', 'user_id').values(
+        'user__employee_id', 'user__real_name', 'user__department__name', 'position__name',
+        'required_count', 'held_count', 'missing_competencies', 'is_compliant'
+    ))
+    names = competency_names(statuses)
+
+    def rows():
+        for status in statuses:
+            yield [
+                status['user__employee_id'], status['user__real_name'],
+                status['user__department__name'] or '', status['position__name'] or '',
+                status['required_count'], status['held_count'],
+                '是' if status['is_compliant'] else '否',
+                '、'.join(names[i]['name'] for i in status['missing_competencies'] if i in names)
+            ]
+
+    return ReportData(
+        ['工号', '姓名', '部门', '岗位', '要求能力数', '已持证数', '是否合规', '缺失能力'],
+        rows()
+    )
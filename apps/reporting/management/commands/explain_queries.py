@@ -0,0 +1,47 @@
+"""EXPLAIN the major list/statistics queries and flag full table scans"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reporting.query_plans import QUERY_SHAPES, explain_query_shapes
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the major list/statistics queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='查询名称（前缀匹配，默认全部）')
+        parser.add_argument('--database', default='default', help='数据库别名')
+        parser.add_argument('--list', action='store_true', help='只列出查询名称')
+        parser.add_argument('--fail-on-scan', action='store_true', help='发现全表扫描时以非零状态退出')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, shape in QUERY_SHAPES.items():
+                self.stdout.write(f'{name:<36}{shape.description}')
+            return
+
+        try:
+            plans = explain_query_shapes(options['names'], using=options['database'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not plans:
+            raise CommandError(f"没有匹配的查询: {' '.join(options['names'])}")
+
+        flagged = []
+        for plan in plans:
+            full_scans = plan.full_scans
+            if full_scans:
+                flagged.append(plan)
+                label = self.style.ERROR(f"全表扫描: {', '.join(full_scans)}")
+            else:
+                label = self.style.SUCCESS('OK')
+            if plan.sorts:
+                label += self.style.WARNING(' (额外排序)')
+            self.stdout.write(f'{plan.shape.name:<36}{label}')
+            # 有问题或 -v 2 时输出执行计划
+            if full_scans or options['verbosity'] >= 2:
+                for line in plan.lines:
+                    self.stdout.write(f'    {line}')
+
+        self.stdout.write(f'共检查 {len(plans)} 个查询，{len(flagged)} 个存在全表扫描')
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f"全表扫描: {', '.join(plan.shape.name for plan in flagged)}")
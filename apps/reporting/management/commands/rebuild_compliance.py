@@ -0,0 +1,12 @@
+"""Rebuild compliance statuses"""
+from django.core.management.base import BaseCommand
+
+from apps.reporting.compliance import rebuild_compliance
+
+
+class Command(BaseCommand):
+    help = 'Rebuild compliance statuses for all active users'
+
+    def handle(self, *args, **options):
+        total = rebuild_compliance()
+        self.stdout.write(f'已重算合规状态: {total} 人')
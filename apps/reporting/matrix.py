@@ -0,0 +1,279 @@
+"""Competency matrix"""
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db.models import Count, FloatField, Max
+from django.db.models.functions import Cast
+
+from apps.competency.models import Competency, CompetencyAssessment
+from apps.users.models import User
+
+MATRIX_CACHE_KEY = 'reporting:competency_matrix:{filters}:{version}'
+MATRIX_CACHE_TIMEOUT = 60 * 60
+
+# 矩阵按行块缓存，分页时只读取覆盖请求范围的行块
+MATRIX_BLOCK_SIZE = 500
+
+# 数据版本（聚合查询结果）短暂缓存；评估、人员、能力变更时递增代数立即失效
+MATRIX_GENERATION_CACHE_KEY = 'reporting:competency_matrix_generation'
+MATRIX_VERSION_CACHE_KEY = 'reporting:competency_matrix_version:{generation}:{filters}'
+MATRIX_VERSION_CACHE_TIMEOUT = 30
+
+# 计入矩阵的评估状态（同一用户同一能力只有一条评估）
+MATRIX_STATUSES = [CompetencyAssessment.Status.COMPLETED, CompetencyAssessment.Status.APPROVED]
+
+# 能力等级按顺序编码为 1..4，0 表示未评估
+LEVELS = [value for value, _ in Competency.Level.choices]
+LEVEL_LABELS = [''] + [str(label) for _, label in Competency.Level.choices]
+LEVEL_RANKS = {value: rank for rank, value in enumerate(LEVELS, 1)}
+
+MATRIX_FILTERS = ['department_id', 'position_id', 'user_id']
+
+MATRIX_USER_COLUMNS = ['工号', '姓名', '部门', '岗位']
+
+
+def matrix_filters(parameters):
+    """提取矩阵过滤条件"""
+    return {key: int(parameters[key]) for key in MATRIX_FILTERS if parameters.get(key)}
+
+
+def _user_filter(filters, prefix=''):
+    """过滤条件转换为用户查询条件"""
+    return {
+        f'{prefix}id' if key == 'user_id' else f'{prefix}{key}': value
+        for key, value in filters.items()
+    }
+
+
+def assessment_queryset(filters):
+    """矩阵使用的评估记录"""
+    return CompetencyAssessment.objects.filter(
+        status__in=MATRIX_STATUSES,
+        user__status='active',
+        **_user_filter(filters, 'user__')
+    )
+
+
+def pivot_assessments(user_ids, competency_ids, records):
+    """
+    将评估记录透视为 用户 × 能力 的等级和分数矩阵
+
+    records 为 (user_id, competency_id, level, score) 序列，
+    返回 (levels int8, scores float32)
+    """
+    levels = np.zeros((len(user_ids), len(competency_ids)), dtype=np.int8)
+    scores = np.full((len(user_ids), len(competency_ids)), np.nan, dtype=np.float32)
+
+    frame = pd.DataFrame.from_records(
+        records, columns=['user_id', 'competency_id', 'level', 'score']
+    )
+    if frame.empty:
+        return levels, scores
+
+    rows = pd.Index(user_ids).get_indexer(frame['user_id'])
+    cols = pd.Index(competency_ids).get_indexer(frame['competency_id'])
+    mask = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[mask], cols[mask]
+
+    levels[rows, cols] = frame['level'].map(LEVEL_RANKS).fillna(0).to_numpy(dtype=np.int8)[mask]
+    scores[rows, cols] = pd.to_numeric(frame['score'], errors='coerce').to_numpy(dtype=np.float32)[mask]
+    return levels, scores
+
+
+class CompetencyMatrix:
+    """能力矩阵：用户 × 能力 的等级和分数"""
+
+    def __init__(self, users, competencies, levels, scores):
+        self.users = users
+        self.competencies = competencies
+        self.levels = levels
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.users)
+
+    def block(self, start, stop):
+        """行块（缓存单元）"""
+        return self.users[start:stop], self.levels[start:stop], self.scores[start:stop]
+
+    def rows(self, start=0, stop=None):
+        """JSON 行：等级和分数按能力列顺序排列，未评估为 null"""
+        levels = self.levels[start:stop]
+        scores = self.scores[start:stop]
+        level_values = np.array([None] + LEVELS, dtype=object)[levels].tolist()
+        score_values = np.where(np.isnan(scores), None, np.round(scores.astype(np.float64), 2)).tolist()
+        return [
+            dict(user, levels=row_levels, scores=row_scores)
+            for user, row_levels, row_scores in zip(self.users[start:stop], level_values, score_values)
+        ]
+
+    def columns(self):
+        """表格表头"""
+        return MATRIX_USER_COLUMNS + [competency['name'] for competency in self.competencies]
+
+    def table_rows(self, value='level'):
+        """表格行：每个能力一列，value 为 level 时输出等级名称，为 score 时输出分数"""
+        labels = np.array(LEVEL_LABELS, dtype=object)
+        for index, user in enumerate(self.users):
+            if value == 'score':
+                cells = np.where(np.isnan(self.scores[index]), None, np.round(self.scores[index].astype(np.float64), 2))
+            else:
+                cells = labels[self.levels[index]]
+            yield [
+                user['employee_id'], user['real_name'], user['department'] or '', user['position'] or ''
+            ] + cells.tolist()
+
+
+def build_competency_matrix(filters):
+    """构建能力矩阵（评估数据一次查询读取，在内存中透视）"""
+    users = list(
+        User.objects.filter(status='active', **_user_filter(filters))
+        .order_by('employee_id', 'id')
+        .values('id', 'employee_id', 'real_name', 'department__name', 'position__name')
+    )
+    users = [{
+        'user_id': user['id'],
+        'employee_id': user['employee_id'],
+        'real_name': user['real_name'],
+        'department': user['department__name'],
+        'position': user['position__name'],
+    } for user in users]
+
+    # 分数在数据库中转为浮点数，避免逐个转换 Decimal
+    records = list(
+        assessment_queryset(filters)
+        .annotate(score_value=Cast('score', FloatField()))
+        .values_list('user_id', 'competency_id', 'level', 'score_value')
+        .iterator(chunk_size=10000)
+    )
+
+    # 列为已评估的能力，按岗位查看时加上岗位要求的能力
+    competencies = Competency.objects.filter(id__in={record[1] for record in records})
+    if 'position_id' in filters:
+        competencies |= Competency.objects.filter(related_positions=filters['position_id'])
+    competencies = list(competencies.distinct().order_by('code').values('id', 'code', 'name'))
+
+    levels, scores = pivot_assessments(
+        [user['user_id'] for user in users],
+        [competency['id'] for competency in competencies],
+        records
+    )
+    return CompetencyMatrix(users, competencies, levels, scores)
+
+
+def invalidate_competency_matrix():
+    """递增缓存代数，使已缓存的数据版本失效"""
+    if not cache.add(MATRIX_GENERATION_CACHE_KEY, 1, None):
+        try:
+            cache.incr(MATRIX_GENERATION_CACHE_KEY)
+        except ValueError:
+            cache.set(MATRIX_GENERATION_CACHE_KEY, 1, None)
+
+
+def matrix_version(filters_key, filters):
+    """
+    数据版本：评估和用户的最近更新时间、数量
+
+    聚合结果短暂缓存，分页请求不必每次扫描；有变更信号时随代数递增立即失效
+    """
+    generation = cache.get(MATRIX_GENERATION_CACHE_KEY, 0)
+    key = MATRIX_VERSION_CACHE_KEY.format(generation=generation, filters=filters_key)
+    version = cache.get(key)
+    if version is None:
+        assessments = assessment_queryset(filters).aggregate(latest=Max('updated_at'), total=Count('id'))
+        users = User.objects.filter(status='active', **_user_filter(filters)).aggregate(
+            latest=Max('updated_at'), total=Count('id')
+        )
+        version = '{}:{}:{}:{}'.format(
+            assessments['latest'].timestamp() if assessments['latest'] else 0, assessments['total'],
+            users['latest'].timestamp() if users['latest'] else 0, users['total']
+        )
+        cache.set(key, version, MATRIX_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class CachedCompetencyMatrix:
+    """
+    缓存中的能力矩阵
+
+    表头（行数、能力列）单独缓存，行按 MATRIX_BLOCK_SIZE 分块缓存并按需读取；
+    本次请求刚构建的矩阵直接在内存中使用
+    """
+
+    def __init__(self, filters, key, count, competencies, matrix=None):
+        self.filters = filters
+        self.key = key
+        self.count = count
+        self.competencies = competencies
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, filters, key):
+        """构建矩阵并写入表头和全部行块"""
+        matrix = build_competency_matrix(filters)
+        values = {f'{key}:header': {'count': len(matrix), 'competencies': matrix.competencies}}
+        for index, start in enumerate(range(0, len(matrix), MATRIX_BLOCK_SIZE)):
+            values[f'{key}:block:{index}'] = matrix.block(start, start + MATRIX_BLOCK_SIZE)
+        cache.set_many(values, MATRIX_CACHE_TIMEOUT)
+        return cls(filters, key, len(matrix), matrix.competencies, matrix)
+
+    def __len__(self):
+        return self.count
+
+    def _load(self, start, stop):
+        """读取 [start, stop) 行所在的行块，缺失时（被驱逐）重新构建"""
+        if self.matrix is None:
+            indexes = range(start // MATRIX_BLOCK_SIZE, (stop - 1) // MATRIX_BLOCK_SIZE + 1)
+            keys = [f'{self.key}:block:{index}' for index in indexes]
+            blocks = cache.get_many(keys)
+            if len(blocks) == len(keys):
+                users, levels, scores = [], [], []
+                for key in keys:
+                    block_users, block_levels, block_scores = blocks[key]
+                    users.extend(block_users)
+                    levels.append(block_levels)
+                    scores.append(block_scores)
+                offset = indexes[0] * MATRIX_BLOCK_SIZE
+                return CompetencyMatrix(
+                    users, self.competencies, np.concatenate(levels), np.concatenate(scores)
+                ), start - offset, stop - offset
+
+            rebuilt = self.build(self.filters, self.key)
+            self.count, self.competencies, self.matrix = rebuilt.count, rebuilt.competencies, rebuilt.matrix
+        return self.matrix, start, stop
+
+    def rows(self, start=0, stop=None):
+        """JSON 行（只读取覆盖该范围的行块）"""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return []
+        matrix, start, stop = self._load(start, stop)
+        return matrix.rows(start, stop)
+
+    def columns(self):
+        """表格表头"""
+        return MATRIX_USER_COLUMNS + [competency['name'] for competency in self.competencies]
+
+    def table_rows(self, value='level'):
+        """表格行（逐块读取）"""
+        for start in range(0, self.count, MATRIX_BLOCK_SIZE):
+            stop = min(start + MATRIX_BLOCK_SIZE, self.count)
+            matrix, block_start, block_stop = self._load(start, stop)
+            users, levels, scores = matrix.block(block_start, block_stop)
+            yield from CompetencyMatrix(users, self.competencies, levels, scores).table_rows(value)
+
+
+def get_competency_matrix(filters):
+    """
+    获取能力矩阵（缓存）
+
+    缓存键包含过滤条件以及数据版本（评估和用户的最近更新时间、数量），
+    有新的评估或人员变动时自动失效；只读取表头，行按需分块读取
+    """
+    filters_key = ','.join(f'{key}={value}' for key, value in sorted(filters.items())) or 'all'
+    key = MATRIX_CACHE_KEY.format(filters=filters_key, version=matrix_version(filters_key, filters))
+
+    header = cache.get(f'{key}:header')
+    if header is None:
+        return CachedCompetencyMatrix.build(filters, key)
+    return CachedCompetencyMatrix(filters, key, header['count'], header['competencies'])
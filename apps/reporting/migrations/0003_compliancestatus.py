@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('organization', '0002_initial'),
+        ('reporting', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('required_count', models.IntegerField(default=0, verbose_name='要求能力数')),
+                ('held_count', models.IntegerField(default=0, verbose_name='已持证能力数')),
+                ('missing_competencies', models.JSONField(blank=True, default=list, verbose_name='缺失能力')),
+                ('is_compliant', models.BooleanField(default=True, verbose_name='是否合规')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('position', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='organization.position', verbose_name='岗位')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_status', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '合规状态',
+                'verbose_name_plural': '合规状态',
+                'db_table': 'compliance_statuses',
+                'indexes': [models.Index(fields=['is_compliant'], name='compliance__is_comp_5105d5_idx'), models.Index(fields=['position'], name='compliance__positio_6d2ec1_idx')],
+            },
+        ),
+    ]
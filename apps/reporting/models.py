@@ -98,4 +98,39 @@ class GeneratedReport(models.Model):
         ]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class ComplianceStatus(models.Model):
+    """人员合规状态表（岗位要求能力 vs 持有有效证书）"""
+    
+    user = models.OneToOneField(
+        'users.User',
+        on_delete=models.CASCADE,
+        verbose_name=_('用户'),
+        related_name='compliance_status'
+    )
+    position = models.ForeignKey(
+        'organization.Position',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('岗位'),
+        related_name='+'
+    )
+    required_count = models.IntegerField(_('要求能力数'), default=0)
+    held_count = models.IntegerField(_('已持证能力数'), default=0)
+    missing_competencies = models.JSONField(_('缺失能力'), default=list, blank=True)
+    is_compliant = models.BooleanField(_('是否合规'), default=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('合规状态')
+        verbose_name_plural = _('合规状态')
+        db_table = 'compliance_statuses'
+        indexes = [
+            models.Index(fields=['is_compliant']),
+            models.Index(fields=['position']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} - {'合规' if self.is_compliant else '不合规'}"
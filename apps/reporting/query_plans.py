@@ -0,0 +1,184 @@
+"""Query plan advisor: EXPLAIN the major list/statistics queries and flag full scans"""
+import re
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+
+SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+
+# 查询形状注册表：名称 -> QueryShape
+QUERY_SHAPES = {}
+
+
+class QueryShape:
+    """
+    待检查的查询形状
+
+    build 返回查询集（参数取示例值，执行计划与具体值无关）；
+    allow_scan 为允许全表扫描的表（如列表接口的主表、全量分组统计）
+    """
+
+    def __init__(self, name, description, build, allow_scan=()):
+        self.name = name
+        self.description = description
+        self.build = build
+        self.allow_scan = set(allow_scan)
+
+
+class QueryPlan:
+    """执行计划及发现的问题"""
+
+    def __init__(self, shape, lines, scanned_tables, sorts):
+        self.shape = shape
+        self.lines = lines
+        self.scanned_tables = scanned_tables
+        self.sorts = sorts
+
+    @property
+    def full_scans(self):
+        """不允许的全表扫描"""
+        return [table for table in self.scanned_tables if table not in self.shape.allow_scan]
+
+
+def register_query_shape(name, description, allow_scan=()):
+    """注册查询形状"""
+    def decorator(build):
+        QUERY_SHAPES[name] = QueryShape(name, description, build, allow_scan)
+        return build
+    return decorator
+
+
+def explain_rows(queryset):
+    """执行 EXPLAIN，返回 (计划行, 全表扫描的表, 是否额外排序)"""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    scanned, sorts, lines = [], False, []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                lines.append(detail)
+                match = SQLITE_SCAN_RE.match(detail)
+                if match and 'USING' not in detail:
+                    scanned.append(match.group(1))
+                sorts = sorts or 'USE TEMP B-TREE' in detail
+        elif connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0].lower() for column in cursor.description]
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                lines.append(
+                    f"{row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                    f"rows={row.get('rows')} {row.get('extra') or ''}".rstrip()
+                )
+                if row.get('type') == 'ALL':
+                    scanned.append(row.get('table'))
+                sorts = sorts or 'filesort' in (row.get('extra') or '')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            for (detail,) in cursor.fetchall():
+                lines.append(detail)
+                scanned.extend(POSTGRES_SCAN_RE.findall(detail))
+                sorts = sorts or detail.lstrip(' ->').startswith('Sort')
+        else:
+            raise ValueError(f'不支持的数据库: {connection.vendor}')
+    return lines, scanned, sorts
+
+
+def explain_query_shapes(names=None, using='default'):
+    """检查查询形状的执行计划，names 为空时检查全部"""
+    plans = []
+    for name, shape in QUERY_SHAPES.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        queryset = shape.build().using(using)
+        lines, scanned, sorts = explain_rows(queryset)
+        plans.append(QueryPlan(shape, lines, scanned, sorts))
+    return plans
+
+
+@register_query_shape('training_records.user_status', '个人学习统计：用户 + 状态')
+def training_records_user_status():
+    from apps.training.models import TrainingRecord
+    return TrainingRecord.objects.filter(user_id=1, status=TrainingRecord.Status.COMPLETED).values('id')
+
+
+@register_query_shape('training_records.department_status', '部门学习统计：部门 + 状态')
+def training_records_department_status():
+    from apps.training.models import TrainingRecord
+    return TrainingRecord.objects.filter(
+        user__department_id=1, status=TrainingRecord.Status.COMPLETED
+    ).values('id')
+
+
+@register_query_shape('training_records.cursor_page', '培训记录游标分页')
+def training_records_cursor_page():
+    from apps.training.models import TrainingRecord
+    return TrainingRecord.objects.filter(
+        created_at__lt=timezone.now()
+    ).order_by('-created_at', '-pk')[:21]
+
+
+@register_query_shape('exam_results.pending_analysis', '题目分析：考试待计入的已评分结果')
+def exam_results_pending_analysis():
+    from apps.examination.models import ExamResult
+    return ExamResult.objects.filter(exam_id=1, status=ExamResult.Status.GRADED, analyzed=False)
+
+
+@register_query_shape('exam_results.submitted', '考试已提交结果（按提交时间）')
+def exam_results_submitted():
+    from apps.examination.models import ExamResult
+    return ExamResult.objects.filter(exam_id=1, submitted_at__isnull=False).order_by('submitted_at')
+
+
+@register_query_shape('exams.list_counts', '考试列表：参与人数和已考试人数', allow_scan=['exams'])
+def exams_list_counts():
+    from apps.examination.models import Exam
+    return Exam.objects.with_participant_count().with_result_count().order_by('-created_at')[:20]
+
+
+@register_query_shape('audit_logs.summary_modules', '审计汇总：时间范围内按模块统计')
+def audit_logs_summary_modules():
+    from apps.audit.models import AuditLog
+    return AuditLog.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=30)
+    ).values('module').annotate(count=Count('id')).order_by('-count')[:10]
+
+
+@register_query_shape('audit_logs.summary_status', '审计汇总：时间范围内按状态计数')
+def audit_logs_summary_status():
+    from apps.audit.models import AuditLog
+    return AuditLog.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=30), status=AuditLog.Status.FAILED
+    ).values('id')
+
+
+@register_query_shape('certificates.expiring', '证书到期检查：有效 + 到期日期范围')
+def certificates_expiring():
+    from apps.competency.models import Certificate
+    today = timezone.now().date()
+    return Certificate.objects.filter(
+        status=Certificate.Status.VALID, expiry_date__range=(today, today + timedelta(days=30))
+    ).order_by('id')
+
+
+@register_query_shape('users.department_status', '用户列表：部门 + 状态')
+def users_department_status():
+    from apps.users.models import User
+    return User.objects.filter(department_id=1, status='active').values('id')
+
+
+@register_query_shape('courses.by_tag', '课程列表：按标签过滤')
+def courses_by_tag():
+    from apps.training.models import Course
+    return Course.objects.filter(tag_items__name='tag').values('id')
+
+
+@register_query_shape('course_tags.facets', '标签分面：各标签已发布课程数', allow_scan=['course_taggings'])
+def course_tags_facets():
+    from apps.training.utils import tag_facet_rows
+    return tag_facet_rows()
@@ -35,7 +35,16 @@ class GeneratedReportSerializer(serializers.ModelSerializer):
             'status', 'status_display', 'error_message', 'generated_by',
             'generated_by_name', 'generated_at', 'completed_at'
         ]
-        read_only_fields = ['id', 'generated_at', 'completed_at']
+        read_only_fields = [
+            'id', 'file_path', 'file_size', 'status', 'error_message',
+            'generated_by', 'generated_at', 'completed_at'
+        ]
+    
+    def validate_template(self, value):
+        """验证报表模板"""
+        if not value.is_active:
+            raise serializers.ValidationError('报表模板未激活')
+        return value
 
 
 class ReportExportSerializer(serializers.Serializer):
@@ -105,6 +114,20 @@ class CompetencyMatrixSerializer(serializers.Serializer):
     matrix = serializers.ListField()
 
 
+class ReportFilterSerializer(serializers.Serializer):
+    """报表人员范围查询参数序列化器"""
+    
+    department_id = serializers.IntegerField(required=False)
+    position_id = serializers.IntegerField(required=False)
+    user_id = serializers.IntegerField(required=False)
+
+
+class CompetencyMatrixQuerySerializer(ReportFilterSerializer):
+    """能力矩阵查询参数序列化器"""
+    
+    value = serializers.ChoiceField(choices=['level', 'score'], default='level')
+
+
 class ComplianceReportSerializer(serializers.Serializer):
     """合规性报表序列化器"""
     
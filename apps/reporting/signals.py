@@ -0,0 +1,83 @@
+"""Reporting signals"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.competency.models import Competency, CompetencyAssessment
+from apps.competency.signals import certificates_changed
+from apps.users.models import User, TokenUser
+
+from .compliance import position_user_ids, schedule_compliance_update
+from .matrix import invalidate_competency_matrix
+
+# 影响合规状态的人员字段
+COMPLIANCE_USER_FIELDS = ('position_id', 'department_id', 'status')
+
+
+@receiver(certificates_changed)
+def certificates_updated(sender, user_ids, **kwargs):
+    """证书变更后重算相关人员的合规状态"""
+    schedule_compliance_update(user_ids)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=TokenUser)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    """记录保存前的岗位、部门和在职状态"""
+    instance._compliance_values = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {
+        sender._meta.get_field(name).attname for name in update_fields
+    } & set(COMPLIANCE_USER_FIELDS):
+        return
+    instance._compliance_values = (
+        sender._base_manager.filter(pk=instance.pk).values_list(*COMPLIANCE_USER_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """新建人员或岗位、部门、在职状态变化后重算其合规状态"""
+    previous = getattr(instance, '_compliance_values', None)
+    instance._compliance_values = None
+    if not created and (
+        previous is None
+        or previous == tuple(getattr(instance, name) for name in COMPLIANCE_USER_FIELDS)
+    ):
+        return
+    schedule_compliance_update([instance.pk])
+
+
+@receiver(m2m_changed, sender=Competency.related_positions.through)
+def competency_positions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """岗位要求的能力变化后重算相关岗位人员"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # 从岗位一侧修改
+        position_ids = [instance.pk]
+    elif action == 'pre_clear':
+        position_ids = list(instance.related_positions.values_list('id', flat=True))
+    else:
+        position_ids = pk_set
+    schedule_compliance_update(position_user_ids(position_ids))
+
+
+@receiver(post_save, sender=Competency)
+@receiver(pre_delete, sender=Competency)
+def competency_changed(sender, instance, **kwargs):
+    """能力的必需标记变化或被删除后重算相关岗位人员"""
+    position_ids = list(instance.related_positions.values_list('id', flat=True))
+    if position_ids:
+        schedule_compliance_update(position_user_ids(position_ids))
+
+
+@receiver([post_save, post_delete], sender=CompetencyAssessment)
+@receiver([post_save, post_delete], sender=Competency)
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=TokenUser)
+def competency_matrix_changed(sender, **kwargs):
+    """评估、能力或人员变更后能力矩阵的数据版本立即失效"""
+    invalidate_competency_matrix()
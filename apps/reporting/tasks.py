@@ -0,0 +1,51 @@
+"""Reporting tasks"""
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from .compliance import rebuild_compliance, update_user_compliance
+from .engine import generate_report_file
+from .models import GeneratedReport
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_report(report_id):
+    """异步生成报表"""
+    try:
+        report = GeneratedReport.objects.select_related('template', 'generated_by__role').get(
+            id=report_id, status=GeneratedReport.Status.PENDING
+        )
+    except GeneratedReport.DoesNotExist:
+        logger.warning(f"报表不存在或已处理: {report_id}")
+        return None
+
+    try:
+        generate_report_file(report)
+    except Exception as e:
+        logger.exception(f"报表生成失败: {report_id}")
+        GeneratedReport.objects.filter(id=report_id).update(
+            status=GeneratedReport.Status.FAILED,
+            error_message=str(e),
+            completed_at=timezone.now()
+        )
+        return None
+
+    logger.info(f"报表生成完成: {report.title} ({report.file_size} 字节)")
+    return report.file_path
+
+
+@shared_task
+def rebuild_compliance_statuses():
+    """全量重算合规状态（兜底证书自然到期等未触发增量更新的变化）"""
+    total = rebuild_compliance()
+    logger.info(f"合规状态重算完成: {total} 人")
+    return total
+
+
+@shared_task
+def update_compliance_statuses(user_ids):
+    """增量重算指定人员的合规状态"""
+    return update_user_compliance(user_ids)
@@ -1,20 +1,52 @@
 """Reporting views"""
+import tempfile
+
 from rest_framework import status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.db import transaction
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 
 from .models import ReportTemplate, GeneratedReport
-from .serializers import ReportTemplateSerializer, GeneratedReportSerializer
+from .serializers import (
+    ReportTemplateSerializer, GeneratedReportSerializer,
+    ReportFilterSerializer, CompetencyMatrixQuerySerializer
+)
+from .compliance import compliance_queryset, competency_names
+from .engine import delete_report_file, report_download_info
+from .generators import get_report_capability
+from .matrix import get_competency_matrix, matrix_filters
+from .writers import write_excel
+from .tasks import generate_report
+from apps.common.downloads import ranged_file_response
+from apps.common.fieldsets import SparseFieldsetMixin
 from apps.users.permissions import IsSystemAdmin
+from apps.users.capabilities import has_capability, CAP_STAFF, CAP_MANAGER
 from apps.users.models import User
+from apps.competency.models import Competency, Certificate
+
 
+# 合规性报表返回的最近过期证书数量
+COMPLIANCE_EXPIRED_LIMIT = 100
 
-class ReportTemplateViewSet(ModelViewSet):
+
+class ReportPagination(PageNumberPagination):
+    """报表明细分页"""
+    
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class ReportTemplateViewSet(SparseFieldsetMixin, ModelViewSet):
     """报表模板管理视图集"""
     
     queryset = ReportTemplate.objects.all()
@@ -31,7 +63,7 @@ class ReportTemplateViewSet(ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class GeneratedReportViewSet(ModelViewSet):
+class GeneratedReportViewSet(SparseFieldsetMixin, ModelViewSet):
     """已生成报表管理视图集"""
     
     queryset = GeneratedReport.objects.select_related('template', 'generated_by')
@@ -48,35 +80,49 @@ class GeneratedReportViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有报表
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         return self.queryset.filter(generated_by=user)
     
     def perform_create(self, serializer):
-        """自动设置created_by"""
-        serializer.save(generated_by=self.request.user)
+        """检查报表类型所需能力，自动设置生成人，事务提交后异步生成报表文件"""
+        report_type = serializer.validated_data['template'].report_type
+        if not has_capability(self.request.user, get_report_capability(report_type)):
+            raise PermissionDenied('无权生成此类型的报表')
+        report = serializer.save(generated_by=self.request.user)
+        transaction.on_commit(lambda: generate_report.delay(report.id))
     
-    @action(detail=True, methods=['post'])
+    def perform_destroy(self, instance):
+        """删除报表时同时删除文件"""
+        delete_report_file(instance)
+        instance.delete()
+    
+    @action(detail=True, methods=['get', 'post'])
     def download(self, request, pk=None):
-        """下载报表"""
+        """下载报表（支持 Range 断点续传）"""
         report = self.get_object()
         
-        if not report.file_path or not report.file_path.storage.exists(report.file_path.name):
+        if report.status != GeneratedReport.Status.COMPLETED:
+            return Response({
+                'code': 400,
+                'message': '报表尚未生成完成' if report.status == GeneratedReport.Status.PENDING else '报表生成失败'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not report.file_path or not default_storage.exists(report.file_path):
             return Response({
                 'code': 404,
                 'message': '报表文件不存在'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # 返回文件下载响应
-        from django.http import FileResponse
-        return FileResponse(report.file_path.open('rb'), as_attachment=True)
+        filename, content_type = report_download_info(report)
+        return ranged_file_response(
+            request,
+            default_storage.open(report.file_path, 'rb'),
+            default_storage.size(report.file_path),
+            filename,
+            content_type
+        )
 
 
 class ReportingViewSet(ModelViewSet):
@@ -84,21 +130,11 @@ class ReportingViewSet(ModelViewSet):
     
     permission_classes = [IsAuthenticated]
     
-    # 允许查看报表的角色列表（所有经理和工程师）
-    REPORT_VIEWER_ROLES = [
-        'admin', 'hr_manager',
-        'training_manager', 'exam_manager',
-        'engineering_manager', 'dept_manager',
-        'me_engineer', 'te_engineer', 'technician',
-        'production_operator'
-    ]
+    # 允许查看报表的能力（所有经理和工程师）
+    REPORT_VIEWER_CAPABILITY = CAP_STAFF
     
-    # 允许查看所有数据的角色（经理级别）
-    FULL_ACCESS_ROLES = [
-        'admin', 'hr_manager',
-        'training_manager', 'exam_manager',
-        'engineering_manager', 'dept_manager'
-    ]
+    # 允许查看所有数据的能力（经理级别）
+    FULL_ACCESS_CAPABILITY = CAP_MANAGER
     
     @action(detail=False, methods=['get'])
     def training_statistics(self, request):
@@ -106,7 +142,7 @@ class ReportingViewSet(ModelViewSet):
         user = request.user
         
         # 检查权限
-        if user.role and user.role.code not in self.REPORT_VIEWER_ROLES:
+        if user.role and not has_capability(user, self.REPORT_VIEWER_CAPABILITY):
             return Response({
                 'code': 403,
                 'message': '无权访问此报表'
@@ -115,7 +151,7 @@ class ReportingViewSet(ModelViewSet):
         from apps.training.models import Course, TrainingRecord
         
         # 统计数据
-        if user.role and user.role.code in self.FULL_ACCESS_ROLES:
+        if has_capability(user, self.FULL_ACCESS_CAPABILITY):
             total_courses = Course.objects.filter(status='published').count()
             total_trainees = User.objects.filter(status='active').count()
             total_records = TrainingRecord.objects.count()
@@ -186,7 +222,7 @@ class ReportingViewSet(ModelViewSet):
         user = request.user
         
         # 检查权限
-        if user.role and user.role.code not in self.REPORT_VIEWER_ROLES:
+        if user.role and not has_capability(user, self.REPORT_VIEWER_CAPABILITY):
             return Response({
                 'code': 403,
                 'message': '无权访问此报表'
@@ -195,7 +231,7 @@ class ReportingViewSet(ModelViewSet):
         from apps.competency.models import CompetencyAssessment, Certificate
         
         # 统计数据
-        if user.role and user.role.code in self.FULL_ACCESS_ROLES:
+        if has_capability(user, self.FULL_ACCESS_CAPABILITY):
             total_assessments = CompetencyAssessment.objects.count()
             approved_assessments = CompetencyAssessment.objects.filter(status='approved').count()
             total_certificates = Certificate.objects.filter(status='valid').count()
@@ -253,4 +289,144 @@ class ReportingViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': data
-        })
\ No newline at end of file
+        })
+    
+    def _report_filters(self, request, parameters):
+        """人员范围过滤条件，非经理级别只能查看自己"""
+        parameters = dict(parameters)
+        if not has_capability(request.user, self.FULL_ACCESS_CAPABILITY):
+            parameters['user_id'] = request.user.id
+        return parameters
+    
+    @action(detail=False, methods=['get'])
+    def competency_matrix(self, request):
+        """能力矩阵（用户 × 能力，按用户分页）"""
+        if request.user.role and not has_capability(request.user, self.REPORT_VIEWER_CAPABILITY):
+            return Response({
+                'code': 403,
+                'message': '无权访问此报表'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = CompetencyMatrixQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'code': 400,
+                'message': '参数错误',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        matrix = get_competency_matrix(matrix_filters(self._report_filters(request, serializer.validated_data)))
+        paginator = ReportPagination()
+        page = paginator.paginate_queryset(range(len(matrix)), request, view=self)
+        rows = matrix.rows(page[0], page[-1] + 1) if page else []
+        
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': {
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'competencies': matrix.competencies,
+                'levels': dict(Competency.Level.choices),
+                'results': rows
+            }
+        })
+    
+    @action(detail=False, methods=['get'], url_path='competency_matrix/export')
+    def competency_matrix_export(self, request):
+        """导出能力矩阵Excel"""
+        if request.user.role and not has_capability(request.user, self.REPORT_VIEWER_CAPABILITY):
+            return Response({
+                'code': 403,
+                'message': '无权访问此报表'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = CompetencyMatrixQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'code': 400,
+                'message': '参数错误',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        matrix = get_competency_matrix(matrix_filters(self._report_filters(request, serializer.validated_data)))
+        output = tempfile.TemporaryFile()
+        write_excel(output, '能力矩阵', matrix.columns(), matrix.table_rows(serializer.validated_data['value']))
+        output.seek(0)
+        
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'competency_matrix_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    
+    @action(detail=False, methods=['get'])
+    def compliance_report(self, request):
+        """合规性报表（岗位要求能力 vs 持有有效证书）"""
+        if request.user.role and not has_capability(request.user, self.REPORT_VIEWER_CAPABILITY):
+            return Response({
+                'code': 403,
+                'message': '无权访问此报表'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = ReportFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'code': 400,
+                'message': '参数错误',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        filters = self._report_filters(request, serializer.validated_data)
+        queryset = compliance_queryset(filters)
+        summary = queryset.aggregate(
+            total=Count('id'),
+            compliant=Count('id', filter=Q(is_compliant=True))
+        )
+        
+        paginator = ReportPagination()
+        statuses = paginator.paginate_queryset(
+            queryset.filter(is_compliant=False).order_by('user__employee_id', 'user_id').values(
+                'user_id', 'user__employee_id', 'user__real_name', 'user__department__name',
+                'position__name', 'required_count', 'held_count', 'missing_competencies'
+            ),
+            request, view=self
+        )
+        names = competency_names(statuses)
+        
+        # 范围内人员最近过期的证书
+        expired_certificates = Certificate.objects.filter(
+            status=Certificate.Status.EXPIRED,
+            user_id__in=queryset.values('user_id')
+        ).select_related('user', 'competency').order_by('-expiry_date')[:COMPLIANCE_EXPIRED_LIMIT]
+        
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': {
+                'total_employees': summary['total'],
+                'compliant_employees': summary['compliant'],
+                'compliance_rate': round(summary['compliant'] / summary['total'] * 100, 2) if summary['total'] > 0 else 0,
+                'non_compliant_count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'non_compliant_users': [{
+                    'user_id': item['user_id'],
+                    'employee_id': item['user__employee_id'],
+                    'real_name': item['user__real_name'],
+                    'department': item['user__department__name'],
+                    'position': item['position__name'],
+                    'required_count': item['required_count'],
+                    'held_count': item['held_count'],
+                    'missing_competencies': [names[i] for i in item['missing_competencies'] if i in names]
+                } for item in statuses],
+                'expired_certificates': [{
+                    'certificate_no': certificate.certificate_no,
+                    'user_name': certificate.user.real_name,
+                    'competency_name': certificate.competency.name if certificate.competency else '',
+                    'expiry_date': certificate.expiry_date
+                } for certificate in expired_certificates]
+            }
+        })
@@ -0,0 +1,146 @@
+"""Report file writers"""
+import csv
+import io
+from itertools import islice
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+
+from .models import GeneratedReport
+
+# Excel 单个工作表的最大数据行数（不含表头）
+EXCEL_MAX_ROWS = 1048575
+
+PDF_FONT_NAME = 'STSong-Light'
+pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT_NAME))
+PDF_PAGE_SIZE = landscape(A4)
+PDF_MARGIN = 30
+PDF_FONT_SIZE = 8
+PDF_ROW_HEIGHT = 14
+
+
+def write_csv(fileobj, title, columns, rows):
+    """写入CSV（带BOM，Excel 打开不乱码）"""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    text.flush()
+    text.detach()
+
+
+def write_excel(fileobj, title, columns, rows):
+    """写入Excel（只写模式，逐行写出，超出行数上限时自动分表）"""
+    workbook = Workbook(write_only=True)
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True, size=11)
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    rows = iter(rows)
+    sheet_number = 1
+    while True:
+        chunk = islice(rows, EXCEL_MAX_ROWS)
+        first = next(chunk, None)
+        if first is None and sheet_number > 1:
+            break
+
+        sheet = workbook.create_sheet(title='数据' if sheet_number == 1 else f'数据{sheet_number}')
+        header = []
+        for column in columns:
+            cell = WriteOnlyCell(sheet, value=column)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header.append(cell)
+        sheet.append(header)
+
+        if first is None:
+            break
+        sheet.append(first)
+        for row in chunk:
+            sheet.append(row)
+        sheet_number += 1
+
+    workbook.save(fileobj)
+
+
+def _fit_text(text, width):
+    """截断超出列宽的文本"""
+    if pdfmetrics.stringWidth(text, PDF_FONT_NAME, PDF_FONT_SIZE) <= width:
+        return text
+    while text and pdfmetrics.stringWidth(text + '…', PDF_FONT_NAME, PDF_FONT_SIZE) > width:
+        text = text[:-1]
+    return text + '…'
+
+
+def write_pdf(fileobj, title, columns, rows):
+    """写入PDF（逐页绘制表格，每页重复表头）"""
+    width, height = PDF_PAGE_SIZE
+    column_width = (width - PDF_MARGIN * 2) / len(columns)
+    rows_per_page = int((height - PDF_MARGIN * 2 - 30) // PDF_ROW_HEIGHT) - 1
+
+    pdf = canvas.Canvas(fileobj, pagesize=PDF_PAGE_SIZE)
+    pdf.setTitle(title)
+
+    def draw_row(values, y, header=False):
+        if header:
+            pdf.setFillColor(colors.HexColor('#4472C4'))
+            pdf.rect(PDF_MARGIN, y - 4, width - PDF_MARGIN * 2, PDF_ROW_HEIGHT, stroke=0, fill=1)
+            pdf.setFillColor(colors.white)
+        else:
+            pdf.setFillColor(colors.black)
+        pdf.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+        for index, value in enumerate(values):
+            text = '' if value is None else str(value)
+            pdf.drawString(PDF_MARGIN + index * column_width + 2, y, _fit_text(text, column_width - 4))
+
+    rows = iter(rows)
+    page = 1
+    while True:
+        page_rows = list(islice(rows, rows_per_page))
+        if not page_rows and page > 1:
+            break
+
+        pdf.setFillColor(colors.black)
+        pdf.setFont(PDF_FONT_NAME, 14)
+        pdf.drawString(PDF_MARGIN, height - PDF_MARGIN - 10, title)
+        pdf.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+        pdf.drawRightString(width - PDF_MARGIN, PDF_MARGIN - 15, f'第 {page} 页')
+
+        y = height - PDF_MARGIN - 40
+        draw_row(columns, y, header=True)
+        for row in page_rows:
+            y -= PDF_ROW_HEIGHT
+            draw_row(row, y)
+        pdf.showPage()
+
+        if len(page_rows) < rows_per_page:
+            break
+        page += 1
+
+    pdf.save()
+
+
+# 文件格式 -> (写入函数, 扩展名, Content-Type)
+REPORT_WRITERS = {
+    GeneratedReport.Format.CSV: (write_csv, 'csv', 'text/csv'),
+    GeneratedReport.Format.EXCEL: (
+        write_excel, 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    ),
+    GeneratedReport.Format.PDF: (write_pdf, 'pdf', 'application/pdf'),
+}
+
+
+def get_report_writer(file_format):
+    """获取文件格式的写入函数"""
+    try:
+        return REPORT_WRITERS[file_format]
+    except KeyError:
+        raise ValueError(f'不支持的文件格式: {file_format}')
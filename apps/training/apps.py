@@ -5,4 +5,7 @@ class TrainingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.training'
     label = 'training'
-    verbose_name = '培训管理'
\ No newline at end of file
+    verbose_name = '培训管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
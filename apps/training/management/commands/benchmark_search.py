@@ -0,0 +1,90 @@
+"""Benchmark course search: LIKE vs full-text backend"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.common.search import FullTextSearchFilter, get_search_backend
+from apps.training.models import Course
+from apps.training.views import CourseViewSet
+from apps.users.models import User
+
+WORDS = [
+    '安全', '焊接', '质量', '设备', '维护', '工艺', '检验', '电气', '消防', '环保',
+    '管理', '操作', '规范', '流程', '培训', '生产', '仓储', '物流', '化学', '机械',
+    'safety', 'welding', 'quality', 'lean', 'maintenance', 'electrical', 'python', 'excel',
+]
+RARE_WORDS = ['液压伺服', 'kubernetes', '六西格玛']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark course search with LIKE and the configured full-text backend (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='生成的课程数量')
+        parser.add_argument('--repeat', type=int, default=20, help='每个检索词的执行次数')
+        parser.add_argument('--terms', nargs='*', default=None, help='检索词（默认为常见词、稀有词和课程编号）')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['rows'])
+            terms = options['terms'] or ['焊接', '液压伺服', 'kubernetes', 'BM000123', '安全 规范']
+            backend = get_search_backend()
+            self.stdout.write(f"检索后端: {type(backend).__name__}，课程数: {Course.objects.count()}")
+
+            # 首次检索包含建立索引的时间（倒排索引后端）
+            started = time.perf_counter()
+            self.run(FullTextSearchFilter(), terms[0])
+            self.stdout.write(f'首次检索: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+            self.stdout.write(f"{'检索词':<16}{'命中':>8}{'LIKE(ms)':>12}{'全文(ms)':>12}{'加速':>8}")
+            for term in terms:
+                like_count, like_ms = self.measure(SearchFilter(), term, options['repeat'])
+                fulltext_count, fulltext_ms = self.measure(FullTextSearchFilter(), term, options['repeat'])
+                if like_count != fulltext_count:
+                    self.stdout.write(self.style.WARNING(f'{term}: 命中数不一致 {like_count} != {fulltext_count}'))
+                self.stdout.write(
+                    f'{term:<16}{fulltext_count:>8}{like_ms:>12.2f}{fulltext_ms:>12.2f}'
+                    f'{like_ms / fulltext_ms if fulltext_ms else 0:>7.1f}x'
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        """生成测试课程"""
+        user = User.objects.create_user(username='benchmark_search', password=None, employee_id='BENCH-SEARCH')
+        rng = random.Random(0)
+        courses = []
+        for i in range(rows):
+            words = rng.choices(WORDS, k=12)
+            if i % 1000 == 0:
+                words.append(rng.choice(RARE_WORDS))
+            courses.append(Course(
+                code=f'BM{i:06d}',
+                title=''.join(words[:3]),
+                description=' '.join(words[3:]),
+                instructor=f'讲师{i % 97}',
+                tags=','.join(words[:2]),
+                created_by=user
+            ))
+        Course.objects.bulk_create(courses, batch_size=2000)
+
+    def run(self, search_filter, term):
+        """执行一次检索：总数 + 第一页"""
+        view = CourseViewSet()
+        request = Request(APIRequestFactory().get('/', {'search': term}))
+        queryset = search_filter.filter_queryset(request, Course.objects.all(), view)
+        count = queryset.count()
+        list(queryset[:20])
+        return count
+
+    def measure(self, search_filter, term, repeat):
+        """平均耗时（毫秒）"""
+        count = self.run(search_filter, term)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            self.run(search_filter, term)
+        return count, (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainingrecord',
+            index=models.Index(fields=['created_at', 'id'], name='training_re_created_4ac71a_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# 全文检索索引（仅 MySQL，ngram 解析器支持中文，不使用停用词）
+
+from django.db import migrations
+
+INDEX_NAME = 'courses_search_ft'
+TABLE = 'courses'
+COLUMNS = ['title', 'code', 'description', 'instructor', 'tags']
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    # 停用词在建索引时生效：ngram 解析器会丢弃包含停用词（a、i、be 等）的词元，
+    # 英文和编号类检索词会漏检，建索引时关闭停用词
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT @@SESSION.innodb_ft_enable_stopword')
+        enabled = cursor.fetchone()[0]
+    schema_editor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+    try:
+        schema_editor.execute('CREATE FULLTEXT INDEX {} ON {} ({}) WITH PARSER ngram'.format(
+            quote(INDEX_NAME), quote(TABLE), ', '.join(quote(column) for column in COLUMNS)
+        ))
+    finally:
+        schema_editor.execute('SET SESSION innodb_ft_enable_stopword = {}'.format('ON' if enabled else 'OFF'))
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('DROP INDEX {} ON {}'.format(quote(INDEX_NAME), quote(TABLE)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0003_trainingrecord_training_re_created_4ac71a_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0004_course_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='标签名称')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '课程标签',
+                'verbose_name_plural': '课程标签',
+                'db_table': 'course_tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseTagging',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='training.course', verbose_name='课程')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='training.coursetag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '课程标签关联',
+                'verbose_name_plural': '课程标签关联',
+                'db_table': 'course_taggings',
+            },
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='tag_items',
+            field=models.ManyToManyField(blank=True, related_name='courses', through='training.CourseTagging', to='training.coursetag', verbose_name='标签项'),
+        ),
+        migrations.AddIndex(
+            model_name='coursetagging',
+            index=models.Index(fields=['tag', 'course'], name='course_tagg_tag_id_654722_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursetagging',
+            unique_together={('course', 'tag')},
+        ),
+    ]
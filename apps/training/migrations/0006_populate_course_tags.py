@@ -0,0 +1,65 @@
+# 拆分课程标签文本，建立标签和关联
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+TAG_SEPARATOR_RE = re.compile(r'[,;]')
+TAG_MAX_LENGTH = 50
+BATCH_SIZE = 1000
+
+
+def split_tags(value):
+    """标签文本 -> 规范化（NFKC、casefold）、去重后的标签列表"""
+    names = []
+    for name in TAG_SEPARATOR_RE.split(unicodedata.normalize('NFKC', value or '')):
+        name = ' '.join(name.casefold().split())[:TAG_MAX_LENGTH].strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def populate_course_tags(apps, schema_editor):
+    """拆分已有课程的标签文本，建立标签和关联"""
+    Course = apps.get_model('training', 'Course')
+    CourseTag = apps.get_model('training', 'CourseTag')
+    CourseTagging = apps.get_model('training', 'CourseTagging')
+
+    course_tags = [
+        (course_id, split_tags(tags))
+        for course_id, tags in Course.objects.exclude(tags='').values_list('id', 'tags').iterator()
+    ]
+    names = {name for _, tag_names in course_tags for name in tag_names}
+    CourseTag.objects.bulk_create(
+        [CourseTag(name=name) for name in sorted(names)], batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    # 以数据库返回的行为准：排序规则认为相同的名称插入时被忽略，按名称查询匹配已有标签
+    tag_ids = dict(CourseTag.objects.values_list('name', 'id'))
+    for name in names - set(tag_ids):
+        tag_ids[name] = CourseTag.objects.filter(name=name).values_list('id', flat=True).first()
+    CourseTagging.objects.bulk_create(
+        [
+            CourseTagging(course_id=course_id, tag_id=tag_ids[name])
+            for course_id, tag_names in course_tags for name in tag_names
+            if tag_ids[name] is not None
+        ],
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def clear_course_tags(apps, schema_editor):
+    """回滚：删除标签关联和标签（标签文本保留在 Course.tags）"""
+    apps.get_model('training', 'CourseTagging').objects.all().delete()
+    apps.get_model('training', 'CourseTag').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0005_course_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_course_tags, clear_course_tags),
+    ]
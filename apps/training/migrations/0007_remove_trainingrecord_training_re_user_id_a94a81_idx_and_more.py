@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0006_populate_course_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainingrecord',
+            index=models.Index(fields=['user', 'status'], name='training_re_user_id_55a105_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='trainingrecord',
+            name='training_re_user_id_a94a81_idx',
+        ),
+    ]
@@ -80,7 +80,15 @@ class Course(models.Model):
         verbose_name=_('前置课程'),
         related_name='prerequisite_for'
     )
+    # 逗号分隔的标签文本（接口读写），保存时同步到 tag_items
     tags = models.CharField(_('标签'), max_length=255, blank=True)
+    tag_items = models.ManyToManyField(
+        'CourseTag',
+        through='CourseTagging',
+        blank=True,
+        verbose_name=_('标签项'),
+        related_name='courses'
+    )
     status = models.CharField(
         _('状态'),
         max_length=20,
@@ -128,6 +136,38 @@ class Course(models.Model):
         self.save()
 
 
+class CourseTag(models.Model):
+    """课程标签表"""
+    
+    name = models.CharField(_('标签名称'), max_length=50, unique=True)
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('课程标签')
+        verbose_name_plural = _('课程标签')
+        db_table = 'course_tags'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class CourseTagging(models.Model):
+    """课程-标签关联表"""
+    
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name=_('课程'))
+    tag = models.ForeignKey(CourseTag, on_delete=models.CASCADE, verbose_name=_('标签'))
+    
+    class Meta:
+        verbose_name = _('课程标签关联')
+        verbose_name_plural = _('课程标签关联')
+        db_table = 'course_taggings'
+        unique_together = [['course', 'tag']]
+        indexes = [
+            models.Index(fields=['tag', 'course']),
+        ]
+
+
 class TrainingPlan(models.Model):
     """培训计划表"""
     
@@ -294,10 +334,13 @@ class TrainingRecord(models.Model):
         db_table = 'training_records'
         unique_together = ['user', 'course', 'plan']
         indexes = [
-            models.Index(fields=['user']),
             models.Index(fields=['course']),
             models.Index(fields=['plan']),
             models.Index(fields=['status']),
+            # 个人学习统计（同时覆盖按用户的查询）
+            models.Index(fields=['user', 'status']),
+            # 游标分页
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
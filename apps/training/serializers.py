@@ -16,9 +16,13 @@ class CourseCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def get_children(self, obj):
-        """获取子分类"""
-        children = obj.children.all()
-        return CourseCategorySerializer(children, many=True).data
+        """获取子分类（优先使用视图预先构建的子分类映射，避免逐层查询）"""
+        children_map = self.context.get('children_map')
+        if children_map is not None:
+            children = children_map.get(obj.id, [])
+        else:
+            children = obj.children.all()
+        return CourseCategorySerializer(children, many=True, context=self.context).data
 
 
 class CourseSerializer(serializers.ModelSerializer):
@@ -127,6 +131,20 @@ class TrainingPlanSerializer(serializers.ModelSerializer):
         return instance
 
 
+class TrainingPlanListSerializer(TrainingPlanSerializer):
+    """培训计划列表序列化器（不含课程和人员明细）"""
+    
+    class Meta(TrainingPlanSerializer.Meta):
+        fields = [
+            'id', 'code', 'title', 'plan_type',
+            'target_department', 'target_department_name',
+            'target_position', 'target_position_name',
+            'start_date', 'end_date', 'total_hours', 'total_courses',
+            'status', 'approved_by_name', 'approved_at',
+            'created_by', 'created_by_name', 'created_at'
+        ]
+
+
 class TrainingRecordSerializer(serializers.ModelSerializer):
     """培训记录序列化器"""
     
@@ -147,6 +165,18 @@ class TrainingRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class TrainingRecordListSerializer(TrainingRecordSerializer):
+    """培训记录列表序列化器（不含反馈和评价）"""
+    
+    class Meta(TrainingRecordSerializer.Meta):
+        fields = [
+            'id', 'user', 'user_name', 'plan', 'plan_title',
+            'course', 'course_title', 'course_code', 'status',
+            'progress', 'study_duration', 'complete_date', 'score',
+            'certificate_no', 'created_at'
+        ]
+
+
 class TrainingRecordCreateSerializer(serializers.ModelSerializer):
     """创建培训记录序列化器"""
     
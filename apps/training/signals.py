@@ -0,0 +1,26 @@
+"""Training signals"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CourseCategory, Course
+from .utils import invalidate_category_tree, invalidate_tag_facets, sync_course_tags
+
+
+@receiver([post_save, post_delete], sender=CourseCategory)
+def course_category_changed(sender, **kwargs):
+    """分类变更时清除分类树缓存"""
+    invalidate_category_tree()
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, **kwargs):
+    """课程变更时清除分类树和标签分面缓存（课程数统计）"""
+    invalidate_category_tree()
+    invalidate_tag_facets()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, update_fields=None, **kwargs):
+    """课程保存时按标签文本同步标签关联"""
+    if update_fields is None or 'tags' in update_fields:
+        sync_course_tags(instance)
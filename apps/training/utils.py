@@ -0,0 +1,212 @@
+"""Training utilities"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+# 分类树缓存（分类或课程变更时失效）
+CATEGORY_TREE_CACHE_KEY = 'training:category_tree:{with_counts}'
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 10
+
+# 标签分面缓存（课程变更时失效）
+TAG_FACETS_CACHE_KEY = 'training:tag_facets'
+TAG_FACETS_CACHE_TIMEOUT = 60 * 10
+
+# 标签分隔符：逗号、分号（全角在 NFKC 规范化后也是半角）
+TAG_SEPARATOR_RE = re.compile(r'[,;]')
+TAG_MAX_LENGTH = 50
+
+
+def build_category_children_map(queryset=None):
+    """一次查询构建 parent_id -> [子分类] 映射"""
+    from .models import CourseCategory
+
+    if queryset is None:
+        queryset = CourseCategory.objects.all()
+
+    children_map = defaultdict(list)
+    for category in queryset.order_by('sort_order', 'name'):
+        children_map[category.parent_id].append(category)
+    return children_map
+
+
+def get_published_course_counts():
+    """单次 GROUP BY 统计各分类已发布课程数"""
+    from .models import Course
+
+    rows = (
+        Course.objects.filter(status=Course.Status.PUBLISHED, category__isnull=False)
+        .values('category')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['category']: row['count'] for row in rows}
+
+
+def build_category_tree(include_course_count=False):
+    """
+    构建课程分类树
+
+    一次查询加载全部分类，在内存中按 sort_order/name 组装森林；
+    include_course_count 为真时附加每个分类的已发布课程数。
+    """
+    from .models import CourseCategory
+
+    rows = CourseCategory.objects.order_by('sort_order', 'name').values(
+        'id', 'name', 'code', 'parent_id', 'description', 'sort_order'
+    )
+    course_counts = get_published_course_counts() if include_course_count else None
+
+    nodes = {}
+    ordered = []
+    for row in rows:
+        node = {
+            'id': row['id'],
+            'name': row['name'],
+            'code': row['code'],
+            'parent': row['parent_id'],
+            'description': row['description'],
+            'sort_order': row['sort_order'],
+            'children': [],
+        }
+        if course_counts is not None:
+            node['course_count'] = course_counts.get(row['id'], 0)
+        nodes[row['id']] = node
+        ordered.append(node)
+
+    roots = []
+    for node in ordered:
+        parent = nodes.get(node['parent'])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
+
+def get_category_tree(include_course_count=False):
+    """获取分类树（带缓存）"""
+    key = CATEGORY_TREE_CACHE_KEY.format(with_counts=int(bool(include_course_count)))
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree(include_course_count=include_course_count)
+        cache.set(key, tree, CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    """清除分类树缓存"""
+    cache.delete_many([
+        CATEGORY_TREE_CACHE_KEY.format(with_counts=0),
+        CATEGORY_TREE_CACHE_KEY.format(with_counts=1),
+    ])
+
+
+def normalize_tag(name):
+    """
+    标签规范化：NFKC（全角转半角）、合并空白、casefold
+
+    MySQL utf8mb4 默认排序规则不区分大小写和全半角，规范化后再比较和保存，
+    避免唯一约束把不同写法当成同一标签
+    """
+    name = ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+    return name[:TAG_MAX_LENGTH].strip()
+
+
+def parse_tags(value):
+    """标签文本 -> 规范化、去重后的标签列表（保持顺序）"""
+    names = []
+    for name in TAG_SEPARATOR_RE.split(unicodedata.normalize('NFKC', value or '')):
+        name = normalize_tag(name)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tag_ids(names):
+    """
+    标签名称 -> 标签ID（不存在时创建）
+
+    以数据库返回的行为准：排序规则认为相同的名称（如不区分重音）插入时被忽略，
+    再按名称逐个查询由数据库匹配到已有标签
+    """
+    from .models import CourseTag
+
+    if not names:
+        return {}
+    existing = dict(CourseTag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in existing]
+    if missing:
+        CourseTag.objects.bulk_create([CourseTag(name=name) for name in missing], ignore_conflicts=True)
+        existing.update(CourseTag.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    tag_ids = {}
+    for name in names:
+        tag_id = existing.get(name)
+        if tag_id is None:
+            tag_id = CourseTag.objects.filter(name=name).values_list('id', flat=True).first()
+        if tag_id is not None:
+            tag_ids[name] = tag_id
+    return tag_ids
+
+
+def sync_course_tags(course):
+    """按课程的标签文本同步标签关联，没有变化时不写库"""
+    from .models import CourseTagging
+
+    names = parse_tags(course.tags)
+    current = dict(CourseTagging.objects.filter(course=course).values_list('tag__name', 'tag_id'))
+    if set(names) == set(current):
+        return False
+
+    tag_ids = set(get_or_create_tag_ids(names).values())
+    current_ids = set(current.values())
+    if tag_ids == current_ids:
+        return False
+
+    removed = current_ids - tag_ids
+    if removed:
+        CourseTagging.objects.filter(course=course, tag_id__in=removed).delete()
+    added = tag_ids - current_ids
+    if added:
+        CourseTagging.objects.bulk_create(
+            [CourseTagging(course=course, tag_id=tag_id) for tag_id in sorted(added)],
+            ignore_conflicts=True
+        )
+    return True
+
+
+def tag_facet_rows():
+    """单次 GROUP BY 统计各标签已发布课程数（按课程数、名称排序）"""
+    from .models import Course, CourseTagging
+
+    return (
+        CourseTagging.objects.filter(course__status=Course.Status.PUBLISHED)
+        .values('tag_id', 'tag__name')
+        .annotate(course_count=Count('course_id'))
+        .order_by('-course_count', 'tag__name')
+    )
+
+
+def build_tag_facets():
+    """标签分面数据"""
+    return [
+        {'id': row['tag_id'], 'name': row['tag__name'], 'course_count': row['course_count']}
+        for row in tag_facet_rows()
+    ]
+
+
+def get_tag_facets():
+    """获取标签分面（带缓存）"""
+    facets = cache.get(TAG_FACETS_CACHE_KEY)
+    if facets is None:
+        facets = build_tag_facets()
+        cache.set(TAG_FACETS_CACHE_KEY, facets, TAG_FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_tag_facets():
+    """清除标签分面缓存"""
+    cache.delete(TAG_FACETS_CACHE_KEY)
@@ -25,15 +25,20 @@ from django.db.models import Q, Count, Avg
 from .models import CourseCategory, Course, TrainingPlan, TrainingRecord
 from .serializers import (
     CourseCategorySerializer, CourseSerializer, CourseDetailSerializer,
-    TrainingPlanSerializer, TrainingRecordSerializer,
-    TrainingRecordCreateSerializer, CourseEvaluationSerializer,
+    TrainingPlanSerializer, TrainingPlanListSerializer, TrainingRecordSerializer,
+    TrainingRecordListSerializer, TrainingRecordCreateSerializer, CourseEvaluationSerializer,
     TrainingStatisticsSerializer
 )
+from .utils import build_category_children_map, get_category_tree, get_tag_facets, parse_tags
 from apps.users.permissions import IsManager, IsManagerOrReadOnly, IsTrainingManager, IsDeptManager
+from apps.users.capabilities import has_capability, CAP_STAFF
+from apps.common.pagination import CursorOptInPagination
+from apps.common.fieldsets import SparseFieldsetMixin
+from apps.common.search import FullTextSearchFilter
 from apps.users.models import User
 
 
-class CourseCategoryViewSet(ModelViewSet):
+class CourseCategoryViewSet(SparseFieldsetMixin, ModelViewSet):
     """课程分类管理视图集"""
     
     queryset = CourseCategory.objects.all()
@@ -44,6 +49,13 @@ class CourseCategoryViewSet(ModelViewSet):
     search_fields = ['name', 'code', 'description']
     ordering = ['sort_order', 'name']
     
+    def get_serializer_context(self):
+        """列表接口一次性加载子分类映射，避免 get_children 逐层查询"""
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['children_map'] = build_category_children_map()
+        return context
+    
     def list(self, request, *args, **kwargs):
         """获取分类列表（统一响应格式）"""
         queryset = self.filter_queryset(self.get_queryset())
@@ -58,7 +70,7 @@ class CourseCategoryViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -116,18 +128,23 @@ class CourseCategoryViewSet(ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """获取分类树"""
-        top_categories = self.queryset.filter(parent=None)
-        serializer = self.get_serializer(top_categories, many=True)
+        """
+        获取分类树
+        
+        一次查询构建整棵树并缓存；?include_course_count=true 时附带各分类已发布课程数
+        """
+        include_course_count = request.query_params.get(
+            'include_course_count', ''
+        ).lower() in ['1', 'true', 'yes']
         
         return Response({
             'code': 200,
             'message': 'Success',
-            'data': serializer.data
+            'data': get_category_tree(include_course_count=include_course_count)
         })
 
 
-class CourseViewSet(ModelViewSet):
+class CourseViewSet(SparseFieldsetMixin, ModelViewSet):
     """课程管理视图集"""
     
     # 修复：移除无效的 target_departments prefetch
@@ -135,12 +152,19 @@ class CourseViewSet(ModelViewSet):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category', 'course_type', 'status', 'created_by']
     search_fields = ['title', 'code', 'description', 'instructor', 'tags']
+    # 与 courses 表的全文索引一致
+    fulltext_fields = ['title', 'code', 'description', 'instructor', 'tags']
     ordering_fields = ['created_at', 'updated_at', 'title', 'view_count', 'enrollment_count']
     ordering = ['-created_at']
     
+    field_relations = {
+        'category_name': 'category', 'created_by_name': 'created_by',
+        'prerequisites': 'prerequisites', 'prerequisites_detail': 'prerequisites',
+    }
+    
     def get_permissions(self):
         """动态权限配置"""
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'publish']:
@@ -158,18 +182,19 @@ class CourseViewSet(ModelViewSet):
         user = self.request.user
         
         # 管理员、经理、工程师可以查看所有课程
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         # 其他用户只能查看已发布的课程
         return self.queryset.filter(status='published')
     
+    def filter_queryset(self, queryset):
+        """?tag=a,b 按标签过滤（需包含全部标签），走标签关联表索引"""
+        queryset = super().filter_queryset(queryset)
+        for name in parse_tags(self.request.query_params.get('tag')):
+            queryset = queryset.filter(tag_items__name=name)
+        return queryset
+    
     def list(self, request, *args, **kwargs):
         """获取课程列表（统一响应格式）"""
         queryset = self.filter_queryset(self.get_queryset())
@@ -184,7 +209,7 @@ class CourseViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -256,6 +281,15 @@ class CourseViewSet(ModelViewSet):
             'data': CourseSerializer(course).data
         })
     
+    @action(detail=False, methods=['get'], url_path='tag-facets')
+    def tag_facets(self, request):
+        """标签分面：各标签的已发布课程数（单次 GROUP BY，课程变更时缓存失效）"""
+        return Response({
+            'code': 200,
+            'message': 'Success',
+            'data': get_tag_facets()
+        })
+    
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def enroll(self, request, pk=None):
         """报名课程"""
@@ -294,7 +328,7 @@ class CourseViewSet(ModelViewSet):
         })
 
 
-class TrainingPlanViewSet(ModelViewSet):
+class TrainingPlanViewSet(SparseFieldsetMixin, ModelViewSet):
     """培训计划管理视图集"""
     
     queryset = TrainingPlan.objects.select_related(
@@ -308,6 +342,19 @@ class TrainingPlanViewSet(ModelViewSet):
     search_fields = ['title', 'code', 'description']
     ordering = ['-created_at']
     
+    deferrable_fields = ['description', 'approval_comment']
+    field_relations = {
+        'target_department_name': 'target_department', 'target_position_name': 'target_position',
+        'created_by_name': 'created_by', 'approved_by_name': 'approved_by',
+        'courses': 'courses', 'target_users': 'target_users',
+    }
+    
+    def get_serializer_class(self):
+        """根据操作选择序列化器"""
+        if self.use_list_serializer():
+            return TrainingPlanListSerializer
+        return self.serializer_class
+    
     def get_permissions(self):
         """动态权限配置"""
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -321,13 +368,7 @@ class TrainingPlanViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有计划
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         # 普通用户只能查看包含自己的计划
@@ -349,7 +390,7 @@ class TrainingPlanViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -441,7 +482,7 @@ class TrainingPlanViewSet(ModelViewSet):
         })
 
 
-class TrainingRecordViewSet(ModelViewSet):
+class TrainingRecordViewSet(SparseFieldsetMixin, ModelViewSet):
     """培训记录管理视图集"""
     
     queryset = TrainingRecord.objects.select_related(
@@ -454,11 +495,21 @@ class TrainingRecordViewSet(ModelViewSet):
     filterset_fields = ['status', 'plan', 'course']
     search_fields = ['user__real_name', 'user__employee_id', 'course__title']
     ordering = ['-created_at']
+    # 支持 pagination=cursor 游标分页
+    pagination_class = CursorOptInPagination
+    
+    deferrable_fields = ['feedback', 'evaluation']
+    field_relations = {
+        'user_name': 'user', 'plan_title': 'plan',
+        'course_title': 'course', 'course_code': 'course',
+    }
     
     def get_serializer_class(self):
         """根据操作选择序列化器"""
         if self.action == 'create':
             return TrainingRecordCreateSerializer
+        if self.use_list_serializer():
+            return TrainingRecordListSerializer
         return self.serializer_class
     
     def get_queryset(self):
@@ -466,13 +517,7 @@ class TrainingRecordViewSet(ModelViewSet):
         user = self.request.user
         
         # 所有经理和工程师可以查看所有记录
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             return self.queryset
         
         # 普通用户只能查看自己的记录
@@ -492,7 +537,7 @@ class TrainingRecordViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -570,13 +615,7 @@ class TrainingRecordViewSet(ModelViewSet):
         user = request.user
         
         # 所有经理和工程师可以查看全部统计
-        if user.role and user.role.code in [
-            'admin', 'hr_manager',
-            'training_manager', 'exam_manager',
-            'engineering_manager', 'dept_manager',
-            'me_engineer', 'te_engineer', 'technician',
-            'production_operator'
-        ]:
+        if has_capability(user, CAP_STAFF):
             total_courses = Course.objects.filter(status='published').count()
             total_trainees = User.objects.filter(status='active').count()
             total_records = TrainingRecord.objects.count()
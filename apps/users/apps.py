@@ -5,4 +5,7 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     label = 'users'
-    verbose_name = '用户管理'
\ No newline at end of file
+    verbose_name = '用户管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
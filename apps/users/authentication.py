@@ -0,0 +1,72 @@
+"""Custom authentication classes"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .capabilities import role_version_to_datetime
+from .models import TokenUser
+from .tokens import (
+    ROLE_ID_CLAIM, ROLE_CODE_CLAIM, DEPARTMENT_ID_CLAIM, PERM_VERSION_CLAIM,
+    claims_are_current
+)
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """
+    JWT认证
+
+    一次查询同时加载用户、角色和部门，后续权限判断和查询集过滤不再触发额外查询
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = self.user_model.objects.select_related('role', 'department').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    无状态JWT认证
+
+    直接根据访问令牌中的角色、部门和权限版本声明构建 TokenUser，不查询数据库；
+    令牌缺少声明或声明已过期（角色/用户已变更）时回退到完整的数据库加载
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if api_settings.CHECK_REVOKE_TOKEN or not claims_are_current(validated_token):
+            return super().get_user(validated_token)
+
+        role_id = validated_token.get(ROLE_ID_CLAIM)
+        return TokenUser.from_claims(
+            user_id=validated_token[api_settings.USER_ID_CLAIM],
+            role_id=role_id,
+            role_code=validated_token.get(ROLE_CODE_CLAIM),
+            role_updated_at=role_version_to_datetime(validated_token[PERM_VERSION_CLAIM]) if role_id else None,
+            department_id=validated_token.get(DEPARTMENT_ID_CLAIM),
+        )
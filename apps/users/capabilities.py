@@ -0,0 +1,117 @@
+"""Role capability resolution"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+
+# 角色代码
+ADMIN_ROLES = ['admin']
+ADMIN_OR_HR_ROLES = ['admin', 'hr_manager']
+MANAGER_ROLES = [
+    'admin', 'hr_manager',
+    'training_manager', 'exam_manager',
+    'engineering_manager', 'dept_manager'
+]
+ENGINEER_ROLES = [
+    'me_engineer', 'te_engineer', 'technician',
+    'production_operator'  # 生产操作员也视为工程师级别
+]
+
+# 能力分组（由角色代码推导）
+CAP_ADMIN = 'admin'
+CAP_ADMIN_OR_HR = 'admin_or_hr'
+CAP_MANAGER = 'manager'
+CAP_ENGINEER = 'engineer'
+CAP_STAFF = 'staff'            # 所有经理和工程师
+CAP_INSTRUCTOR = 'instructor'  # 所有经理、工程师和讲师
+
+CAPABILITY_ROLES = {
+    CAP_ADMIN: set(ADMIN_ROLES),
+    CAP_ADMIN_OR_HR: set(ADMIN_OR_HR_ROLES),
+    CAP_MANAGER: set(MANAGER_ROLES),
+    CAP_ENGINEER: set(ENGINEER_ROLES),
+    CAP_STAFF: set(MANAGER_ROLES) | set(ENGINEER_ROLES),
+    CAP_INSTRUCTOR: set(MANAGER_ROLES) | set(ENGINEER_ROLES) | {'instructor'},
+}
+
+# 角色权限配置中的权限标识（如 'user:*'、'report:read'）加前缀后放入能力集，
+# 与上面由角色代码推导的能力分组互不重名
+PERMISSION_PREFIX = 'perm:'
+
+# 能力集缓存：按角色ID + 角色更新时间区分版本，角色修改后自动失效
+ROLE_CAPABILITY_CACHE_KEY = 'users:role_capabilities:v2:{role_id}:{version}'
+ROLE_CAPABILITY_CACHE_TIMEOUT = 60 * 60 * 24
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def permission_capability(permission):
+    """权限标识 -> 能力（带前缀，不会与能力分组相同）"""
+    return f'{PERMISSION_PREFIX}{permission}'
+
+
+def resolve_role_capabilities(code, permissions=None):
+    """
+    根据角色代码和权限配置解析能力集合
+
+    能力分组只由角色代码推导；权限配置中的权限标识以 PERMISSION_PREFIX 前缀加入，
+    配置成 'admin' 等名称也不会获得对应的能力分组
+    """
+    capabilities = {cap for cap, codes in CAPABILITY_ROLES.items() if code in codes}
+
+    if isinstance(permissions, (list, tuple)):
+        capabilities.update(permission_capability(p) for p in permissions)
+    elif isinstance(permissions, dict):
+        capabilities.update(permission_capability(k) for k, v in permissions.items() if v)
+
+    return frozenset(capabilities)
+
+
+def get_role_version(role):
+    """角色版本号（更新时间的微秒时间戳）"""
+    if role is None or role.updated_at is None:
+        return 0
+    return (role.updated_at - EPOCH) // timedelta(microseconds=1)
+
+
+def role_version_to_datetime(version):
+    """角色版本号还原为更新时间"""
+    return EPOCH + timedelta(microseconds=int(version))
+
+
+def get_role_capabilities(role):
+    """获取角色能力集（优先读取缓存）"""
+    if role is None:
+        return frozenset()
+
+    key = ROLE_CAPABILITY_CACHE_KEY.format(role_id=role.id, version=get_role_version(role))
+    capabilities = cache.get(key)
+    if capabilities is None:
+        capabilities = resolve_role_capabilities(role.code, role.permissions)
+        cache.set(key, capabilities, ROLE_CAPABILITY_CACHE_TIMEOUT)
+    return capabilities
+
+
+def get_user_capabilities(user):
+    """
+    获取用户能力集
+
+    结果挂在用户对象上，同一请求内的多次权限判断只解析一次
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    role = getattr(user, 'role', None)
+    role_key = (role.id, get_role_version(role)) if role is not None else None
+
+    cached = getattr(user, '_capability_cache', None)
+    if cached is not None and cached[0] == role_key:
+        return cached[1]
+
+    capabilities = get_role_capabilities(role)
+    user._capability_cache = (role_key, capabilities)
+    return capabilities
+
+
+def has_capability(user, capability):
+    """判断用户是否具备指定能力"""
+    return capability in get_user_capabilities(user)
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
 from django.utils.translation import gettext_lazy as _
 
 
@@ -61,5 +62,69 @@ class User(AbstractUser):
     created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
     updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # 游标分页
+            models.Index(fields=['created_at', 'id']),
+            # 按部门筛选在职用户
+            models.Index(fields=['department', 'status']),
+        ]
+    
     def __str__(self):
-        return self.real_name or self.username
\ No newline at end of file
+        return self.real_name or self.username
+
+
+class TokenUser(User):
+    """
+    无状态令牌用户
+
+    仅根据访问令牌中的声明构建（用户ID、角色、部门），不查询数据库；
+    视图访问其他字段时，一次性加载完整的用户记录
+    """
+
+    class Meta:
+        proxy = True
+        verbose_name = _('令牌用户')
+        verbose_name_plural = _('令牌用户')
+
+    @classmethod
+    def from_claims(cls, user_id, role_id=None, role_code=None, role_updated_at=None,
+                    department_id=None, using=DEFAULT_DB_ALIAS):
+        """根据令牌声明构建用户，未包含的字段延迟加载（调用方已通过失效标记确认用户为启用状态）"""
+        loaded = {
+            'id': user_id,
+            'is_active': True,
+            'role_id': role_id,
+            'department_id': department_id,
+        }
+        values = [loaded.get(f.attname, DEFERRED) for f in cls._meta.concrete_fields]
+        user = cls.from_db(using, [f.attname for f in cls._meta.concrete_fields], values)
+
+        if role_id is not None:
+            role_values = {'id': role_id, 'code': role_code, 'updated_at': role_updated_at}
+            user.role = Role.from_db(
+                using,
+                [f.attname for f in Role._meta.concrete_fields],
+                [role_values.get(f.attname, DEFERRED) for f in Role._meta.concrete_fields]
+            )
+        else:
+            user.role = None
+
+        if department_id is not None:
+            from apps.organization.models import Department
+            user.department = Department.from_db(
+                using,
+                [f.attname for f in Department._meta.concrete_fields],
+                [department_id if f.attname == 'id' else DEFERRED for f in Department._meta.concrete_fields]
+            )
+        else:
+            user.department = None
+
+        return user
+
+    def refresh_from_db(self, using=None, fields=None):
+        """访问任一延迟字段时一次性加载全部延迟字段"""
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and deferred_fields:
+            fields = set(fields) | deferred_fields
+        super().refresh_from_db(using=using, fields=fields)
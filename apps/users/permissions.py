@@ -1,45 +1,35 @@
 """Custom permissions"""
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .capabilities import (
+    has_capability, CAP_ADMIN, CAP_ADMIN_OR_HR, CAP_MANAGER,
+    CAP_ENGINEER, CAP_STAFF, CAP_INSTRUCTOR
+)
+
 
 class IsSystemAdmin(BasePermission):
     """系统管理员权限"""
 
     def has_permission(self, request, view):
-        return (request.user.is_authenticated and
-                hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code == 'admin')
+        return has_capability(request.user, CAP_ADMIN)
 
 
 class IsAdminOrHR(BasePermission):
     """管理员或HR权限"""
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in ['admin', 'hr_manager'])
+        return has_capability(request.user, CAP_ADMIN_OR_HR)
 
 
 class IsManager(BasePermission):
     """
     所有经理级别权限（与HR经理同级）
-    admin, hr_manager, training_manager, exam_manager, 
+    admin, hr_manager, training_manager, exam_manager,
     engineering_manager, dept_manager
     """
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager', 
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager'
-                ])
+        return has_capability(request.user, CAP_MANAGER)
 
 
 class IsManagerOrReadOnly(BasePermission):
@@ -50,19 +40,13 @@ class IsManagerOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        
+
         # 安全方法（GET, HEAD, OPTIONS）允许所有认证用户
         if request.method in SAFE_METHODS:
             return True
-        
+
         # 非安全方法需要经理权限
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager'
-                ])
+        return has_capability(request.user, CAP_MANAGER)
 
 
 class IsEngineer(BasePermission):
@@ -71,14 +55,7 @@ class IsEngineer(BasePermission):
     """
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'  # 生产操作员也视为工程师级别
-                ])
+        return has_capability(request.user, CAP_ENGINEER)
 
 
 class IsEngineerOrManager(BasePermission):
@@ -87,86 +64,35 @@ class IsEngineerOrManager(BasePermission):
     """
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    # 经理
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager',
-                    # 工程师
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'
-                ])
+        return has_capability(request.user, CAP_STAFF)
 
 
 class IsTrainingManager(BasePermission):
     """培训管理员权限（包含所有经理）"""
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager',
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'
-                ])
+        return has_capability(request.user, CAP_STAFF)
 
 
 class IsExamManager(BasePermission):
     """考试管理员权限（包含所有经理和工程师）"""
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager',
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'
-                ])
+        return has_capability(request.user, CAP_STAFF)
 
 
 class IsDeptManager(BasePermission):
     """部门经理权限（包含所有经理）"""
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager'
-                ])
+        return has_capability(request.user, CAP_MANAGER)
 
 
 class IsInstructor(BasePermission):
     """讲师权限（包含所有经理和工程师）"""
 
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        return (hasattr(request.user, 'role') and
-                request.user.role and
-                request.user.role.code in [
-                    'admin', 'hr_manager',
-                    'training_manager', 'exam_manager',
-                    'engineering_manager', 'dept_manager',
-                    'instructor',
-                    'me_engineer', 'te_engineer', 'technician',
-                    'production_operator'
-                ])
+        return has_capability(request.user, CAP_INSTRUCTOR)
 
 
 class IsOwnerOrAdmin(BasePermission):
@@ -178,13 +104,7 @@ class IsOwnerOrAdmin(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # 管理员和经理可以访问所有对象
-        if (hasattr(request.user, 'role') and
-            request.user.role and
-            request.user.role.code in [
-                'admin', 'hr_manager',
-                'training_manager', 'exam_manager',
-                'engineering_manager', 'dept_manager'
-            ]):
+        if has_capability(request.user, CAP_MANAGER):
             return True
 
         # 用户可以访问自己的对象
@@ -193,4 +113,4 @@ class IsOwnerOrAdmin(BasePermission):
         elif hasattr(obj, 'created_by'):
             return obj.created_by == request.user
 
-        return False
\ No newline at end of file
+        return False
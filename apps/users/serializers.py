@@ -1,7 +1,12 @@
 """User serializers"""
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate
 from .models import User, Role
+from .tokens import RefreshToken
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -219,4 +224,40 @@ class PasswordResetSerializer(serializers.Serializer):
         user = User.objects.get(id=self.validated_data['user_id'])
         user.set_password(self.validated_data['new_password'])
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """获取令牌序列化器（令牌携带角色、部门和权限版本声明）"""
+    
+    token_class = RefreshToken
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """刷新令牌序列化器（刷新时重新写入最新的用户声明）"""
+    
+    token_class = RefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        user = User.objects.select_related('role').filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('用户不存在或已被禁用', code='user_inactive')
+        refresh.set_user_claims(user)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # 原子加入黑名单，并发刷新同一令牌时只有一个请求成功
+            if api_settings.BLACKLIST_AFTER_ROTATION and not refresh.blacklist():
+                raise InvalidToken('令牌已失效')
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            
+            data['refresh'] = str(refresh)
+        
+        return data
@@ -0,0 +1,35 @@
+"""User signals"""
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.organization.models import Department, Position
+
+from .models import User, Role, TokenUser
+from .tokens import mark_role_changed, mark_user_claims_changed
+from .utils import invalidate_user_profiles
+
+
+@receiver(post_save, sender=Role)
+def role_saved(sender, instance, **kwargs):
+    """角色变更后使旧令牌声明失效"""
+    mark_role_changed(instance)
+
+
+@receiver([post_save, pre_delete], sender=Role)
+@receiver([post_save, pre_delete], sender=Department)
+@receiver([post_save, pre_delete], sender=Position)
+def user_relation_changed(sender, instance, **kwargs):
+    """角色、部门、岗位变更后清除相关用户的资料缓存"""
+    invalidate_user_profiles(instance.users.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=TokenUser)
+def user_changed(sender, instance, **kwargs):
+    """用户变更后使此前签发的令牌声明失效（删除的用户标记为已停用）"""
+    mark_user_claims_changed(
+        instance, instance.updated_at or timezone.now(),
+        is_active=instance.is_active and kwargs['signal'] is post_save
+    )
+    invalidate_user_profiles([instance.pk])
@@ -0,0 +1,174 @@
+"""JWT tokens carrying user claims"""
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .capabilities import get_role_version
+
+# 令牌中携带的用户声明
+ROLE_ID_CLAIM = 'role_id'
+ROLE_CODE_CLAIM = 'role_code'
+DEPARTMENT_ID_CLAIM = 'department_id'
+PERM_VERSION_CLAIM = 'perm_version'
+
+USER_CLAIMS = [ROLE_ID_CLAIM, ROLE_CODE_CLAIM, DEPARTMENT_ID_CLAIM, PERM_VERSION_CLAIM]
+
+# 声明失效标记：角色变更时记录最新版本号，用户变更时记录 (变更时间, 是否启用)
+ROLE_VERSION_CACHE_KEY = 'users:role_version:{role_id}'
+USER_CLAIMS_MARKER_CACHE_KEY = 'users:claims_marker:{user_id}'
+CLAIMS_MARKER_TIMEOUT = 60 * 60 * 24 * 8
+
+# 令牌黑名单：按 jti 记录，过期时间与令牌剩余有效期一致，到期自动清除
+TOKEN_BLACKLIST_CACHE_KEY = 'users:token_blacklist:{jti}'
+
+
+def get_user_claims(user):
+    """构建令牌中的用户声明"""
+    role = user.role
+    return {
+        ROLE_ID_CLAIM: role.id if role else None,
+        ROLE_CODE_CLAIM: role.code if role else None,
+        DEPARTMENT_ID_CLAIM: user.department_id,
+        PERM_VERSION_CLAIM: get_role_version(role),
+    }
+
+
+def mark_role_changed(role):
+    """记录角色最新版本号，使携带旧版本号的令牌回退到数据库加载"""
+    cache.set(
+        ROLE_VERSION_CACHE_KEY.format(role_id=role.id),
+        get_role_version(role),
+        CLAIMS_MARKER_TIMEOUT
+    )
+
+
+def user_claims_marker(changed_at, is_active):
+    """用户声明失效标记"""
+    return [int(changed_at.timestamp()), bool(is_active)]
+
+
+def mark_user_claims_changed(user, changed_at, is_active=None):
+    """记录用户信息变更时间和启用状态，此前签发的令牌回退到数据库加载"""
+    cache.set(
+        USER_CLAIMS_MARKER_CACHE_KEY.format(user_id=user.pk),
+        user_claims_marker(changed_at, user.is_active if is_active is None else is_active),
+        CLAIMS_MARKER_TIMEOUT
+    )
+
+
+def load_claim_markers(user_id):
+    """
+    从数据库加载用户及其当前角色的失效标记（一次查询），缓存中不存在时回填
+
+    用户不存在时标记为已停用
+    """
+    from .models import Role, User
+
+    row = User.objects.filter(pk=user_id).values_list(
+        'updated_at', 'is_active', 'role_id', 'role__updated_at'
+    ).first()
+    if row is None:
+        return {USER_CLAIMS_MARKER_CACHE_KEY.format(user_id=user_id): user_claims_marker(timezone.now(), False)}
+
+    updated_at, is_active, role_id, role_updated_at = row
+    markers = {USER_CLAIMS_MARKER_CACHE_KEY.format(user_id=user_id): user_claims_marker(updated_at, is_active)}
+    if role_id is not None:
+        markers[ROLE_VERSION_CACHE_KEY.format(role_id=role_id)] = get_role_version(
+            Role(id=role_id, updated_at=role_updated_at)
+        )
+
+    # 只在不存在时写入，避免覆盖并发的信号写入的更新标记
+    for key, value in markers.items():
+        cache.add(key, value, CLAIMS_MARKER_TIMEOUT)
+    return markers
+
+
+def claims_are_current(token):
+    """
+    检查令牌声明是否仍然有效
+
+    通常只访问缓存；缓存中缺少失效标记（过期或被驱逐）时查询数据库，不因缺少标记而放行。
+    变更时间精确到秒，同一秒内签发的令牌也视为过期
+    """
+    if PERM_VERSION_CLAIM not in token:
+        return False
+
+    user_id = token[api_settings.USER_ID_CLAIM]
+    role_id = token.get(ROLE_ID_CLAIM)
+    role_key = ROLE_VERSION_CACHE_KEY.format(role_id=role_id)
+    user_key = USER_CLAIMS_MARKER_CACHE_KEY.format(user_id=user_id)
+    keys = [role_key, user_key] if role_id else [user_key]
+
+    markers = cache.get_many(keys)
+    if len(markers) < len(keys):
+        markers = load_claim_markers(user_id)
+        # 用户当前角色与令牌不一致
+        if role_id and role_key not in markers:
+            return False
+
+    changed_at, is_active = markers[user_key]
+    if not is_active or token.get('iat', 0) <= changed_at:
+        return False
+
+    if role_id and markers[role_key] != token[PERM_VERSION_CLAIM]:
+        return False
+
+    return True
+
+
+def get_token_remaining_seconds(token):
+    """令牌剩余有效秒数"""
+    return max(int(token['exp'] - timezone.now().timestamp()), 1)
+
+
+def blacklist_token(token):
+    """
+    将令牌加入黑名单
+
+    使用 cache.add 原子写入，令牌已在黑名单中时返回 False
+    """
+    return cache.add(
+        TOKEN_BLACKLIST_CACHE_KEY.format(jti=token[api_settings.JTI_CLAIM]),
+        1,
+        get_token_remaining_seconds(token)
+    )
+
+
+def is_token_blacklisted(token):
+    """检查令牌是否在黑名单中"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and cache.get(TOKEN_BLACKLIST_CACHE_KEY.format(jti=jti)) is not None
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    携带角色、部门和权限版本声明的刷新令牌（访问令牌会复制这些声明）
+
+    黑名单保存在缓存中，替代 token_blacklist 应用的数据库表
+    """
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        """已加入黑名单的令牌视为无效"""
+        if is_token_blacklisted(self):
+            raise TokenError('令牌已失效')
+
+    def blacklist(self):
+        """加入黑名单，返回是否为首次加入"""
+        return blacklist_token(self)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user):
+        """写入/更新用户声明"""
+        for claim, value in get_user_claims(user).items():
+            self[claim] = value
@@ -0,0 +1,51 @@
+"""User utilities"""
+from django.core.cache import cache
+from django.utils import timezone
+
+# 用户资料缓存（用户、角色、部门、岗位变更时失效）
+USER_PROFILE_CACHE_KEY = 'users:profile:{user_id}'
+USER_PROFILE_CACHE_TIMEOUT = 60 * 30
+
+
+def build_user_profile(user_id):
+    """一次查询加载用户及关联信息并序列化"""
+    from .models import User
+    from .serializers import UserSerializer
+
+    user = User.objects.select_related('department', 'position', 'role').get(pk=user_id)
+    return UserSerializer(user).data
+
+
+def get_user_profile(user, request=None):
+    """获取用户资料（带缓存）"""
+    key = USER_PROFILE_CACHE_KEY.format(user_id=user.pk)
+    data = cache.get(key)
+    if data is None:
+        data = build_user_profile(user.pk)
+        cache.set(key, data, USER_PROFILE_CACHE_TIMEOUT)
+
+    # 头像地址与请求域名相关，不写入缓存
+    data = dict(data)
+    if request is not None and data.get('avatar_url'):
+        data['avatar_url'] = request.build_absolute_uri(data['avatar_url'])
+    return data
+
+
+def invalidate_user_profiles(user_ids):
+    """清除用户资料缓存"""
+    cache.delete_many([USER_PROFILE_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def update_login_info(user, ip_address):
+    """
+    更新最后登录信息
+
+    只更新 last_login/last_login_ip 两列，不触发整行保存
+    """
+    from .models import User
+
+    now = timezone.now()
+    User.objects.filter(pk=user.pk).update(last_login=now, last_login_ip=ip_address)
+    user.last_login = now
+    user.last_login_ip = ip_address
+    invalidate_user_profiles([user.pk])
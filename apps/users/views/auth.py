@@ -3,14 +3,15 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import logout
-from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
 
 from ..models import User
+from ..tokens import RefreshToken
+from ..utils import get_user_profile, update_login_info
 from ..serializers import (
     LoginSerializer, PasswordChangeSerializer, 
-    PasswordResetSerializer, UserSerializer
+    PasswordResetSerializer
 )
 from ..permissions import IsAdminOrHR
 
@@ -23,10 +24,8 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         
-        # 更新最后登录信息
-        user.last_login = timezone.now()
-        user.last_login_ip = request.META.get('REMOTE_ADDR')
-        user.save()
+        # 更新最后登录信息（仅更新两列）
+        update_login_info(user, request.META.get('REMOTE_ADDR'))
         
         # 生成JWT token
         refresh = RefreshToken.for_user(user)
@@ -37,7 +36,7 @@ def login_view(request):
             'data': {
                 'access': str(refresh.access_token),
                 'refresh': str(refresh),
-                'user': UserSerializer(user, context={'request': request}).data
+                'user': get_user_profile(user, request)
             }
         })
     
@@ -58,7 +57,8 @@ def logout_view(request):
         if refresh_token:
             token = RefreshToken(refresh_token)
             token.blacklist()
-    except:
+    except TokenError:
+        # 令牌已过期或已失效
         pass
     
     logout(request)
@@ -74,13 +74,10 @@ def logout_view(request):
 @permission_classes([IsAuthenticated])
 def profile_view(request):
     """获取当前用户信息"""
-    user = request.user
-    serializer = UserSerializer(user, context={'request': request})
-    
     return Response({
         'code': 200,
         'message': 'Success',
-        'data': serializer.data
+        'data': get_user_profile(request.user, request)
     })
 
 
@@ -10,6 +10,11 @@ from django.db.models import Q
 from ..models import User, Role
 from ..serializers import UserSerializer, UserCreateSerializer, UserUpdateSerializer, RoleSerializer
 from ..permissions import IsAdminOrHR, IsSystemAdmin
+from ..capabilities import has_capability, CAP_ADMIN_OR_HR
+from ..utils import get_user_profile
+from apps.common.pagination import CursorOptInPagination
+from apps.common.fieldsets import SparseFieldsetMixin
+from apps.common.search import FullTextSearchFilter
 
 
 class IsAdminOrHROrReadOnly(BasePermission):
@@ -26,14 +31,10 @@ class IsAdminOrHROrReadOnly(BasePermission):
             return True
         
         # 非安全方法需要管理员或HR权限
-        return (
-            hasattr(request.user, 'role') and 
-            request.user.role and 
-            request.user.role.code in ['admin', 'hr_manager']
-        )
+        return has_capability(request.user, CAP_ADMIN_OR_HR)
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, ModelViewSet):
     """用户管理视图集"""
     
     queryset = User.objects.select_related('department', 'position', 'role').all()
@@ -41,11 +42,20 @@ class UserViewSet(ModelViewSet):
     # 所有认证用户可以读取，只有 admin/hr_manager 可以写入
     permission_classes = [IsAuthenticated, IsAdminOrHROrReadOnly]
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['department', 'position', 'role', 'status']
     search_fields = ['username', 'real_name', 'employee_id', 'email', 'phone']
+    # 与 users_user 表的全文索引一致
+    fulltext_fields = ['username', 'real_name', 'employee_id', 'email', 'phone']
     ordering_fields = ['created_at', 'updated_at', 'real_name', 'employee_id']
     ordering = ['-created_at']
+    # 支持 pagination=cursor 游标分页
+    pagination_class = CursorOptInPagination
+    
+    field_relations = {
+        'department_name': 'department', 'position_name': 'position',
+        'role_name': 'role', 'role_code': 'role',
+    }
     
     def get_serializer_class(self):
         """根据操作类型选择序列化器"""
@@ -59,12 +69,8 @@ class UserViewSet(ModelViewSet):
         """根据权限过滤查询集"""
         user = self.request.user
         
-        # 系统管理员可以查看所有用户
-        if user.role and user.role.code == 'admin':
-            return self.queryset
-        
-        # HR可以查看所有用户
-        if user.role and user.role.code == 'hr_manager':
+        # 系统管理员和HR可以查看所有用户
+        if has_capability(user, CAP_ADMIN_OR_HR):
             return self.queryset
         
         # 部门经理可以查看本部门用户
@@ -97,7 +103,7 @@ class UserViewSet(ModelViewSet):
             'code': 200,
             'message': 'Success',
             'data': {
-                'count': queryset.count(),
+                'count': len(serializer.data),
                 'results': serializer.data
             }
         })
@@ -190,7 +196,7 @@ class UserViewSet(ModelViewSet):
         })
 
 
-class RoleViewSet(ModelViewSet):
+class RoleViewSet(SparseFieldsetMixin, ModelViewSet):
     """角色管理视图集"""
     
     queryset = Role.objects.all()
@@ -206,11 +212,8 @@ class RoleViewSet(ModelViewSet):
 @permission_classes([IsAuthenticated])
 def user_profile_view(request):
     """获取当前用户详细信息"""
-    user = request.user
-    serializer = UserSerializer(user, context={'request': request})
-    
     return Response({
         'code': 200,
         'message': 'Success',
-        'data': serializer.data
+        'data': get_user_profile(request.user, request)
     })
\ No newline at end of file
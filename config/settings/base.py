@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -50,6 +51,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # 放在靠前位置，统计认证、审计日志等中间件的查询
+    'apps.common.metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -141,10 +144,32 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# 无状态JWT模式：根据令牌声明构建用户，跳过每次请求的用户查询
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=False, cast=bool)
+
+# 全文检索后端（留空时按数据库选择：MySQL 使用 FULLTEXT 索引，其他使用进程内倒排索引）
+# MySQL 的命中按 ngram 词元匹配，不保证与 LIKE 完全一致；需要严格一致时配置为 LikeSearchBackend
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='')
+# MySQL ngram_token_size，短于该长度的检索词使用 LIKE
+SEARCH_NGRAM_SIZE = config('SEARCH_NGRAM_SIZE', default=2, cast=int)
+
+# 分页总数缓存时间（秒）
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=30, cast=int)
+
+# 请求指标（查询数、数据库耗时，按视图聚合，/api/metrics/ 输出 Prometheus 格式）
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+# 响应中添加 Server-Timing 头（浏览器开发者工具可见）
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=DEBUG, cast=bool)
+# 最慢 SQL 写入日志时保留的长度
+REQUEST_METRICS_SQL_MAX_LENGTH = config('REQUEST_METRICS_SQL_MAX_LENGTH', default=500, cast=int)
+# 采集端访问令牌（Authorization: Bearer），留空时只允许系统管理员访问
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'apps.users.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -152,6 +177,10 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        # 公开证书验证接口
+        'certificate_verify': config('CERTIFICATE_VERIFY_THROTTLE_RATE', default='120/min'),
+    },
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -184,6 +213,8 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.serializers.UserTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.UserTokenRefreshSerializer',
 }
 
 # CORS Settings
@@ -213,6 +244,38 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# apps.common 不是Django应用，其中的任务需要显式导入
+CELERY_IMPORTS = ['apps.common.notifications', 'apps.common.email_service']
+CELERY_BEAT_SCHEDULE = {
+    'certificate-expiry-sweep': {
+        'task': 'apps.competency.tasks.certificate_expiry_sweep',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'compliance-rebuild': {
+        'task': 'apps.reporting.tasks.rebuild_compliance_statuses',
+        'schedule': crontab(hour=1, minute=30),
+    },
+    'certificate-export-cleanup': {
+        'task': 'apps.competency.tasks.cleanup_certificate_exports',
+        'schedule': crontab(minute=0),
+    },
+}
+
+# 证书到期提醒：提前天数及每批处理数量
+CERTIFICATE_EXPIRY_WARNING_DAYS = config('CERTIFICATE_EXPIRY_WARNING_DAYS', default=30, cast=int)
+CERTIFICATE_EXPIRY_CHUNK_SIZE = 500
+
+# 证书PDF渲染子任务的证书数量（批量渲染按此拆分为并行的 Celery 子任务）
+CERTIFICATE_PDF_TASK_CHUNK_SIZE = config('CERTIFICATE_PDF_TASK_CHUNK_SIZE', default=200, cast=int)
+# 批量颁发后由 Celery 预先生成证书PDF
+CERTIFICATE_PDF_PREWARM = config('CERTIFICATE_PDF_PREWARM', default=True, cast=bool)
+# 证书ZIP导出保留时间（小时），过期后由定时任务删除
+CERTIFICATE_EXPORT_RETENTION_HOURS = config('CERTIFICATE_EXPORT_RETENTION_HOURS', default=24, cast=int)
+# 证书文件排队生成的去重时间（秒）
+CERTIFICATE_FILE_QUEUE_TIMEOUT = 60 * 10
+
+# 考试详情是否内联参与者明细（关闭时通过 participants 子资源分页获取）
+EXAM_DETAIL_INLINE_PARTICIPANTS = config('EXAM_DETAIL_INLINE_PARTICIPANTS', default=False, cast=bool)
 
 # Email Settings
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -223,6 +286,14 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@tcms.com')
 
+# 批量邮件发送
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=100, cast=int)
+EMAIL_MAX_RETRIES = config('EMAIL_MAX_RETRIES', default=3, cast=int)
+EMAIL_RETRY_DELAY = config('EMAIL_RETRY_DELAY', default=60, cast=int)
+EMAIL_RATE_LIMITS = {
+    'django.core.mail.backends.smtp.EmailBackend': config('EMAIL_SMTP_RATE_LIMIT', default=10, cast=int),
+}
+
 # Audit Log Settings
 AUDIT_LOG_ENABLED = config('AUDIT_LOG_ENABLED', default=True, cast=bool)
 AUDIT_LOG_EXCLUDED_PATHS = [
@@ -230,6 +301,11 @@ AUDIT_LOG_EXCLUDED_PATHS = [
     '/static/',
     '/media/',
     '/api/auth/token/refresh/',
+    # 公开证书验证调用量大，不记录审计日志
+    '/api/competency/certificates/public-verify/',
+    '/api/competency/certificates/bulk-verify/',
+    # 指标采集
+    '/api/metrics/',
 ]
 
 # Custom User Model
@@ -28,6 +28,17 @@ DATABASES = {
     }
 }
 
+# Cache for development（本地无需启动 Redis）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tcms-dev',
+    }
+}
+
+# 本地不依赖 Celery，证书PDF在首次下载时生成
+CERTIFICATE_PDF_PREWARM = False
+
 # Email backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -4,6 +4,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
+from apps.common.metrics import metrics
 from datetime import datetime
 #from django.urls import handler404, handler500  # 添加这行
 
@@ -25,6 +26,7 @@ urlpatterns = [
     path('api/competency/', include('apps.competency.urls', namespace='competency')),
     path('api/reporting/', include('apps.reporting.urls', namespace='reporting')),
     path('api/audit/', include('apps.audit.urls', namespace='audit')),
+    path('api/metrics/', metrics, name='metrics'),
     path('', HomeView.as_view(), name='home'),
 ]
 
@@ -96,4 +96,150 @@ class AuthTests(TestCase):
         url = '/api/auth/logout/'
         response = self.client.post(url)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_jwt_authentication_loads_role_in_one_query(self):
+        """测试JWT认证一次查询加载用户和角色，能力集按请求缓存"""
+        from rest_framework_simplejwt.tokens import AccessToken
+        from apps.users.authentication import JWTAuthentication
+        from apps.users.capabilities import has_capability, CAP_ADMIN, CAP_STAFF
+        
+        token = AccessToken.for_user(self.user)
+        
+        with self.assertNumQueries(1):
+            user = JWTAuthentication().get_user(token)
+            self.assertEqual(user.role.code, 'admin')
+            self.assertTrue(has_capability(user, CAP_ADMIN))
+            self.assertTrue(has_capability(user, CAP_STAFF))
+        
+        # 角色变更后（updated_at 变化）能力集重新解析
+        self.admin_role.code = 'me_engineer'
+        self.admin_role.save()
+        user = JWTAuthentication().get_user(token)
+        self.assertFalse(has_capability(user, CAP_ADMIN))
+        self.assertTrue(has_capability(user, CAP_STAFF))
+    
+    def test_role_permissions_do_not_grant_capability_groups(self):
+        """测试权限配置中的标识不会被当成能力分组"""
+        from apps.users.capabilities import (
+            resolve_role_capabilities, permission_capability, CAP_ADMIN, CAP_MANAGER, CAP_STAFF
+        )
+        
+        capabilities = resolve_role_capabilities('technician', ['admin', 'report:read'])
+        self.assertNotIn(CAP_ADMIN, capabilities)
+        self.assertIn(CAP_STAFF, capabilities)
+        self.assertIn(permission_capability('admin'), capabilities)
+        self.assertIn(permission_capability('report:read'), capabilities)
+        
+        capabilities = resolve_role_capabilities('instructor', {'manager': True, 'staff': False})
+        self.assertNotIn(CAP_MANAGER, capabilities)
+        self.assertEqual(capabilities, {'instructor', permission_capability('manager')})
+    
+    def test_stateless_token_claims(self):
+        """测试令牌携带角色/部门声明，无状态认证不查询数据库"""
+        from rest_framework_simplejwt.tokens import AccessToken
+        from apps.users.authentication import StatelessJWTAuthentication
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+        from apps.users.capabilities import has_capability, CAP_ADMIN
+        from apps.users.models import TokenUser
+        
+        # 用户变更时间早于令牌签发时间（同一秒内签发的令牌视为过期）
+        get_user_model().objects.filter(pk=self.user.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        cache.clear()
+        
+        response = self.client.post('/api/auth/login/', {
+            'username': 'testuser',
+            'password': 'testpass123'
+        }, format='json')
+        token = AccessToken(response.data['data']['access'])
+        self.assertEqual(token['role_code'], 'admin')
+        self.assertIn('perm_version', token)
+        
+        # 缓存中没有失效标记时从数据库加载，首次解析角色能力集后写入缓存
+        with self.assertNumQueries(2):
+            has_capability(StatelessJWTAuthentication().get_user(token), CAP_ADMIN)
+        
+        with self.assertNumQueries(0):
+            user = StatelessJWTAuthentication().get_user(token)
+            self.assertIsInstance(user, TokenUser)
+            self.assertEqual(user.role.code, 'admin')
+            self.assertTrue(has_capability(user, CAP_ADMIN))
+        
+        # 访问令牌外的字段时一次性加载完整用户
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, 'testuser')
+            self.assertEqual(user.real_name, '测试用户')
+        
+        # 失效标记丢失后不放行已停用的用户
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            StatelessJWTAuthentication().get_user(token)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=True)
+        cache.clear()
+        
+        # 角色变更后旧令牌回退到数据库加载
+        self.admin_role.save()
+        user = StatelessJWTAuthentication().get_user(token)
+        self.assertNotIsInstance(user, TokenUser)
+        
+        # 刷新令牌时写入最新声明
+        response = self.client.post('/api/auth/token/refresh/', {
+            'refresh': response.data['data']['refresh']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data['access'])
+        self.assertIsInstance(StatelessJWTAuthentication().get_user(token), TokenUser)
+    
+    def test_login_updates_last_login_and_caches_profile(self):
+        """测试登录只更新登录信息列，用户资料走缓存并随变更失效"""
+        response = self.client.post('/api/auth/login/', {
+            'username': 'testuser',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['data']['user']['last_login'])
+        
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(self.user.last_login_ip, '127.0.0.1')
+        
+        # 登录后资料已缓存，获取资料不再查询数据库
+        from apps.users.utils import get_user_profile
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_profile(self.user)['role_name'], '系统管理员')
+        
+        self.client.force_authenticate(user=self.user)
+        
+        # 角色变更后缓存失效
+        self.admin_role.name = '超级管理员'
+        self.admin_role.save()
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['data']['role_name'], '超级管理员')
+    
+    def test_refresh_token_blacklist(self):
+        """测试刷新令牌轮换和登出后旧令牌失效"""
+        response = self.client.post('/api/auth/login/', {
+            'username': 'testuser',
+            'password': 'testpass123'
+        }, format='json')
+        refresh = response.data['data']['refresh']
+        
+        url = '/api/auth/token/refresh/'
+        response = self.client.post(url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data['refresh']
+        
+        # 轮换后的旧令牌不能再次使用
+        response = self.client.post(url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        # 登出后令牌失效
+        self.client.force_authenticate(user=self.user)
+        self.client.post('/api/auth/logout/', {'refresh': rotated}, format='json')
+        self.client.force_authenticate(user=None)
+        response = self.client.post(url, {'refresh': rotated}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -6,6 +6,7 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
+import os
 
 from apps.users.models import Role
 from apps.competency.models import Competency, CompetencyAssessment, Certificate
@@ -216,4 +217,249 @@ class CompetencyTests(TestCase):
         
         url = f'/api/competency/certificates/{certificate.id}/revoke/'
         response = self.client.post(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_certificate_expiry_sweep(self):
+        """测试证书过期状态批量更新和到期提醒（重复执行不重复提醒）"""
+        from unittest import mock
+        from django.core import mail
+        from django.core.management import call_command
+        from apps.common.notifications import send_email_batch
+        from apps.reporting.tasks import update_compliance_statuses
+        
+        today = timezone.now().date()
+        certificates = [
+            Certificate.objects.create(
+                name=f'证书{days}', user=self.employee_user, competency=self.competency,
+                issue_date=today - timedelta(days=365), expiry_date=today + timedelta(days=days)
+            )
+            for days in (-1, 10, 100)
+        ]
+        
+        def sweep():
+            with mock.patch.object(send_email_batch, 'delay', side_effect=send_email_batch), \
+                    mock.patch.object(update_compliance_statuses, 'delay', side_effect=update_compliance_statuses):
+                with self.captureOnCommitCallbacks(execute=True):
+                    call_command('expire_certificates', '--days=30', stdout=mock.MagicMock())
+        
+        sweep()
+        statuses = [c.status for c in Certificate.objects.order_by('id')]
+        self.assertEqual(statuses, ['expired', 'valid', 'valid'])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, '证书即将到期提醒 - 证书10')
+        
+        # 重复执行不重复提醒
+        sweep()
+        self.assertEqual(len(mail.outbox), 1)
+        
+        # 到期日期变更后重新提醒
+        Certificate.objects.filter(id=certificates[1].id).update(expiry_date=today + timedelta(days=20))
+        sweep()
+        self.assertEqual(len(mail.outbox), 2)
+    
+    def test_public_certificate_verify(self):
+        """测试公开证书验证（无需登录、结果缓存、批量验证）"""
+        today = timezone.now().date()
+        valid = Certificate.objects.create(
+            name='Python编程证书', user=self.employee_user, competency=self.competency,
+            issue_date=today, expiry_date=today + timedelta(days=365), verification_code='PUB001'
+        )
+        Certificate.objects.create(
+            name='过期证书', user=self.employee_user, competency=self.competency,
+            issue_date=today - timedelta(days=400), expiry_date=today - timedelta(days=1),
+            verification_code='PUB002'
+        )
+        
+        url = '/api/competency/certificates/public-verify/PUB001/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['data']['valid'])
+        self.assertEqual(response.data['data']['holder'], '员工')
+        
+        # 第二次命中缓存，不查询数据库
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        
+        # 不存在的验证码同样缓存
+        response = self.client.get('/api/competency/certificates/public-verify/NOPE/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        with self.assertNumQueries(0):
+            self.client.get('/api/competency/certificates/public-verify/NOPE/')
+        
+        # 吊销后缓存失效
+        valid.revoke()
+        response = self.client.get(url)
+        self.assertFalse(response.data['data']['valid'])
+        self.assertEqual(response.data['data']['status'], 'revoked')
+        
+        # 批量验证：一次查询未命中的验证码
+        response = self.client.post('/api/competency/certificates/bulk-verify/', {
+            'verification_codes': ['PUB001', 'PUB002', 'NOPE', 'PUB002']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['valid_count'], 0)
+        self.assertEqual([r['status'] for r in data['results'] if r['found']], ['revoked', 'expired'])
+        
+        response = self.client.post('/api/competency/certificates/bulk-verify/', {
+            'verification_codes': [f'C{i}' for i in range(1001)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_certificate_numbering(self):
+        """测试证书编号和验证码批量分配（唯一、递增、保持原格式）"""
+        import re
+        from unittest import mock
+        from apps.competency.numbering import (
+            SequenceAllocator, allocate_certificate_numbers, allocate_verification_codes
+        )
+        
+        # 一次预留整批序号（锁定序列行 + 更新）
+        with self.assertNumQueries(4):
+            numbers = allocate_certificate_numbers(300)
+        self.assertEqual(len(set(numbers)), 300)
+        self.assertTrue(all(re.fullmatch(r'CERT\d{14}\d{6,}', n) for n in numbers))
+        sequence = [int(n[18:]) for n in numbers]
+        self.assertEqual(sequence, sorted(sequence))
+        
+        codes = allocate_verification_codes(300)
+        self.assertEqual(len(set(codes)), 300)
+        self.assertTrue(all(re.fullmatch(r'VC\d{8}[0-9A-Z]{8}', c) for c in codes))
+        
+        certificate = Certificate.objects.create(
+            name='Python编程证书', user=self.employee_user, competency=self.competency,
+            issue_date=timezone.now().date()
+        )
+        self.assertNotIn(certificate.certificate_no, numbers)
+        self.assertNotIn(certificate.verification_code, codes)
+        
+        # 不在事务中时按块预留，块内分配不访问数据库
+        allocator = SequenceAllocator('test_sequence', block_size=50)
+        with mock.patch('apps.competency.numbering.connection') as conn:
+            conn.in_atomic_block = False
+            first = allocator.allocate()
+            with self.assertNumQueries(0):
+                rest = allocator.allocate(49)
+        self.assertEqual(first + rest, list(range(1, 51)))
+    
+    def test_certificate_pdf_download(self):
+        """测试证书PDF下载（未生成时排队渲染返回202，按版本缓存在磁盘，证书更新后重新生成）"""
+        import tempfile
+        from unittest import mock
+        from django.core.cache import cache
+        from django.test import override_settings
+        from apps.competency import certificate_files
+        from apps.competency.tasks import render_certificate_pdfs
+        
+        cache.clear()
+        certificate = Certificate.objects.create(
+            name='Python证书', user=self.employee_user, competency=self.competency,
+            issued_by=self.trainer_user, issue_date=timezone.now().date()
+        )
+        url = f'/api/competency/certificates/{certificate.id}/download/'
+        
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(render_certificate_pdfs, 'delay', side_effect=render_certificate_pdfs) as delay:
+            self.client.force_authenticate(user=self.employee_user)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            delay.assert_called_once_with([certificate.id])
+            
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertIn(certificate.certificate_no, response['Content-Disposition'])
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            
+            certificate.refresh_from_db()
+            first_name = certificate.certificate_file.name
+            self.assertTrue(first_name.startswith(f'certificates/{certificate.issue_date:%Y/%m}/{certificate.id}_'))
+            
+            # 再次下载直接读取磁盘文件，不重新渲染
+            with mock.patch.object(certificate_files, 'render_certificate_pdf') as render:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                render.assert_not_called()
+                response.close()
+                
+                # 证书更新后生成新版本并清理旧文件
+                render.return_value = b'%PDF-new'
+                certificate.name = 'Python高级证书'
+                certificate.save()
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_202_ACCEPTED)
+                response = self.client.get(url)
+                self.assertEqual(b''.join(response.streaming_content), b'%PDF-new')
+                self.assertEqual(render.call_args[0][0]['name'], 'Python高级证书')
+            
+            certificate.refresh_from_db()
+            self.assertNotEqual(certificate.certificate_file.name, first_name)
+            self.assertFalse(os.path.exists(os.path.join(media_root, first_name)))
+            self.assertEqual(delay.call_count, 2)
+        
+        # 批量渲染按数量拆分为并行子任务，不在 worker 内启动进程池
+        with override_settings(CERTIFICATE_PDF_TASK_CHUNK_SIZE=1), \
+                mock.patch('apps.competency.tasks.group') as group:
+            self.assertEqual(render_certificate_pdfs([certificate.id, certificate.id + 1]), 0)
+        subtasks = list(group.call_args[0][0])
+        self.assertEqual([subtask.args for subtask in subtasks], [([certificate.id],), ([certificate.id + 1],)])
+        group.return_value.apply_async.assert_called_once_with()
+        
+        # 不能下载他人的证书
+        operator_role = Role.objects.create(name='操作员', code='operator')
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            username='other', password='pass123', real_name='其他', employee_id='OT001', role=operator_role
+        ))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_bulk_issue_assessment_certificates(self):
+        """测试按能力评估批量颁发证书（跳过未审批和已颁发的评估）"""
+        from unittest import mock
+        from django.core import mail
+        from apps.common.notifications import send_email_batch
+        from apps.reporting.tasks import update_compliance_statuses
+        
+        users = [
+            get_user_model().objects.create_user(
+                username=f'worker{i}', password='pass123', real_name=f'工人{i}',
+                employee_id=f'W{i:03d}', email=f'worker{i}@example.com'
+            )
+            for i in range(4)
+        ]
+        assessments = [
+            CompetencyAssessment.objects.create(
+                user=user, competency=self.competency, assessor=self.trainer_user,
+                status='approved' if i < 3 else 'pending'
+            )
+            for i, user in enumerate(users)
+        ]
+        # 已颁发过证书的评估
+        assessments[0].generate_certificate(issued_by=self.trainer_user)
+        
+        self.client.force_authenticate(user=self.trainer_user)
+        with mock.patch.object(send_email_batch, 'delay', side_effect=send_email_batch) as delay, \
+                mock.patch.object(update_compliance_statuses, 'delay', side_effect=update_compliance_statuses):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/competency/certificates/bulk-issue/', {
+                    'assessment_ids': [a.id for a in assessments]
+                }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['issued'], 2)
+        self.assertEqual(response.data['data']['skipped'], 2)
+        self.assertEqual(
+            set(Certificate.objects.filter(assessment__in=assessments[1:3]).values_list('user__username', flat=True)),
+            {'worker1', 'worker2'}
+        )
+        self.assertEqual(delay.call_count, 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['worker1@example.com', 'worker2@example.com'])
+        
+        # 重复颁发不会产生新证书
+        response = self.client.post('/api/competency/certificates/bulk-issue/', {
+            'assessment_ids': [a.id for a in assessments]
+        }, format='json')
+        self.assertEqual(response.data['data']['issued'], 0)
+        
+        # 考试ID和评估ID必须二选一
+        response = self.client.post('/api/competency/certificates/bulk-issue/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
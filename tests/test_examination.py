@@ -6,6 +6,7 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
+from unittest import mock
 
 from apps.users.models import Role
 from apps.examination.models import QuestionBank, Question, Exam, ExamResult
@@ -232,4 +233,276 @@ class ExaminationTests(TestCase):
         if response.status_code == 400:
             self.assertIn('考试未通过', response.data['message']) or self.skipTest("需要能力关联")
         else:
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_bulk_issue_exam_certificates(self):
+        """按考试批量颁发证书（仅考试通过的成绩）"""
+        from apps.competency.models import Certificate
+        
+        passed = ExamResult.objects.create(
+            exam=self.exam, user=self.employee_user, status='graded',
+            score=85.00, is_passed=True, submitted_at=timezone.now()
+        )
+        ExamResult.objects.create(
+            exam=self.exam, user=self.exam_user, status='graded',
+            score=40.00, is_passed=False, submitted_at=timezone.now()
+        )
+        
+        self.client.force_authenticate(user=self.exam_user)
+        url = '/api/competency/certificates/bulk-issue/'
+        response = self.client.post(url, {'exam_id': self.exam.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['issued'], 1)
+        
+        certificate = Certificate.objects.get(exam_result=passed)
+        self.assertIsNone(certificate.competency)
+        passed.refresh_from_db()
+        self.assertEqual(passed.certificate_no, certificate.certificate_no)
+        
+        response = self.client.post(url, {'exam_id': self.exam.id}, format='json')
+        self.assertEqual(response.data['data']['issued'], 0)
+        
+        # 整场考试的证书打包下载：未生成时排队打包，生成后删除旧版本，过期后定时清理
+        import io
+        import os
+        import tempfile
+        import zipfile
+        from django.core.cache import cache
+        from django.test import override_settings
+        from apps.competency.certificate_files import CERTIFICATE_ZIP_DIR, cleanup_certificate_exports
+        from apps.competency.tasks import build_certificate_export
+        
+        cache.clear()
+        url = '/api/competency/certificates/exam-download/'
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(build_certificate_export, 'delay', side_effect=build_certificate_export) as delay:
+            export_dir = os.path.join(media_root, CERTIFICATE_ZIP_DIR)
+            os.makedirs(export_dir)
+            open(os.path.join(export_dir, f'exam_{self.exam.id}_old.zip'), 'wb').close()
+            
+            response = self.client.get(url, {'exam_id': self.exam.id})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            delay.assert_called_once_with(self.exam.id)
+            
+            response = self.client.get(url, {'exam_id': self.exam.id})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/zip')
+            with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as zf:
+                names = zf.namelist()
+                self.assertEqual(names, [f'{certificate.certificate_no}_{self.employee_user.real_name}.pdf'])
+                self.assertTrue(zf.read(names[0]).startswith(b'%PDF'))
+            
+            exports = os.listdir(export_dir)
+            self.assertEqual(len(exports), 1)
+            self.assertEqual(cleanup_certificate_exports(), 0)
+            os.utime(os.path.join(export_dir, exports[0]), (0, 0))
+            self.assertEqual(cleanup_certificate_exports(), 1)
+            self.assertEqual(os.listdir(export_dir), [])
+    
+    def test_item_analysis(self):
+        """题目分析：正确率、区分度、选项分布，增量更新"""
+        from apps.examination.analysis import refresh_item_analysis
+        from apps.examination.models import QuestionAnalysis
+        from apps.examination.tasks import refresh_exam_item_analysis
+        
+        judge = Question.objects.create(
+            question_bank=self.question_bank,
+            question_type='true_false',
+            title='venv是标准库工具',
+            content='venv是Python标准库中的工具',
+            correct_answer={'answer': ['true']},
+            score=2.0,
+            created_by=self.admin_user
+        )
+        # 高分者答对选择题，低分者答错；判断题反之（区分度为负）
+        answers = [
+            (90, ['B'], 'false'),
+            (80, ['B'], 'false'),
+            (40, ['A'], 'true'),
+            (20, ['C'], 'true'),
+        ]
+        for index, (score, choice, judgement) in enumerate(answers):
+            user = get_user_model().objects.create_user(
+                username=f'candidate{index}', password='pass123',
+                real_name=f'考生{index}', employee_id=f'C{index:03d}'
+            )
+            ExamResult.objects.create(
+                exam=self.exam, user=user, status='graded', score=score,
+                answers={str(self.question.id): choice, str(judge.id): judgement}
+            )
+        
+        self.assertEqual(refresh_item_analysis(self.exam), 4)
+        self.assertEqual(refresh_item_analysis(self.exam), 0)
+        
+        choice = QuestionAnalysis.objects.get(exam=self.exam, question=self.question)
+        self.assertEqual((choice.response_count, choice.correct_count), (4, 2))
+        self.assertEqual(choice.correct_rate, 0.5)
+        self.assertGreater(choice.discrimination, 0.9)
+        self.assertEqual(choice.option_counts, {'A': 1, 'B': 2, 'C': 1})
+        judge_analysis = QuestionAnalysis.objects.get(exam=self.exam, question=judge)
+        self.assertLess(judge_analysis.discrimination, 0)
+        self.assertEqual(judge_analysis.option_counts, {'FALSE': 2, 'TRUE': 2})
+        
+        # 新结果评分后只计入该结果（通过考试，生成证书编号后仍保持已计入）
+        result = ExamResult.objects.create(
+            exam=self.exam, user=self.employee_user, status='submitted',
+            answers={str(self.question.id): ['B'], str(judge.id): 'true'}
+        )
+        # 模拟自动提交：on_commit 回调立即执行
+        with mock.patch.object(refresh_exam_item_analysis, 'delay', side_effect=refresh_exam_item_analysis) as delay, \
+                mock.patch('apps.examination.analysis.transaction.on_commit', side_effect=lambda func: func()):
+            result.grade()
+        delay.assert_called_once_with(self.exam.id)
+        result.refresh_from_db()
+        self.assertTrue(result.certificate_no)
+        self.assertTrue(result.analyzed)
+        choice.refresh_from_db()
+        self.assertEqual((choice.response_count, choice.correct_count), (5, 3))
+        self.assertEqual(QuestionAnalysis.objects.get(exam=self.exam, question=judge).response_count, 5)
+        
+        self.client.force_authenticate(user=self.exam_user)
+        response = self.client.get(f'/api/examination/exams/{self.exam.id}/item_analysis/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['result_count'], 5)
+        self.assertEqual(data['pending'], 0)
+        self.assertEqual(data['questions'][0]['question'], judge.id)
+        self.assertIn('negative_discrimination', data['questions'][0]['flags'])
+        
+        
+        # 查看分析不在请求内重算，未计入的成绩交给异步任务
+        ExamResult.objects.create(
+            exam=self.exam, user=self.admin_user, status='graded', score=60,
+            answers={str(self.question.id): ['A'], str(judge.id): 'false'}
+        )
+        with mock.patch.object(refresh_exam_item_analysis, 'delay') as delay:
+            response = self.client.get(f'/api/examination/exams/{self.exam.id}/item_analysis/')
+        delay.assert_called_once_with(self.exam.id)
+        self.assertEqual(response.data['data']['pending'], 1)
+        self.assertEqual(response.data['data']['result_count'], 5)
+        
+        self.client.force_authenticate(user=get_user_model().objects.get(username='candidate0'))
+        response = self.client.get(f'/api/examination/exams/{self.exam.id}/item_analysis/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_result_list_sparse_fields(self):
+        """成绩列表：精简字段、?fields=/?exclude=，未返回的答案数据不读取"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        ExamResult.objects.create(
+            exam=self.exam, user=self.employee_user, status='graded', score=85,
+            answers={str(self.question.id): ['B']}, submitted_at=timezone.now()
+        )
+        self.client.force_authenticate(user=self.exam_user)
+        url = '/api/examination/results/'
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data['results'][0]
+        self.assertNotIn('answers', row)
+        select = [q['sql'] for q in queries.captured_queries if 'exam_results' in q['sql'] and 'COUNT' not in q['sql']]
+        self.assertEqual(len(select), 1)
+        self.assertNotIn('answers', select[0])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,score,exam_title'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'score', 'exam_title'})
+        select = [q['sql'] for q in queries.captured_queries if 'exam_results' in q['sql'] and 'COUNT' not in q['sql']]
+        self.assertNotIn('"users_user"', select[0])
+        
+        result_id = row['id']
+        response = self.client.get(f'{url}{result_id}/', {'exclude': 'answers,review_comment'})
+        self.assertNotIn('answers', response.data)
+        self.assertIn('exam_code', response.data)
+        response = self.client.get(f'{url}{result_id}/')
+        self.assertEqual(response.data['answers'], {str(self.question.id): ['B']})
+        
+        # 考试列表不返回参与者列表
+        response = self.client.get('/api/examination/exams/')
+        self.assertNotIn('participants', response.data['results'][0])
+    
+    def test_exam_list_counts_annotated(self):
+        """考试列表的参与人数和已考试人数由子查询标注，查询数不随考试数量增加"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        ExamResult.objects.create(
+            exam=self.exam, user=self.employee_user, status='graded',
+            score=85, submitted_at=timezone.now()
+        )
+        self.exam.participants.add(self.exam_user)
+        self.client.force_authenticate(user=self.exam_user)
+        url = '/api/examination/exams/'
+        
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url)
+        row = response.data['results'][0]
+        self.assertEqual((row['participant_count'], row['result_count']), (2, 1))
+        
+        for i in range(5):
+            exam = Exam.objects.create(
+                code=f'EXAM1{i}', title=f'考试{i}', question_bank=self.question_bank,
+                start_time=self.exam.start_time, end_time=self.exam.end_time,
+                created_by=self.admin_user
+            )
+            exam.participants.add(self.employee_user)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(many.captured_queries), len(single.captured_queries))
+        counts = {row['code']: row['participant_count'] for row in response.data['results']}
+        self.assertEqual((counts['EXAM001'], counts['EXAM10']), (2, 1))
+        
+        # 只在请求 participants 字段时预取参与者
+        response = self.client.get(url, {'fields': 'id,code,participants'})
+        row = next(r for r in response.data['results'] if r['code'] == 'EXAM001')
+        self.assertEqual(sorted(row['participants']), sorted([self.employee_user.id, self.exam_user.id]))
+    
+    def test_exam_participants_resource(self):
+        """参与者子资源：分页、最近一次结果、按状态过滤；详情默认不内联参与者明细"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        users = [
+            get_user_model().objects.create_user(
+                username=f'p{i}', password='pass123', real_name=f'参与者{i}', employee_id=f'P{i:03d}'
+            )
+            for i in range(5)
+        ]
+        self.exam.participants.add(*users)
+        ExamResult.objects.create(
+            exam=self.exam, user=users[0], status='graded', score=90, is_passed=True,
+            submitted_at=timezone.now()
+        )
+        ExamResult.objects.create(exam=self.exam, user=users[1], status='in_progress')
+        
+        self.client.force_authenticate(user=self.exam_user)
+        url = f'/api/examination/exams/{self.exam.id}/participants/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['count'], 6)
+        self.assertIsNotNone(data['next'])
+        # 考试结果以一次 LEFT JOIN 读取，不使用逐行的相关子查询
+        page_sql = [q['sql'] for q in queries.captured_queries if 'FROM "users_user"' in q['sql'] and 'LIMIT' in q['sql']]
+        self.assertEqual(len(page_sql), 1)
+        self.assertEqual(page_sql[0].count('LEFT OUTER JOIN "exam_results"'), 1)
+        self.assertNotIn('(SELECT', page_sql[0])
+        first = data['results'][0]
+        self.assertEqual(first['employee_id'], 'EMP001')
+        
+        response = self.client.get(url, {'keyword': 'P000'})
+        row = response.data['data']['results'][0]
+        self.assertEqual((row['result_status'], row['is_passed']), ('graded', True))
+        self.assertEqual(row['score'], '90.00')
+        
+        response = self.client.get(url, {'result_status': 'not_started'})
+        self.assertEqual(response.data['data']['count'], 4)
+        response = self.client.get(url, {'result_status': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get(f'/api/examination/exams/{self.exam.id}/')
+        self.assertNotIn('participants_detail', response.data)
+        self.assertEqual(response.data['participant_count'], 6)
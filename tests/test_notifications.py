@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""通知发送测试"""
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.common.email_service import EmailService, SITE_NAME
+from apps.common.notifications import (
+    NotificationRenderer, build_email_message, enqueue_email,
+    notification_batch, send_email_batch
+)
+from apps.examination.models import Exam
+from apps.users.models import User
+
+
+class FlakyEmailBackend(EmailBackend):
+    """发往指定地址时失败的测试邮件后端"""
+
+    def send_messages(self, messages):
+        if any('bad@example.com' in message.to for message in messages):
+            raise ConnectionError('mock failure')
+        return super().send_messages(messages)
+
+
+class NotificationTests(TestCase):
+    """批量通知测试"""
+
+    def run_batch(self, batch):
+        """同步执行批量任务"""
+        return send_email_batch(batch)
+
+    def test_notification_batch_coalesces_messages(self):
+        """测试批次内的邮件合并为少量任务，共用一个连接发送"""
+        with mock.patch('apps.common.notifications.EMAIL_BATCH_SIZE', 100), \
+                mock.patch.object(send_email_batch, 'delay', side_effect=self.run_batch) as delay, \
+                mock.patch('apps.common.notifications.get_connection', wraps=mail.get_connection) as get_connection:
+            with self.captureOnCommitCallbacks(execute=True):
+                with notification_batch():
+                    for i in range(250):
+                        enqueue_email(build_email_message(
+                            f'通知 {i}', '正文', [f'user{i}@example.com'], '<p>正文</p>'
+                        ))
+                    # 空收件人不入队
+                    enqueue_email(build_email_message('通知', '正文', ['']))
+                    self.assertEqual(delay.call_count, 0)
+
+        self.assertEqual(delay.call_count, 3)
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual(len(mail.outbox), 250)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    @override_settings(EMAIL_BACKEND='tests.test_notifications.FlakyEmailBackend')
+    def test_failed_messages_retried_individually(self):
+        """测试发送失败的邮件单独重试，不影响同批其他邮件"""
+        batch = [
+            build_email_message('通知', '正文', ['good@example.com']),
+            build_email_message('通知', '正文', ['bad@example.com']),
+        ]
+
+        with mock.patch.object(send_email_batch, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                sent = send_email_batch(batch)
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        retried = apply_async.call_args.kwargs['args'][0]
+        self.assertEqual([m['to'] for m in retried], [['bad@example.com']])
+        self.assertEqual(retried[0]['attempts'], 1)
+
+        # 超过最大重试次数后不再入队
+        with mock.patch.object(send_email_batch, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                send_email_batch([dict(batch[1], attempts=3)])
+        apply_async.assert_not_called()
+
+    def test_render_many_matches_single_render(self):
+        """测试批量渲染（预渲染公共变量）与逐个渲染结果一致，纯文本来自文本模板"""
+        now = timezone.now()
+        exam = Exam(title='SMT<工艺>考试', code='EXAM-001', start_time=now, end_time=now,
+                    time_limit=60, total_score=100, passing_score=60, total_questions=20)
+        users = [User(username=f'u{i}', real_name=f'员工{i}') for i in range(3)]
+
+        renderer = NotificationRenderer('exam_notification')
+        batch = renderer.render_many([{'user': u} for u in users], {'exam': exam, 'site_name': SITE_NAME})
+        single = [renderer.render({'user': u, 'exam': exam, 'site_name': SITE_NAME}) for u in users]
+        self.assertEqual(batch, single)
+
+        text, html = batch[1]
+        self.assertIn('员工1', text)
+        self.assertIn('SMT<工艺>考试', text)
+        self.assertNotIn('<table>', text)
+        self.assertIn('SMT&lt;工艺&gt;考试', html)
+
+    def test_send_bulk_notifications(self):
+        """测试批量通知渲染后合并为一个发送任务"""
+        now = timezone.now()
+        exam = Exam(title='考试', code='EXAM-002', start_time=now, end_time=now,
+                    time_limit=60, total_score=100, passing_score=60, total_questions=20)
+        users = [User(username=f'u{i}', real_name=f'员工{i}', email=f'u{i}@example.com') for i in range(5)]
+        users.append(User(username='noemail', real_name='无邮箱'))
+
+        with mock.patch.object(send_email_batch, 'delay', side_effect=self.run_batch) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                EmailService.send_exam_notifications(users, exam)
+
+        self.assertEqual(delay.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].subject, '考试通知 - 考试')
+        self.assertIn('员工0', mail.outbox[0].body)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""报表生成测试"""
+import csv
+import io
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.reporting.models import ReportTemplate, GeneratedReport
+from apps.reporting.tasks import generate_report
+from apps.training.models import Course, TrainingRecord
+from apps.users.models import Role, User
+
+
+class ReportGenerationTests(TestCase):
+    """异步报表生成测试"""
+
+    def setUp(self):
+        """测试准备"""
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = APIClient()
+        role = Role.objects.create(name='培训经理', code='training_manager')
+        self.manager = User.objects.create_user(
+            username='manager', password='pass123', real_name='经理',
+            employee_id='M001', role=role
+        )
+        self.template = ReportTemplate.objects.create(
+            name='培训统计', code='training_stats',
+            report_type=ReportTemplate.ReportType.TRAINING_STATISTICS,
+            created_by=self.manager
+        )
+        course = Course.objects.create(
+            title='安全培训', code='SAFE001', duration=60,
+            created_by=self.manager, status='published'
+        )
+        for i in range(25):
+            user = User.objects.create_user(
+                username=f'trainee{i}', password='pass123', real_name=f'学员{i}',
+                employee_id=f'T{i:03d}'
+            )
+            TrainingRecord.objects.create(
+                user=user, course=course, status='completed' if i % 2 else 'enrolled',
+                progress=100 if i % 2 else 0, complete_date=timezone.now() if i % 2 else None
+            )
+        self.client.force_authenticate(user=self.manager)
+
+    def create_report(self, file_format, **extra):
+        """通过接口创建报表（同步执行生成任务）"""
+        with mock.patch.object(generate_report, 'delay', side_effect=generate_report) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/reporting/generated/', dict({
+                    'template': self.template.id,
+                    'title': '培训统计报表',
+                    'file_format': file_format,
+                }, **extra), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(delay.call_count, 1)
+        return GeneratedReport.objects.get(id=response.data['id'])
+
+    def download(self, report, **headers):
+        """下载报表内容"""
+        response = self.client.get(f'/api/reporting/generated/{report.id}/download/', **headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_generate_csv_report_and_range_download(self):
+        """测试生成CSV报表，支持 Range 下载"""
+        report = self.create_report('csv')
+        self.assertEqual(report.status, GeneratedReport.Status.COMPLETED)
+        self.assertIsNotNone(report.completed_at)
+        self.assertTrue(report.file_path.endswith(f'/{report.id}.csv'))
+
+        response, content = self.download(report)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(content), report.file_size)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['工号', '姓名'])
+        self.assertEqual(len(rows), 26)
+
+        response, partial = self.download(report, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{report.file_size}')
+        self.assertEqual(partial, content[10:20])
+
+        response, partial = self.download(report, HTTP_RANGE='bytes=-5')
+        self.assertEqual(partial, content[-5:])
+
+        response, _ = self.download(report, HTTP_RANGE=f'bytes={report.file_size}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_generate_excel_and_pdf_reports(self):
+        """测试生成Excel和PDF报表，参数过滤生效"""
+        report = self.create_report('excel', parameters={'user_id': User.objects.get(username='trainee3').id})
+        _, content = self.download(report)
+        sheet = load_workbook(io.BytesIO(content)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:2], ('T003', '学员3'))
+
+        report = self.create_report('pdf')
+        response, content = self.download(report)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+
+    def test_unsupported_report_type_fails(self):
+        """测试暂不支持的报表类型标记为生成失败"""
+        self.template.report_type = 'unknown'
+        self.template.save()
+
+        report = self.create_report('csv')
+        self.assertEqual(report.status, GeneratedReport.Status.FAILED)
+        self.assertIn('不支持的报表类型', report.error_message)
+
+        response, _ = self.download(report)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_report_type_capability_and_scope(self):
+        """测试报表类型所需能力，非经理级别只能生成本部门数据"""
+        from apps.organization.models import Department
+
+        department = Department.objects.create(name='生产部', code='PROD')
+        engineer = User.objects.create_user(
+            username='engineer', password='pass123', real_name='工程师', employee_id='E001',
+            role=Role.objects.create(name='工程师', code='me_engineer'), department=department
+        )
+        User.objects.filter(username__in=['trainee1', 'trainee2']).update(department=department)
+        self.client.force_authenticate(user=engineer)
+
+        report = self.create_report('csv', parameters={'department_id': None})
+        _, content = self.download(report)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual([row[0] for row in rows[1:]], ['T001', 'T002'])
+
+        # 审计日志报表只允许系统管理员和HR
+        self.template.report_type = ReportTemplate.ReportType.USER_ACTIVITY
+        self.template.save()
+        response = self.client.post('/api/reporting/generated/', {
+            'template': self.template.id, 'title': '用户活动', 'file_format': 'csv',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(GeneratedReport.objects.filter(title='用户活动').exists())
+
+    def test_competency_matrix(self):
+        """测试能力矩阵：分页、缓存失效和Excel导出"""
+        from apps.competency.models import Competency, CompetencyAssessment
+
+        python = Competency.objects.create(name='Python', code='C01', created_by=self.manager)
+        safety = Competency.objects.create(name='安全', code='C02', created_by=self.manager)
+        trainee0, trainee1 = User.objects.get(username='trainee0'), User.objects.get(username='trainee1')
+        for user, competency, level, score in [
+            (trainee0, python, 'skilled', 88), (trainee1, safety, 'master', 95),
+        ]:
+            CompetencyAssessment.objects.create(
+                user=user, competency=competency, assessor=self.manager,
+                level=level, score=score, status='approved'
+            )
+        # 未完成的评估不计入
+        pending = CompetencyAssessment.objects.create(
+            user=trainee1, competency=python, assessor=self.manager, level='proficient', status='pending'
+        )
+
+        url = '/api/reporting/competency_matrix/'
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['count'], 26)
+        self.assertEqual([c['code'] for c in data['competencies']], ['C01', 'C02'])
+        rows = {row['employee_id']: row for row in data['results']}
+        self.assertEqual(rows['M001']['levels'], [None, None])
+        self.assertEqual(rows['T000']['levels'], ['skilled', None])
+        self.assertEqual(rows['T000']['scores'], [88.0, None])
+
+        # 数据未变化时直接使用缓存（数据版本短暂缓存，不查询数据库），分页只读取所需的行块
+        from apps.reporting import matrix as matrix_module
+        matrix_module.cache.clear()
+        with mock.patch.object(matrix_module, 'MATRIX_BLOCK_SIZE', 10):
+            matrix_module.get_competency_matrix({})
+        with self.assertNumQueries(0), mock.patch.object(matrix_module, 'MATRIX_BLOCK_SIZE', 10):
+            matrix = matrix_module.get_competency_matrix({})
+            with mock.patch.object(matrix_module.cache, 'get_many', wraps=matrix_module.cache.get_many) as get_many:
+                self.assertEqual([row['employee_id'] for row in matrix.rows(11, 13)], ['T010', 'T011'])
+            self.assertEqual(len(get_many.call_args[0][0]), 1)
+            self.assertEqual(len(list(matrix.table_rows())), 26)
+
+        pending.status = 'completed'
+        pending.save()
+        response = self.client.get(url, {'page': 3, 'page_size': 1})
+        self.assertEqual(response.data['data']['results'][0]['levels'], ['proficient', 'master'])
+
+        response = self.client.get(url + 'export/', {'value': 'score'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(load_workbook(io.BytesIO(b''.join(response.streaming_content))).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('工号', '姓名', '部门', '岗位', 'Python', '安全'))
+        self.assertEqual(rows[2][4:], (88, None))
+        self.assertEqual(rows[3][4:], (None, 95))
+
+    def test_compliance_report(self):
+        """测试合规性报表：岗位要求与有效证书的差集，证书变化后增量更新"""
+        from apps.competency.models import Certificate, Competency
+        from apps.organization.models import Position
+        from apps.reporting.compliance import rebuild_compliance
+        from apps.reporting.models import ComplianceStatus
+        from apps.reporting.tasks import update_compliance_statuses
+
+        position = Position.objects.create(name='焊工', code='WELDER', level='junior', status='active')
+        welding = Competency.objects.create(name='焊接', code='WELD', created_by=self.manager)
+        safety = Competency.objects.create(name='安全', code='SAFE', created_by=self.manager)
+        optional = Competency.objects.create(name='选修', code='OPT', required=False, created_by=self.manager)
+        for competency in (welding, safety, optional):
+            competency.related_positions.add(position)
+
+        welders = list(User.objects.filter(username__in=['trainee0', 'trainee1']).order_by('username'))
+        User.objects.filter(id__in=[u.id for u in welders]).update(position=position)
+        Certificate.objects.create(
+            name='焊接证', user=welders[0], competency=welding, issue_date=timezone.now().date()
+        )
+        # 已过期的证书不算持有
+        Certificate.objects.create(
+            name='安全证', user=welders[0], competency=safety, issue_date=timezone.now().date(),
+            expiry_date=timezone.now().date() - timezone.timedelta(days=1)
+        )
+        # 读取接口不重算，由定时任务全量重算
+        rebuild_compliance()
+
+        response = self.client.get('/api/reporting/compliance_report/', {'position_id': position.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual((data['total_employees'], data['compliant_employees']), (2, 0))
+        missing = {u['real_name']: sorted(c['code'] for c in u['missing_competencies']) for u in data['non_compliant_users']}
+        self.assertEqual(missing, {'学员0': ['SAFE'], '学员1': ['SAFE', 'WELD']})
+        # 没有岗位要求的人员视为合规
+        self.assertEqual(ComplianceStatus.objects.filter(is_compliant=True).count(), 24)
+
+        # 颁发证书后只重算该人员
+        with mock.patch.object(update_compliance_statuses, 'delay', side_effect=update_compliance_statuses) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                Certificate.objects.create(
+                    name='安全证', user=welders[0], competency=safety, issue_date=timezone.now().date()
+                )
+        delay.assert_called_once_with([welders[0].id])
+        status_row = ComplianceStatus.objects.get(user=welders[0])
+        self.assertTrue(status_row.is_compliant)
+        self.assertEqual(status_row.held_count, 2)
+
+        # 岗位不再要求安全能力
+        with mock.patch.object(update_compliance_statuses, 'delay', side_effect=update_compliance_statuses):
+            with self.captureOnCommitCallbacks(execute=True):
+                safety.related_positions.remove(position)
+        self.assertEqual(ComplianceStatus.objects.get(user=welders[1]).missing_competencies, [welding.id])
+
+        # 保存人员时只有岗位、部门或在职状态变化才重算
+        with mock.patch.object(update_compliance_statuses, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                welders[1].refresh_from_db()
+                welders[1].phone = '13800000000'
+                welders[1].save()
+                welders[1].save(update_fields=['last_login'])
+            delay.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                welders[1].status = 'inactive'
+                welders[1].save()
+            delay.assert_called_once_with([welders[1].id])
+
+        self.template.report_type = ReportTemplate.ReportType.COMPLIANCE_REPORT
+        self.template.save()
+        report = self.create_report('csv', parameters={'non_compliant_only': True})
+        _, content = self.download(report)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[1:], [['T001', '学员1', '', '焊工', '1', '0', '否', '焊接']])
+
+    def test_explain_queries(self):
+        """主要查询的执行计划不出现全表扫描"""
+        from django.core.management import call_command
+        from apps.reporting.query_plans import explain_rows
+
+        output = io.StringIO()
+        call_command('explain_queries', '--fail-on-scan', stdout=output)
+        self.assertIn('0 个存在全表扫描', output.getvalue())
+
+        # 无索引的条件能被识别为全表扫描
+        _, scanned, _ = explain_rows(Course.objects.filter(description__contains='焊接'))
+        self.assertEqual(scanned, ['courses'])
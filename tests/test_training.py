@@ -107,6 +107,111 @@ class TrainingTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
     
+    def test_search_courses(self):
+        """课程检索 - 全文检索按相关度排序，结果与 LIKE 一致"""
+        from django.test import override_settings
+        
+        self.client.force_authenticate(user=self.training_user)
+        Course.objects.create(
+            code='COURSE005',
+            title='焊接工艺',
+            description='焊接安全规范与焊接质量检验',
+            status='published',
+            created_by=self.training_user
+        )
+        # 后创建，默认排序（创建时间倒序）在前
+        Course.objects.create(
+            code='COURSE006',
+            title='设备维护',
+            description='含焊接设备的日常维护',
+            status='published',
+            created_by=self.training_user
+        )
+        
+        url = '/api/training/courses/?search=焊接'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 标题命中且出现次数多的课程排在前面
+        self.assertEqual([c['code'] for c in response.data['results']], ['COURSE005', 'COURSE006'])
+        
+        # 多个检索词需全部命中
+        response = self.client.get('/api/training/courses/?search=焊接 日常')
+        self.assertEqual([c['code'] for c in response.data['results']], ['COURSE006'])
+        
+        # 回退到 LIKE 检索时命中相同
+        with override_settings(SEARCH_BACKEND='apps.common.search.LikeSearchBackend'):
+            response = self.client.get(url)
+        self.assertEqual({c['code'] for c in response.data['results']}, {'COURSE005', 'COURSE006'})
+    
+    def test_mysql_fulltext_backend(self):
+        """MySQL 全文检索 - 生成 MATCH AGAINST 短语查询，索引建立时关闭停用词"""
+        import importlib
+        from unittest import mock
+        from apps.common.search import MySQLFulltextBackend, RELEVANCE_FIELD
+        
+        backend = MySQLFulltextBackend()
+        queryset = backend.search(Course.objects.all(), ['title', 'code'], ['焊接', 'say "hi"'])
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('MATCH ("courses"."title", "courses"."code") AGAINST (%s IN BOOLEAN MODE)', sql)
+        self.assertIn('+"焊接" +"say  hi "', params)
+        self.assertIn(RELEVANCE_FIELD, queryset.query.annotations)
+        # 短于 ngram 长度的检索词回退到 LIKE
+        self.assertIsNone(backend.search(Course.objects.all(), ['title'], ['焊接', 'a']))
+        
+        migration = importlib.import_module('apps.training.migrations.0004_course_fulltext_index')
+        schema_editor = mock.MagicMock()
+        schema_editor.connection.vendor = 'mysql'
+        schema_editor.quote_name = lambda name: f'`{name}`'
+        schema_editor.connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (1,)
+        migration.create_fulltext_index(None, schema_editor)
+        statements = [call.args[0] for call in schema_editor.execute.call_args_list]
+        self.assertEqual(statements[0], 'SET SESSION innodb_ft_enable_stopword = OFF')
+        self.assertTrue(statements[1].startswith('CREATE FULLTEXT INDEX `courses_search_ft` ON `courses`'))
+        self.assertEqual(statements[2], 'SET SESSION innodb_ft_enable_stopword = ON')
+    
+    def test_course_tags(self):
+        """课程标签 - 标签文本同步为标签关联，支持按标签过滤和标签分面"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client.force_authenticate(user=self.training_user)
+        
+        # 名称规范化：大小写、全半角视为同一标签
+        self.course.tags = 'Python, 编程，ＰＹＴＨＯＮ'
+        self.course.save()
+        self.assertEqual(sorted(self.course.tag_items.values_list('name', flat=True)), ['python', '编程'])
+        Course.objects.create(
+            code='COURSE007',
+            title='Django实战',
+            tags='Python;Web',
+            status='published',
+            created_by=self.training_user
+        )
+        Course.objects.create(
+            code='COURSE008',
+            title='前端草稿',
+            tags='Web',
+            status='draft',
+            created_by=self.training_user
+        )
+        
+        response = self.client.get('/api/training/courses/?tag=Python')
+        self.assertEqual({c['code'] for c in response.data['results']}, {'COURSE001', 'COURSE007'})
+        response = self.client.get('/api/training/courses/?tag=python,WEB')
+        self.assertEqual([c['code'] for c in response.data['results']], ['COURSE007'])
+        
+        # 分面只统计已发布课程
+        response = self.client.get('/api/training/courses/tag-facets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facets = {f['name']: f['course_count'] for f in response.data['data']}
+        self.assertEqual(facets, {'python': 2, '编程': 1, 'web': 1})
+        
+        # 课程保存后缓存失效
+        self.course.tags = '编程'
+        self.course.save()
+        response = self.client.get('/api/training/courses/tag-facets/')
+        facets = {f['name']: f['course_count'] for f in response.data['data']}
+        self.assertEqual(facets, {'python': 1, '编程': 1, 'web': 1})
+    
     def test_create_course(self):
         """创建课程 - 确保created_by自动赋值"""
         self.client.force_authenticate(user=self.training_user)
@@ -244,4 +349,44 @@ class TrainingTests(TestCase):
         
         # 验证数据结构
         self.assertIn('total_courses', response.data['data'])
-        self.assertIn('completion_rate', response.data['data'])
\ No newline at end of file
+        self.assertIn('completion_rate', response.data['data'])
+    
+    def test_category_tree(self):
+        """分类树 - 一次查询构建并附带已发布课程数"""
+        self.client.force_authenticate(user=self.training_user)
+        
+        child = CourseCategory.objects.create(
+            name='后端开发',
+            code='BACKEND',
+            parent=self.category,
+            sort_order=2
+        )
+        CourseCategory.objects.create(
+            name='前端开发',
+            code='FRONTEND',
+            parent=self.category,
+            sort_order=1
+        )
+        Course.objects.create(
+            code='COURSE004',
+            title='Django进阶',
+            category=child,
+            status='published',
+            created_by=self.training_user
+        )
+        
+        url = '/api/training/categories/tree/?include_course_count=true'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        tree = response.data['data']
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(tree[0]['course_count'], 1)
+        # 子分类按 sort_order 排序
+        self.assertEqual([c['code'] for c in tree[0]['children']], ['FRONTEND', 'BACKEND'])
+        self.assertEqual(tree[0]['children'][1]['course_count'], 1)
+        
+        # 命中缓存后不再访问数据库
+        with self.assertNumQueries(0):
+            from apps.training.utils import get_category_tree
+            get_category_tree(include_course_count=True)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 """test_user_management_fixed.py - 用户管理测试"""
+import re
+
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 from apps.users.models import Role
 
@@ -14,6 +17,8 @@ class UserManagementTests(TestCase):
     def setUp(self):
         """测试准备"""
         self.client = APIClient()
+        # 清除分页总数缓存
+        cache.clear()
         
         # 创建角色 - 使用业务代码中的实际角色code
         self.admin_role = Role.objects.create(
@@ -67,6 +72,124 @@ class UserManagementTests(TestCase):
         # 根据权限矩阵，普通员工有user:read权限，应返回200
         self.assertEqual(response.status_code, status.HTTP_200_OK)
     
+    def test_list_users_with_cursor_pagination(self):
+        """游标分页：按 (created_at, id) 倒序，前后翻页，不执行 COUNT/OFFSET"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        
+        User = get_user_model()
+        for i in range(23):
+            User.objects.create_user(username=f'user{i}', password='pass123', employee_id=f'U{i:03d}')
+        # 创建时间相同的行按 id 区分
+        User.objects.filter(username__in=['user5', 'user6', 'user7']).update(created_at=timezone.now())
+        expected = list(User.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        
+        self.client.force_authenticate(user=self.admin_user)
+        url = '/api/users/?pagination=cursor&page_size=4'
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['code'], 200)
+            sql = ' '.join(q['sql'] for q in queries.captured_queries).upper()
+            self.assertNotIn('COUNT(', sql)
+            self.assertNotIn('OFFSET', sql)
+            pages.append(response.data['data'])
+            url = response.data['data']['next']
+        
+        self.assertEqual(len(pages), 7)
+        self.assertEqual([u['id'] for page in pages for u in page['results']], expected)
+        self.assertIsNone(pages[0]['previous'])
+        
+        # 从最后一页向前翻页
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual([u['id'] for u in response.data['data']['results']], expected[20:24])
+        
+        response = self.client.get('/api/users/', {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        # 默认仍为页码分页
+        response = self.client.get('/api/users/')
+        self.assertEqual(response.data['count'], 25)
+    
+    def test_list_users_count_cache(self):
+        """分页总数缓存，未过滤时可使用表统计信息估算"""
+        from unittest import mock
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get('/api/users/')
+        self.assertEqual((response.data['count'], response.data['count_exact']), (2, True))
+        
+        # 缓存期内不再执行 COUNT
+        get_user_model().objects.create_user(username='new', password='pass123', employee_id='NEW001')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/')
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in queries.captured_queries))
+        self.assertEqual(response.data['count'], 2)
+        
+        # 不同的过滤条件分别缓存
+        response = self.client.get('/api/users/', {'status': 'active'})
+        self.assertEqual(response.data['count'], 3)
+        
+        with mock.patch('apps.common.pagination.estimate_table_rows', return_value=1000):
+            response = self.client.get('/api/users/', {'count': 'estimated'})
+            self.assertEqual((response.data['count'], response.data['count_exact']), (1000, False))
+            # 有过滤条件时仍使用精确总数
+            response = self.client.get('/api/users/', {'count': 'estimated', 'status': 'active'})
+            self.assertEqual((response.data['count'], response.data['count_exact']), (3, True))
+        
+        # 数据库不支持估算（SQLite）时使用精确总数
+        response = self.client.get('/api/users/', {'count': 'estimated'})
+        self.assertTrue(response.data['count_exact'])
+    
+    def test_request_metrics(self):
+        """请求指标：按视图统计查询数和耗时，Prometheus 格式输出"""
+        from django.test import override_settings
+        from apps.common.metrics import registry
+        
+        registry.reset()
+        self.client.force_authenticate(user=self.admin_user)
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=True), self.assertLogs('apps.common.metrics', 'INFO') as logs:
+            response = self.client.get('/api/users/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
+        # 最慢 SQL 写入日志（带指纹），不作为指标标签
+        self.assertRegex(logs.output[0], r'view=user:user-list method=GET .*fingerprint=[0-9a-f]{12} sql=\w+')
+        
+        # 序列化耗时只计渲染，不含内层中间件（审计日志写入）
+        import time
+        from unittest import mock
+        from apps.audit.models import AuditLog
+        create = AuditLog.objects.create
+        with mock.patch.object(AuditLog.objects, 'create', side_effect=lambda **kw: (time.sleep(0.2), create(**kw))[1]):
+            with override_settings(REQUEST_METRICS_SERVER_TIMING=True):
+                response = self.client.post('/api/users/', {}, format='json')
+        serialize_ms = float(re.search(r'serialize;dur=([\d.]+)', response['Server-Timing']).group(1))
+        total_ms = float(re.search(r'total;dur=([\d.]+)', response['Server-Timing']).group(1))
+        self.assertGreaterEqual(total_ms, 200)
+        self.assertLess(serialize_ms, 100)
+        
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('tcms_request_queries_count{view="user:user-list",method="GET"} 1', body)
+        self.assertIn('tcms_request_slowest_query_ms{view="user:user-list",method="GET"} ', body)
+        self.assertNotIn('sql=', body)
+        
+        # 非管理员不能访问，采集端使用令牌访问
+        self.client.force_authenticate(user=self.employee_user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+        client = APIClient()
+        with override_settings(METRICS_AUTH_TOKEN='scrape-token'):
+            response = client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-token')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+    
     def test_create_user(self):
         """创建用户"""
         self.client.force_authenticate(user=self.admin_user)